@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Times Cube.handlePeriodStartEndLabel on 50 periods and 500 elements, against the scan over every duration it replaced.
+"""
+import timing
+import test_cube
+
+scanningCube = test_cube.makePeriodCube(test_cube.FakeScanningPeriodCube, 50, 500, 50)
+initialSize = len(scanningCube.factMemberships)
+scanningSeconds = timing.secondsToRun(scanningCube.handlePeriodStartEndLabel)
+cube = test_cube.makePeriodCube(test_cube.FakePeriodCube, 50, 500, 50)
+seconds = timing.secondsToRun(cube.handlePeriodStartEndLabel)
+assert test_cube.periodOutcome(cube, initialSize) == test_cube.periodOutcome(scanningCube, initialSize)
+print('period start/end labels, 50 periods x 500 elements: {:.4f}s scanning, {:.4f}s indexed'.format(scanningSeconds, seconds))
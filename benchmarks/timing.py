@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Shared setup for the benchmarks in this folder.  They are run by hand, for example
+``python benchmarks/flowThroughSuppression.py``, and never by pytest, since wall clock times on a shared machine are too
+noisy to fail a build on.  Each one builds its inputs with the helpers of the matching module in tests.
+"""
+import os, sys, time
+
+repoFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(repoFolder, 'src'), os.path.join(repoFolder, 'tests')]
+
+def secondsToRun(function, *args):
+    startedAt = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - startedAt
@@ -7,9 +7,9 @@ Data and content created by government employees within the scope of their emplo
 are not subject to domestic copyright protection. 17 U.S.C. 105.
 """
 
-import re
+import re, heapq
 from collections import defaultdict
-import arelle.ModelObject
+import arelle.ModelValue
 import Filing, Utils
 
 class Cube(object):
@@ -27,7 +27,8 @@ class Cube(object):
         self.timeAxis = set()
         self.unitAxis = {}
         self.labelDict = {}
-        self.factMemberships = []
+        self.factMemberships = [] # built by materializeFactMemberships(), None once releaseFactMemberships() gives them up
+        self.hasFactMemberships = False # kept after the fact memberships are released
         self.abstractDict = {}
         self.embeddingList = []
         self.isEmbedded = False
@@ -37,6 +38,7 @@ class Cube(object):
         self.isElements = False
         self.isUncategorizedFacts = linkroleUri == 'http://xbrl.sec.gov/role/uncategorizedFacts'
         self.axisAndMemberOrderDict = {} # contains a tuple with an orderDict of members and the axes order relative to other axes
+        self.memberOrderingDict = {} # axis qname to its special member ordering or None, see memberOrdering()
         self.defaultFilteredOutAxisSet = set()
         self.periodStartEndLabelDict = defaultdict(list) # populated by PresentationGroup.getLabelsRecursive
         modelRoleTypes = filing.modelXbrl.roleTypes[linkroleUri]
@@ -82,6 +84,23 @@ class Cube(object):
         return "[Cube R{!s} {} {}]".format(self.fileNumber, self.cubeType, self.shortName)
 
 
+    def materializeFactMemberships(self):
+        # fact memberships are kept on the elements until the cube is actually processed, so that empty or suppressed
+        # linkroles never hold a copy of them.  each element's list is in fact order, so merging on the fact index
+        # gives the same order as if every fact had been appended to every cube it belongs to.
+        elementFactMembershipsList = [self.filing.elementDict[concept.qname].factMemberships for concept in self.hasElements]
+        # the None in the tuple is only to handle periodStartLabels and periodEndLabels later on
+        self.factMemberships = [(fact, axisMemberLookupDict, None)
+                                for ignore, fact, axisMemberLookupDict in heapq.merge(*elementFactMembershipsList)]
+        self.hasFactMemberships = len(self.factMemberships) > 0
+
+    def releaseFactMemberships(self):
+        # flow through suppression needs every report laid out before any is written, so each cube's embedding is built from
+        # its fact memberships up front.  after that only an embedded cube reads them again, for the embeddings made later,
+        # so every other cube lets them go right away instead of holding them until its report is written.
+        self.factMemberships = None
+
+
     def areTherePhantomAxesInPGWithNoDefault(self):
         axesWithoutDefaultsThatAllFactsAreDefaultedOn = self.defaultFilteredOutAxisSet - set(self.axisAndMemberOrderDict)
         if len(axesWithoutDefaultsThatAllFactsAreDefaultedOn) > 0:
@@ -104,6 +123,18 @@ class Cube(object):
         # will side effect cube.periodStartEndLabelDict if there is a duration fact with period start/end label.
         # will generally side effect self.factMemberships by appending to it.
 
+        # index the durations by start time and by end time once.  the memberships appended below only reuse periods of
+        # durations that are already there, so the index stays complete while we append.
+        if len(discoveredDurations)==0:
+            durations = {dFxm[1]['period'] for dFxm in self.factMemberships if dFxm[1]['period'].periodTypeStr == 'duration'}
+        else:
+            durations = discoveredDurations
+        durationsByStartTime = defaultdict(set) # start time to set of start/end time tuples
+        durationsByEndTime = defaultdict(set) # end time to set of start/end time tuples
+        for dPeriod in durations:
+            durationsByStartTime[dPeriod.startTime].add((dPeriod.startTime,dPeriod.endTime))
+            durationsByEndTime[dPeriod.endTime].add((dPeriod.startTime,dPeriod.endTime))
+
         def matchingDurationSet(iFxm,preferredLabel): 
             # iFxm = instant Fact - axis - membership tuple.
             # return set of tuples consisting of start/end time tuple and start/end role
@@ -111,28 +142,11 @@ class Cube(object):
             iPeriod = iAxm['period'] # instant Period (Period is a synonym for StartEndContext)
             iTime = iPeriod.endTime # instant Time
             assert iPeriod.periodTypeStr == 'instant'
-            durations = set() # set of Periods to return
-            if len(discoveredDurations)==0:
-                for dFxm in self.factMemberships: # dFxm = duration's fact axis-membership tuple
-                    dAxm = dFxm[1] # duration's AxisMembership dictionary
-                    dPeriod = dAxm['period'] # duration's startEndContext
-                    if dPeriod.periodTypeStr == 'duration' and not dPeriod in durations:
-                        if 'Start' in preferredLabel:
-                            dTimeToMatch = dPeriod.startTime
-                        else:
-                            dTimeToMatch = dPeriod.endTime
-                        if dTimeToMatch == iTime:
-                            durations.add(dPeriod) 
+            if 'Start' in preferredLabel:
+                startEndTupleSet = durationsByStartTime.get(iTime, ())
             else:
-                for dPeriod in discoveredDurations:
-                    if not dPeriod in durations:
-                        if 'Start' in preferredLabel:
-                            dTimeToMatch = dPeriod.startTime
-                        else:
-                            dTimeToMatch = dPeriod.endTime
-                        if dTimeToMatch == iTime:
-                            durations.add(dPeriod)
-            return {((d.startTime,d.endTime),preferredLabel) for d in durations} 
+                startEndTupleSet = durationsByEndTime.get(iTime, ())
+            return {(startEndTuple,preferredLabel) for startEndTuple in startEndTupleSet} 
 
         initialSize = len(self.factMemberships)
         i = initialSize - 1
@@ -260,33 +274,24 @@ class Cube(object):
         # shows facts except within a Movement.  A complete movement needs a beginning instant,
         # an activity duration, and an ending instant. Any instants or durations that appear
         # among the facts, but are not part of a Movement, are not shown.
-        # There is one movement Candidate for each duration among the list of startEndContexts.
-        movementCandidateList = [[None,d,None] for d in sortedList if d.periodTypeStr == 'duration']
-        # Augment the triples in the candidate list with all the instants in the startEndContexts.
-        for i in sortedList:
-            if i.periodTypeStr == 'instant':
-                instantTime = i.endTime
-                for movement in movementCandidateList:
-                    d = movement[1]
-                    if instantTime == d.startTime:
-                        movement[0] = i
-                    if instantTime == d.endTime:
-                        movement[2] = i
-        pass # end for
+        # Index the instants by their time, so that each duration finds the instants at its start and end by lookup.
+        # If two instants had the same time, the later one in sortedList wins.
+        giveTimeGetInstantDict = {i.endTime : i for i in sortedList if i.periodTypeStr == 'instant'}
+        # There is one movement Candidate for each duration among the list of startEndContexts, augmented with the
+        # instants at its start and end.
+        movementCandidateList = [[giveTimeGetInstantDict.get(d.startTime),d,giveTimeGetInstantDict.get(d.endTime)]
+                                 for d in sortedList if d.periodTypeStr == 'duration']
         # Surviving movements are those which have a beginning, middle, and an end.
         # https://www.youtube.com/watch?v=hnoJwfnzmqA for more about this.
         movementList = [m for m in movementCandidateList if m[0] is not None and m[1] is not None and m[2] is not None]
-        # build a dictionary to tell what movements a startEndContext belongs to, which could be more than one.
-        giveContextGetMovementsDict = defaultdict(list)
-        for c in sortedList: # this dictionary could probably be dispensed with.
-            giveContextGetMovementsDict[c] += [m for m in movementList if c in m]
+        # the startEndContexts that belong to at least one movement.
+        survivorSet = {c for m in movementList for c in m}
         self.controller.logDebug("Statement {} has {} Movements.".format(self.shortName, len(movementList)))
-        for contextID, movements in giveContextGetMovementsDict.items():
-            if len(movements)==0:
+        for c in sortedList:
+            if c not in survivorSet:
                 # Contexts that aren't in a complete movement are removed (do not survive).
-                sortedList.remove(contextID)
-                self.controller.logDebug("Context {} was not part of a complete Movement".format(contextID))
-        return sortedList # from SurvivorsOfMovementAnalysis
+                self.controller.logDebug("Context {} was not part of a complete Movement".format(c))
+        return [c for c in sortedList if c in survivorSet] # from SurvivorsOfMovementAnalysis
 
 
 
@@ -325,20 +330,37 @@ class Cube(object):
             self.isUnlabeled = True
             
     def rearrangeGiveMemGetPositionDict(self,axisQname,giveMemGetPositionDict):
-        memberList = [item[0] for item in sorted(giveMemGetPositionDict.items(),key=lambda item : item[1])]
-        builtinAxisOrders = self.filing.builtinAxisOrders
-        builtinAxisOrder = next((s for s in builtinAxisOrders if axisQname==s[0]),None)
-        if builtinAxisOrder is not None:
-            (axis,members,lastmembers) = builtinAxisOrder
+        memberOrdering = self.memberOrdering(axisQname)
+        if memberOrdering is not None:
+            positionDict, lastPositionDict = memberOrdering
             self.controller.logDebug("Special sort of {} {} needed".format(axisQname,giveMemGetPositionDict))
-            prefix = axis.prefix
-            nsuri = axis.namespaceURI
-            ordering = [arelle.ModelObject.QName(prefix,nsuri,name) for name in members]   
-            overrideordering = [arelle.ModelObject.QName(prefix,nsuri,name) for name in lastmembers]                        
-            memberList = Utils.heapsort(memberList,(lambda x,y: Utils.compareInOrdering(x,y,ordering,overrideordering)))
+            memberList = [item[0] for item in sorted(giveMemGetPositionDict.items(),key=lambda item : item[1])]
+            memberList = Utils.orderMembers(memberList, positionDict, lastPositionDict)
             giveMemGetPositionDict = dict([(x,i) for i,x in enumerate(memberList)])
             self.controller.logDebug("Resulted in {}".format(giveMemGetPositionDict))
         return giveMemGetPositionDict
+
+    def memberOrdering(self, axisQname):
+        # member orders from the configuration win over the builtin ones.  either way, the member names are local names in
+        # the namespace of the axis.  returns None if the axis has no special order, otherwise a pair of dicts giving the
+        # position of the members named to go first and of the members named to go last.
+        try:
+            return self.memberOrderingDict[axisQname]
+        except KeyError:
+            pass
+        memberOrder = next((s for s in self.filing.configuredAxisOrders if axisQname==s[0]),None)
+        if memberOrder is None:
+            memberOrder = next((s for s in self.filing.builtinAxisOrders if axisQname==s[0]),None)
+        if memberOrder is None:
+            memberOrdering = None
+        else:
+            (axis,members,lastmembers) = memberOrder
+            prefix = axisQname.prefix
+            nsuri = axisQname.namespaceURI
+            memberOrdering = ({arelle.ModelValue.QName(prefix,nsuri,name) : i for i, name in enumerate(members)},
+                              {arelle.ModelValue.QName(prefix,nsuri,name) : i for i, name in enumerate(lastmembers)})
+        self.memberOrderingDict[axisQname] = memberOrdering
+        return memberOrdering
        
 
     def printCube(self):
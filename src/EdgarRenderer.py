@@ -96,6 +96,9 @@ def parseOptions(controller, args):
                      help=_("Boolean to indicate if processed filings should be deleted or not."))
     parser.add_option("--htmlReportFormat", dest="htmlReportFormat",
                      help=_("Type of HTML report...Complete: asPage rendering = True, or Fragment: asPage rendering = False."))
+    parser.add_option("--htmlReportEmitter", dest="htmlReportEmitter",
+                     help=_("How R htm files are produced...Xslt: run reportXslt, Native: write them directly as the bundled InstanceReport.xslt would "
+                            "(any other reportXslt is run instead), or Compare: run reportXslt and warn wherever the native output differs from it."))
 
     parser.add_option("--reportFormat", dest="reportFormat",
                       help=_("One of Xml, Html, or HtmlAndXml."))
@@ -108,6 +111,14 @@ def parseOptions(controller, args):
     parser.add_option("--auxMetadata", action="store_true", dest="auxMetadata", help=_("Set flag to generate inline xbrl auxiliary files"))
     
     parser.add_option("--noEquity", action="store_true", dest="noEquity", help=_("Set flag to suppress special treatment of Equity Statements. "))
+    parser.add_option("--memberOrders", dest="memberOrders",
+                      help=_("Special member orders for equity statement axes, overriding the builtin ones, in the form "
+                             "'prefix:Axis=FirstMember,SecondMember|LastMember;prefix:OtherAxis=...' with the axis prefix as "
+                             "declared in the instance and the members as local names in the axis namespace."))
+    parser.add_option("--reportProcesses", dest="reportProcesses",
+                      help=_("Number of worker processes used to render the reports of one instance; 0 or 1 renders them serially."))
+    parser.add_option("--htmlWriterThreads", dest="htmlWriterThreads",
+                      help=_("Number of threads that transform and write R htm files while the next report is laid out; 0 writes them in line."))
             
     parser.add_option("--xdgConfigHome", action="store", dest="xdgConfigHome",
                       help=_("Specify non-standard location for configuration and cache files (overrides environment parameter XDG_CONFIG_HOME)."))
@@ -573,13 +584,17 @@ class EdgarRenderer(Cntlr.Cntlr):
         self.defaultValueDict['excelXslt'] = 'InstanceReport_XmlWorkbook.xslt'
         self.defaultValueDict['failFile'] = 'errorLog.log'
         self.defaultValueDict['filingsFolder'] = 'Filings'
+        self.defaultValueDict['htmlReportEmitter'] = 'Xslt'
         self.defaultValueDict['htmlReportFormat'] = 'Complete'
+        self.defaultValueDict['htmlWriterThreads'] = '0'
         self.defaultValueDict['internetConnectivity'] = 'offline' 
+        self.defaultValueDict['memberOrders'] = None
         self.defaultValueDict['noEquity'] = str(False)
         self.defaultValueDict['processingFolder'] = 'Processing'
         self.defaultValueDict['processingFrequency'] = '10'
         self.defaultValueDict['renderingService'] = 'Instance'
         self.defaultValueDict['reportFormat'] = 'Html'
+        self.defaultValueDict['reportProcesses'] = '0'
         self.defaultValueDict['reportsFolder'] = 'Reports'
         self.defaultValueDict['reportXslt'] = 'InstanceReport.xslt'
         self.defaultValueDict['resourcesFolder'] = '..\\resources'
@@ -627,7 +642,34 @@ class EdgarRenderer(Cntlr.Cntlr):
         options.renderingService = setProp('renderingService', options.renderingService, rangeList=['Instance','Daemon'])        
         options.reportFormat = setProp('reportFormat', options.reportFormat, rangeList=['Html', 'Xml', 'HtmlAndXml'])               
         options.htmlReportFormat = setProp('htmlReportFormat', options.htmlReportFormat, rangeList=['Complete','Fragment'])
+        options.htmlReportEmitter = setProp('htmlReportEmitter', options.htmlReportEmitter, rangeList=['Xslt','Native','Compare'])
         options.zipOutputFile = setProp('zipOutputFile', options.zipOutputFile)        
+        options.reportProcesses = setProp('reportProcesses', options.reportProcesses)
+        try:
+            self.reportProcesses = int(self.reportProcesses)
+        except ValueError:
+            raise Exception("reportProcesses '{}' on command line or config file is not an integer.".format(self.reportProcesses))
+        options.htmlWriterThreads = setProp('htmlWriterThreads', options.htmlWriterThreads)
+        try:
+            self.htmlWriterThreads = int(self.htmlWriterThreads)
+        except ValueError:
+            raise Exception("htmlWriterThreads '{}' on command line or config file is not an integer.".format(self.htmlWriterThreads))
+        # member orders are prefixed axis names and local member names, so unlike the properties above they are not casefolded.
+        options.memberOrders = next((x for x in [options.memberOrders, self.configDict['memberOrders'], self.defaultValueDict['memberOrders']]
+                                     if x is not None), None)
+        self.memberOrders = []
+        for memberOrderStr in (options.memberOrders or '').split(';'):
+            if memberOrderStr.strip() == '':
+                continue
+            axisName, equals, membersStr = memberOrderStr.partition('=')
+            prefix, colon, axisLocalName = (x.strip() for x in axisName.partition(':'))
+            if equals == '' or prefix == '' or axisLocalName == '':
+                raise Exception("memberOrders entry '{}' on command line or config file is not of the form prefix:Axis=Member,...|LastMember,...".format(memberOrderStr))
+            firstMembersStr, ignore, lastMembersStr = membersStr.partition('|')
+            self.memberOrders += [(prefix + ':' + axisLocalName,
+                                   [x.strip() for x in firstMembersStr.split(',') if x.strip() != ''],
+                                   [x.strip() for x in lastMembersStr.split(',') if x.strip() != ''])]
+        self.logDebug("{}=\t{}".format('memberOrders', self.memberOrders))
         # These options have to be passed back to arelle via the options object
         options.internetConnectivity = setProp('internetConnectivity',options.internetConnectivity, rangeList=['online','offline'])
         
@@ -692,6 +734,12 @@ class EdgarRenderer(Cntlr.Cntlr):
         # Report XSLT is required when reportFormat contains 'Html'.     
         if self.reportXslt is None and 'html' in self.reportFormat.casefold():
             raise Exception('No {} specified when {}={} requires it.'.format('reportXslt', 'reportFormat', self.reportFormat))
+        # the native emitter only writes what the bundled stylesheet would, so any other reportXslt has to be run.
+        bundledReportXslt = join(self.resourcesFolder, self.defaultValueDict['reportXslt'])
+        if (self.htmlReportEmitter == 'native' and self.reportXslt is not None
+                and os.path.normcase(os.path.abspath(self.reportXslt)) != os.path.normcase(os.path.abspath(bundledReportXslt))):
+            self.logWarn("htmlReportEmitter Native only mirrors {}, so reportXslt {} is run instead.".format(bundledReportXslt, self.reportXslt))
+            self.htmlReportEmitter = options.htmlReportEmitter = 'xslt'
 
         # Summary XSLT is optional, but do report if you can't find it.
         #setResourceFile('summaryXslt', options.summaryXslt, 'INVALID_CONFIG_SUMMARYXSLT')
@@ -1238,7 +1286,7 @@ class EdgarRenderer(Cntlr.Cntlr):
         rootETree = summary.buildSummaryETree()
         IoManager.writeXmlDoc(rootETree, os.path.join(self.reportsFolder, 'FilingSummary.xml'))
         if self.summaryXslt and len(self.summaryXslt) > 0 :
-            summary_transform = etree.XSLT(etree.parse(self.summaryXslt))
+            summary_transform = Utils.getXslt(self.summaryXslt)
             result = summary_transform(rootETree, asPage=etree.XSLT.strparam('true'))
             IoManager.writeHtmlDoc(result, os.path.join(self.reportsFolder, 'FilingSummary.htm'))
         if self.auxMetadata: 
@@ -16,20 +16,25 @@ class FactAxisMemberGroup(object):
         self.fact = fact
         self.preferredLabel = preferredLabel
         self.factAxisMemberRowList = []
-        self.axisMemberPositionTupleRowList = []  # for sorting
         self.factAxisMemberColList = []
-        self.axisMemberPositionTupleColList = []  # for sorting
+        self.coordinateRowTuple = None  # for sorting, tuples of FactAxisMember.positionKey, see Embedding.assignCoordinateKeys()
+        self.coordinateColTuple = None
 
     def __str__(self):
         return "[{}='{}' w/{}Cx{}R]".format(self.fact.elementQname, self.fact.sValue, len(self.factAxisMemberColList), len(self.factAxisMemberRowList))
 
 class FactAxisMember(object):
+    # the same axis, member, position and label repeat across thousands of facts, so these are interned per embedding by
+    # Embedding.internFactAxisMember() and shared by every FactAxisMemberGroup that needs one.
+    __slots__ = ('pseudoAxisName', 'member', 'axisMemberPositionTuple', 'memberLabel', 'memberIsDefault', 'positionKey')
+
     def __init__(self, pseudoAxisName, member, axisMemberPositionTuple=None, memberLabel='None', memberIsDefault=False):
         self.pseudoAxisName = pseudoAxisName
         self.member = member  # either a qname or a startEndContext or a unitID object
         self.axisMemberPositionTuple = axisMemberPositionTuple
         self.memberLabel = memberLabel
         self.memberIsDefault = memberIsDefault
+        self.positionKey = None  # small int with the same order as axisMemberPositionTuple on this axis, see Embedding.assignCoordinateKeys()
         
     def __str__(self):
         return "[{}={}]".format(self.pseudoAxisName, self.member)
@@ -51,6 +56,7 @@ class Embedding(object):
         self.colCommands = []
         #self.groupedAxisQnameSet = set()
         self.factAxisMemberGroupList = []
+        self.factAxisMemberDict = {} # flyweight table of FactAxisMember objects, see internFactAxisMember()
         self.hasElementsAndElementMemberPairs = set()
         self.isEmbeddingOrReportBroken = False
         self.hasDiscoveredDurations = False
@@ -79,7 +85,7 @@ class Embedding(object):
         for pseudoaxisQname, (ignore, presentationGroupOrderForAxis) in self.cube.axisAndMemberOrderDict.items():
             axes.add(pseudoaxisQname)
             if presentationGroupOrderForAxis is not None:  # unit, period and primary don't have a presentationGroup order
-                axisLabel = self.cube.hasAxes[pseudoaxisQname].arelleConcept.label()
+                axisLabel = self.filing.conceptLabel(self.cube.hasAxes[pseudoaxisQname].arelleConcept)
                 if axisLabel is None:
                     axisLabel = ''
                 orderedListOfOrderAxisQnameTuples += [(presentationGroupOrderForAxis, pseudoaxisQname, axisLabel)]
@@ -263,9 +269,18 @@ class Embedding(object):
             primaryRowOrColStr = 'col'
             primaryIndex = len(self.rowCommands) + self.columnPrimaryPosition
 
+        # facts with the same context and unit share one getMemberOnAxisForFactDict, and everything about the axes other than primary
+        # depends only on it, so that part is worked out once per dimension signature.  it is keyed by id() because the dicts
+        # are all held by self.cube.factMemberships while we loop.
+        nonPrimarySignatureDict = {}
         for fact, getMemberOnAxisForFactDict, periodStartEndLabel in self.cube.factMemberships:
-            factAxisMemberGroupList = self.buildFactAxisMemberGroupsForFactOrFilter(pseudoAxisRowColStrTuples, pseudoAxisSet, fact, getMemberOnAxisForFactDict,
-                                                                                    periodStartEndLabel, primaryIndex, primaryRowOrColStr)
+            try:
+                nonPrimaryResult = nonPrimarySignatureDict[id(getMemberOnAxisForFactDict)]
+            except KeyError:
+                nonPrimaryResult = self.generateFactAxisMembersForNonPrimary(pseudoAxisRowColStrTuples, pseudoAxisSet, fact, getMemberOnAxisForFactDict)
+                nonPrimarySignatureDict[id(getMemberOnAxisForFactDict)] = nonPrimaryResult
+            factAxisMemberGroupList = self.buildFactAxisMemberGroupsForFactOrFilter(nonPrimaryResult, fact, periodStartEndLabel,
+                                                                                    primaryIndex, primaryRowOrColStr)
 
             if len(factAxisMemberGroupList) == 0:
                 if fact in self.filing.factToEmbeddingDict:
@@ -317,20 +332,38 @@ class Embedding(object):
 
 
 
-    def buildFactAxisMemberGroupsForFactOrFilter(self, pseudoAxisRowColStrTuples, pseudoAxisSet, fact, getMemberOnAxisForFactDict,
-                                                 periodStartEndLabel, primaryIndex, primaryRowOrColStr):
+    # returns (factAxisMemberTupleList, axisWithNoDefault, isFiltered) for a dimension signature.  factAxisMemberTupleList has the
+    # factAxisMembers made before the fact was filtered, if it was.  axisWithNoDefault is the axis that filtered it for lack of
+    # a default, which is warned about for every fact.
+    def generateFactAxisMembersForNonPrimary(self, pseudoAxisRowColStrTuples, pseudoAxisSet, fact, getMemberOnAxisForFactDict):
         # if fact has an axis that's filtered out or that isn't associated with any facts, filter fact
         if len(set(getMemberOnAxisForFactDict) - pseudoAxisSet) > 0:
-            return []
+            return ([], None, True)
 
         # loop through each axis other than primary and make a factAxisMember for each axis
         factAxisMemberTupleList = []
         for axisIndex, (pseudoAxisName, rowOrColStr) in enumerate(pseudoAxisRowColStrTuples):
             if pseudoAxisName != 'primary':
-                factAxisMember = self.generateFactAxisMemberForNonPrimary(fact, axisIndex, periodStartEndLabel, pseudoAxisName, getMemberOnAxisForFactDict)
+                factAxisMember, axisWithNoDefault = self.generateFactAxisMemberForNonPrimary(fact, axisIndex, pseudoAxisName, getMemberOnAxisForFactDict)
                 if factAxisMember is None:
-                    return []
+                    return (factAxisMemberTupleList, axisWithNoDefault, True)
                 factAxisMemberTupleList += [(factAxisMember, rowOrColStr)] 
+        return (factAxisMemberTupleList, None, False)
+
+
+    def buildFactAxisMemberGroupsForFactOrFilter(self, nonPrimaryResult, fact, periodStartEndLabel, primaryIndex, primaryRowOrColStr):
+        factAxisMemberTupleList, axisWithNoDefault, isFiltered = nonPrimaryResult
+        for factAxisMember, rowOrColStr in factAxisMemberTupleList:
+            if not factAxisMember.memberIsDefault and factAxisMember.pseudoAxisName not in {'period', 'unit'}:
+                self.hasElementsAndElementMemberPairs.add((fact.qname, factAxisMember.member))
+        if axisWithNoDefault is not None:
+            errorStr = Utils.printErrorStringToDisambiguateEmbeddedOrNot(self.factThatContainsEmbeddedCommand)
+            #message = ErrorMgr.getError('AXIS_HAS_NO_DEFAULT').format(self.cube.shortName, errorStr, fact.qname, fact.contextID, axis.arelleConcept.qname)
+            self.controller.logWarn(("In ''{}''{}, the fact {!s} with context {} was filtered because the " \
+                                     "axis {!s} has no default.").format(self.cube.shortName, errorStr, fact.qname,
+                                     fact.contextID, axisWithNoDefault.arelleConcept.qname))
+        if isFiltered:
+            return []
 
         # the same element can be listed by the presentationGroup multiple times, even with the same label, so generateFactAxisMemberLabelListForPrimary()
         # returns a list, but if it's empty, generateFactAxisMemberLabelListForPrimary() found no matches and we won't enter the for loop, so it is
@@ -347,10 +380,8 @@ class Embedding(object):
             for factAxisMember, rowOrColStr in factAxisMemberTupleListCopy:
                 if rowOrColStr == 'row':
                     factAxisMemberGroup.factAxisMemberRowList += [factAxisMember]
-                    factAxisMemberGroup.axisMemberPositionTupleRowList += [factAxisMember.axisMemberPositionTuple]
                 else:
                     factAxisMemberGroup.factAxisMemberColList += [factAxisMember]
-                    factAxisMemberGroup.axisMemberPositionTupleColList += [factAxisMember.axisMemberPositionTuple]
 
             factAxisMemberGroupList += [factAxisMemberGroup]
 
@@ -371,9 +402,6 @@ class Embedding(object):
         factAxisMemberLabelList = []
         for positionOnPrimaryAxis, labelRole in getMemberPositionsOnAxisDict[fact.qname]:
             if (labelRole not in Utils.startEndRoles or periodStartEndLabel == labelRole):
-                factAxisMember = FactAxisMember('primary', fact.qname)
-                factAxisMember.axisMemberPositionTuple = (axisIndex, positionOnPrimaryAxis)
-
                 if labelRole in Utils.durationStartEndRoles:
                     labelStr = fact.qname.localName
                     # Issue warnings on every fact, because it applies to all the facts.
@@ -389,16 +417,17 @@ class Embedding(object):
                                                         .format(originalLabelRole.split("/")[-1])
                                                       +"It will be treated as if it had no label."))
                 else:
-                    labelStr = fact.concept.label(preferredLabel=labelRole, fallbackToQname=True)
+                    labelStr = self.filing.conceptLabel(fact.concept, preferredLabel=labelRole, fallbackToQname=True)
 
-                factAxisMember.memberLabel = labelStr
+                factAxisMember = self.internFactAxisMember('primary', fact.qname, (axisIndex, positionOnPrimaryAxis), labelStr, False)
                 factAxisMemberLabelList += [(factAxisMember, labelRole)]
         return factAxisMemberLabelList
 
 
     # this builds a factAxisMember and sets the memberLabel and axisMemberPositionTuple attributes.
-    # it also decides whether to filter the fact.
-    def generateFactAxisMemberForNonPrimary(self, fact, axisIndex, periodStartEndLabel, pseudoAxisName, getMemberOnAxisForFactDict):
+    # it also decides whether to filter the fact, returning (None, axis) instead if it's filtered because the axis has no default.
+    # the fact is only used for its unit, so the result is the same for every fact sharing getMemberOnAxisForFactDict.
+    def generateFactAxisMemberForNonPrimary(self, fact, axisIndex, pseudoAxisName, getMemberOnAxisForFactDict):
         getMemberPositionsOnAxisDict = self.getMemberPositionsOnAxisDictOfDicts[pseudoAxisName]
         memberLabel = None
         memberQname = getMemberOnAxisForFactDict.get(pseudoAxisName)
@@ -412,7 +441,7 @@ class Embedding(object):
                 memberPositionOnAxis = Utils.minNumber  # has no order from PG, so put at beginning
             else:
                 if pseudoAxisName in self.cube.defaultFilteredOutAxisSet:
-                    return None # this fact is on a real axis with the default filtered out, so it's filtered too
+                    return (None, None) # this fact is on a real axis with the default filtered out, so it's filtered too
                 axis = self.cube.hasAxes[pseudoAxisName]
                 try:
                     axisDefaultQname = axis.defaultArelleConcept.qname
@@ -422,14 +451,9 @@ class Embedding(object):
                     # in which case we don't want to filter it if it's an uncategorized fact, we want to print it to show the filer
                     # that it wasn't in any other report.  so, in this case, we manufacture a label.
                     if not self.cube.isUncategorizedFacts:
-                        errorStr = Utils.printErrorStringToDisambiguateEmbeddedOrNot(self.factThatContainsEmbeddedCommand)
-                        #message = ErrorMgr.getError('AXIS_HAS_NO_DEFAULT').format(self.cube.shortName, errorStr, fact.qname, fact.contextID, axis.arelleConcept.qname)
-                        self.controller.logWarn(("In ''{}''{}, the fact {!s} with context {} was filtered because the " \
-                                                 "axis {!s} has no default.").format(self.cube.shortName, errorStr, fact.qname,
-                                                 fact.contextID, axis.arelleConcept.qname))
-                        return None
+                        return (None, axis) # the caller warns about this for each fact
                 if pseudoAxisName in self.cube.defaultFilteredOutAxisSet:  # this isn't checked earlier to give the above warning a chance to be issued
-                    return None
+                    return (None, None)
 
                 try:
                     memberLabel = self.cube.labelDict[axisDefaultQname]
@@ -446,21 +470,19 @@ class Embedding(object):
                     if self.cube.isUncategorizedFacts:
                         memberPositionOnAxis = len(getMemberPositionsOnAxisDict)
                     else:
-                        return None
+                        return (None, None)
             memberIsDefault = True
 
         else: # member is not a default
             try:
                 memberPositionOnAxis = getMemberPositionsOnAxisDict[memberQname]  # look up memberQname order
             except KeyError:
-                return None  # if this lookup fails, memberQname was filtered out by command, but is in presentationGroup
+                return (None, None)  # if this lookup fails, memberQname was filtered out by command, but is in presentationGroup
 
             if pseudoAxisName == 'period':
                 memberLabel = memberQname.label  # memberQname is a StartEndContext object
             else:
-                if pseudoAxisName != 'unit':
-                    self.hasElementsAndElementMemberPairs.add((fact.qname, memberQname))
-
+                # the caller adds (fact.qname, memberQname) to self.hasElementsAndElementMemberPairs for each fact.
                 try:
                     memberLabel = self.cube.labelDict[memberQname]
                 except KeyError:
@@ -470,8 +492,18 @@ class Embedding(object):
                         memberLabel = Utils.prettyPrintQname(memberQname.localName)
             memberIsDefault = False
 
-        return FactAxisMember(pseudoAxisName, memberQname, axisMemberPositionTuple = (axisIndex, memberPositionOnAxis),
-                              memberLabel = memberLabel, memberIsDefault = memberIsDefault)
+        return (self.internFactAxisMember(pseudoAxisName, memberQname, (axisIndex, memberPositionOnAxis), memberLabel, memberIsDefault), None)
+
+
+    def internFactAxisMember(self, pseudoAxisName, member, axisMemberPositionTuple, memberLabel, memberIsDefault):
+        key = (pseudoAxisName, member, axisMemberPositionTuple, memberLabel, memberIsDefault)
+        try:
+            return self.factAxisMemberDict[key]
+        except KeyError:
+            factAxisMember = FactAxisMember(pseudoAxisName, member, axisMemberPositionTuple = axisMemberPositionTuple,
+                                            memberLabel = memberLabel, memberIsDefault = memberIsDefault)
+            self.factAxisMemberDict[key] = factAxisMember
+            return factAxisMember
 
 
 
@@ -510,22 +542,52 @@ class Embedding(object):
         rowUnitPosition = self.rowUnitPosition
         columnUnitPosition = self.columnUnitPosition
 
-        # go through each fact and change the order of the unit axis.
-        # we have to change FactAxisMember's axisMemberPositionTuple attribute, but this attribute is also copied to FactAxisMemberGroups's
-        # axisMemberPositionTupleRowOrColList attribute, so we have to change them both together.
-        if rowUnitPosition != -1:
-            for factAxisMemberGroup in self.factAxisMemberGroupList:
-                if factAxisMemberGroup.fact.unit is not None:
-                    self.reorderUnitHelper(factAxisMemberGroup.factAxisMemberRowList[rowUnitPosition], factAxisMemberGroup.axisMemberPositionTupleRowList, rowUnitPosition, unitOrderDict)
-        else:
-            for factAxisMemberGroup in self.factAxisMemberGroupList:
-                if factAxisMemberGroup.fact.unit is not None:
-                    self.reorderUnitHelper(factAxisMemberGroup.factAxisMemberColList[columnUnitPosition], factAxisMemberGroup.axisMemberPositionTupleColList, columnUnitPosition, unitOrderDict)
+        # go through each fact and change the order of the unit axis, by changing FactAxisMember's axisMemberPositionTuple attribute.
+        # the FactAxisMember is shared by every fact with the same unit in the same position, which is fine, since they all get the
+        # same new position, and the sort keys are only built afterwards by assignCoordinateKeys().
+        reorderedFactAxisMemberSet = set()
+        for factAxisMemberGroup in self.factAxisMemberGroupList:
+            if factAxisMemberGroup.fact.unit is not None:
+                if rowUnitPosition != -1:
+                    factAxisMember = factAxisMemberGroup.factAxisMemberRowList[rowUnitPosition]
+                else:
+                    factAxisMember = factAxisMemberGroup.factAxisMemberColList[columnUnitPosition]
+                if factAxisMember not in reorderedFactAxisMemberSet:
+                    reorderedFactAxisMemberSet.add(factAxisMember)
+                    self.reorderUnitHelper(factAxisMember, unitOrderDict)
 
-    def reorderUnitHelper(self, factAxisMember, axisMemberPositionTupleRowOrColList, unitAxisIndex, unitOrderDict):
+    def reorderUnitHelper(self, factAxisMember, unitOrderDict):
         axisOrderFromTuple = factAxisMember.axisMemberPositionTuple[0]
         newUnitOrderForUnit = unitOrderDict[factAxisMember.member]
-        factAxisMember.axisMemberPositionTuple = axisMemberPositionTupleRowOrColList[unitAxisIndex] = (axisOrderFromTuple, newUnitOrderForUnit)
+        factAxisMember.axisMemberPositionTuple = (axisOrderFromTuple, newUnitOrderForUnit)
+
+
+    def assignCoordinateKeys(self):
+        # the layout used to sort and compare lists of (axisIndex, positionOnAxis) tuples, where positionOnAxis can be an int, a float or
+        # a tuple.  every slot of a row or column list always holds the same axis, so only the positions on that axis are ever compared.
+        # here each FactAxisMember in use gets a small int that sorts the same way on its axis, and each FactAxisMemberGroup gets flat
+        # tuples of those ints, so the sorts and the row and column comparisons in Report only touch ints.
+        factAxisMemberListOfAxisDict = defaultdict(list)
+        usedFactAxisMemberSet = set()
+        for factAxisMemberGroup in self.factAxisMemberGroupList:
+            for factAxisMember in factAxisMemberGroup.factAxisMemberRowList + factAxisMemberGroup.factAxisMemberColList:
+                if factAxisMember not in usedFactAxisMemberSet:
+                    usedFactAxisMemberSet.add(factAxisMember)
+                    factAxisMemberListOfAxisDict[factAxisMember.pseudoAxisName] += [factAxisMember]
+
+        for factAxisMemberList in factAxisMemberListOfAxisDict.values():
+            factAxisMemberList.sort(key=lambda thing : thing.axisMemberPositionTuple)
+            positionKey = -1
+            previousAxisMemberPositionTuple = None
+            for factAxisMember in factAxisMemberList:
+                if positionKey == -1 or factAxisMember.axisMemberPositionTuple != previousAxisMemberPositionTuple:
+                    positionKey += 1  # equal positions must get equal keys, so that ties still tie
+                    previousAxisMemberPositionTuple = factAxisMember.axisMemberPositionTuple
+                factAxisMember.positionKey = positionKey
+
+        for factAxisMemberGroup in self.factAxisMemberGroupList:
+            factAxisMemberGroup.coordinateRowTuple = tuple([factAxisMember.positionKey for factAxisMember in factAxisMemberGroup.factAxisMemberRowList])
+            factAxisMemberGroup.coordinateColTuple = tuple([factAxisMember.positionKey for factAxisMember in factAxisMemberGroup.factAxisMemberColList])
 
 
 
@@ -623,4 +685,159 @@ class Command(object):
             giveMemGetPositionDict = filteredGiveMemGetPositionDict
 
         if len(giveMemGetPositionDict) > 0:
-            self.embedding.getMemberPositionsOnAxisDictOfDicts[self.pseudoAxis] = giveMemGetPositionDict
\ No newline at end of file
+            self.embedding.getMemberPositionsOnAxisDictOfDicts[self.pseudoAxis] = giveMemGetPositionDict
+
+
+
+class EmbeddedCommandNode(object):
+    # one "row|column axis style members..." command of an EmbeddedCommandProgram. qnames are kept as prefixed names
+    # and only resolved against the textBlock fact in EmbeddedCommandProgram.commandTextListOfLists().
+    __slots__ = ('rowOrColumn', 'pseudoAxis', 'formattingType', 'memberList', 'position')
+
+    def __init__(self, rowOrColumn, pseudoAxis, formattingType, memberList, position):
+        self.rowOrColumn = rowOrColumn
+        self.pseudoAxis = pseudoAxis  # 'period', 'unit', 'primary' or a prefixed axis name like 'us-gaap:FooAxis'
+        self.formattingType = formattingType
+        self.memberList = memberList  # ['*'] or a list of prefixed member names
+        self.position = position  # position of the row or column token, the linkrole uri is position 1
+
+    def commandTextList(self, fact):
+        if self.pseudoAxis in {'period', 'unit', 'primary'}:
+            pseudoAxis = self.pseudoAxis
+        else:
+            pseudoAxis = arelle.ModelValue.qname(fact, self.pseudoAxis)
+        if self.memberList == ['*']:
+            return [self.rowOrColumn, pseudoAxis, self.formattingType, '*']
+        return [self.rowOrColumn, pseudoAxis, self.formattingType] + [arelle.ModelValue.qname(fact, mem) for mem in self.memberList]
+
+
+class EmbeddedCommandProgram(object):
+    # the text between the ~s of a textBlock compiled once into a list of EmbeddedCommandNodes. the program does not
+    # depend on the fact it was found in, so Filing caches it by command text and every textBlock with the same
+    # commands reuses it. messages are kept as (logLevel, format, token, position) and replayed per fact by logMessages()
+    # because the error string names the fact.
+    def __init__(self, commandText):
+        self.commandNodeList = []
+        self.messageList = []
+        self.isBroken = False
+
+        # we take out the URI first, because it might have double quotes in it and we want to cleanse the rest of the
+        # command of double quotes since the separator command wraps the separator character in double quotes.
+        commandTextList = commandText.split(maxsplit=1) # this is a list of length 0, 1 or 2.
+        if len(commandTextList) == 0:
+            self.linkroleUri = None # only whitespace between the ~s, no cube will match
+            return
+        self.linkroleUri = commandTextList[0]
+        if len(commandTextList) > 1:
+            self.compile(commandTextList[1].replace('"', ' ').split())
+
+    def compile(self, tokenList):
+        # a single forward pass with a cursor, tokenList is never shortened. positions count the linkrole uri as 1.
+        numTokens = len(tokenList)
+        i = 0
+        while i < numTokens:
+            commandPosition = i + 2
+
+            token0 = tokenList[i]
+            token0Lower = token0.casefold()
+            if token0Lower not in {'row', 'column'}:
+                self.addError("The token {token}, at position {position} in the list of tokens in {errorStr}, is malformed. " \
+                              "An individual command can only start with row or column. These embedded " \
+                              "commands will not be rendered.", token0, i + 2)
+                return
+            i += 1
+
+            if i >= numTokens:
+                self.addTruncatedError(token0, commandPosition)
+                return
+            token1 = tokenList[i]
+            token1Lower = token1.casefold()
+            if token1Lower in {'period', 'unit', 'primary'}:
+                pseudoAxis = token1Lower
+            elif '_' in token1:
+                pseudoAxis = token1.replace('_',':',1) # only replace first _, because qnames can have _
+
+            # separator is not supported, we just skip it and ignore it
+            elif token1Lower == 'separator':
+                self.messageList += [('info', "The token {token}, at position {position} in the list of tokens in {errorStr}, is separator. " \
+                                              "Currently, this keyword is not supported and was ignored.", token1, i + 2)]
+                i += 1
+                if i < numTokens:
+                    if tokenList[i].casefold() == 'segment':
+                        i += 1
+                    i += 1
+                continue
+
+            else:
+                self.addError("The token {token}, at position {position} in the list of tokens in {errorStr}, is malformed. " \
+                              "The axis name can only be period, unit, primary or have an underscore. " \
+                              "These embedded commands will not be rendered.", token1, i + 2)
+                return
+            i += 1
+
+            if i >= numTokens:
+                self.addTruncatedError(token0, commandPosition)
+                return
+            token2 = tokenList[i]
+            token2Lower = token2.casefold()
+            if token2Lower in {'compact', 'nodisplay'}:
+                formattingType = token2Lower
+            elif token2Lower in {'grouped', 'unitcell'}:
+                formattingType = 'compact'
+                self.messageList += [('info', "The token {token}, at position {position} in the list of tokens in {errorStr}, is " + token2Lower + ". " \
+                                              "Currently, this keyword is not supported and was replaced with compact.", token2, i + 2)]
+            else:
+                self.addError("The token {token}, at position {position} in the list of tokens in {errorStr}, is malformed. The second token " \
+                              "of an embedded command can only be compact, grouped, nodisplay or unitcell. These " \
+                              "embedded commands will not be rendered.", token2, i + 2)
+                return
+            i += 1
+
+            # there could be multiple members, so grab them all here
+            memberStart = i
+            while i < numTokens and tokenList[i].casefold() not in {'row', 'column'}:
+                i += 1
+            tempList = tokenList[memberStart:i]
+
+            memberList = []
+            for memberIndex, tokenMember in enumerate(tempList, memberStart):
+                if '_' in tokenMember:
+                    memberList += [tokenMember.replace('_',':',1)]
+                elif tokenMember == '*' and len(tempList) == 1:
+                    memberList += [tokenMember]
+                else:
+                    self.addError("The token {token}, at position {position} in the list of tokens in {errorStr}, is malformed. " \
+                                  "The member name must either be * or have an underscore, and if there is " \
+                                  "a list of members for this axis, they all must contain an underscore. " \
+                                  "These embedded commands will not be rendered.", tokenMember, memberIndex + 2)
+                    return
+
+            if len(memberList) == 0:
+                self.addTruncatedError(token0, commandPosition)
+                return
+
+            self.commandNodeList += [EmbeddedCommandNode(token0Lower, pseudoAxis, formattingType, memberList, commandPosition)]
+
+    def addError(self, messageFormat, token, position):
+        self.messageList += [('error', messageFormat, token, position)]
+        self.isBroken = True
+
+    def addTruncatedError(self, token, position):
+        self.addError("The command starting with the token {token}, at position {position} in the list of tokens in {errorStr}, " \
+                      "is incomplete. An individual command needs row or column, an axis, a style and at least one member. " \
+                      "These embedded commands will not be rendered.", token, position)
+
+    def logMessages(self, controller, fact):
+        if len(self.messageList) == 0:
+            return
+        errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
+        for logLevel, messageFormat, token, position in self.messageList:
+            message = messageFormat.format(token=token, position=position, errorStr=errorStr)
+            if logLevel == 'error':
+                controller.logError(message)
+            else:
+                controller.logInfo(message)
+
+    def commandTextListOfLists(self, fact):
+        # fresh lists every time, Embedding rewrites its command lists in place.
+        return [commandNode.commandTextList(fact) for commandNode in self.commandNodeList]
@@ -8,8 +8,8 @@ are not subject to domestic copyright protection. 17 U.S.C. 105.
 """
 
 from gettext import gettext as _
-from collections import defaultdict
-import os, re, math, datetime, dateutil.relativedelta, lxml
+from collections import defaultdict, Counter, deque
+import os, re, math, datetime, dateutil.relativedelta, logging, multiprocessing, concurrent.futures
 import arelle.ModelValue, arelle.XbrlConst
 import Cube, Embedding, Report, PresentationGroup, Summary, Utils, Xlout
 
@@ -25,6 +25,13 @@ def mainFun(controller, modelXbrl, outputFolderName):
             embedding = Embedding.Embedding(filing, cube, [])
             cube.embeddingList = [embedding]
             filing.embeddingDriverBeforeFlowThroughSuppression(embedding)
+        if not cube.isEmbedded:
+            cube.releaseFactMemberships()
+
+    # every cube has collected its fact memberships by now, so the copies kept on the elements can go.  only embedded cubes
+    # still hold theirs, so at most one cube's list of fact memberships is held at a time for a filing without embeddings.
+    for element in filing.elementDict.values():
+        element.factMemberships = []
 
     if not filing.hasEmbeddings:
         filing.filterOutColumnsWhereAllElementsAreInOtherReports(sortedCubeList) # otherwise known as flow through suppression
@@ -32,7 +39,7 @@ def mainFun(controller, modelXbrl, outputFolderName):
     # this complicated way to number files is all about maintaining re2 compatibility
     nextFileNum = controller.nextFileNum
     for cube in sortedCubeList:
-        if not cube.excludeFromNumbering and len(cube.factMemberships) > 0:
+        if not cube.excludeFromNumbering and cube.hasFactMemberships:
             # even though there is embedding, and cubes might have more than one embedding and thus more than one report,
             # we still keep the fileNumber attribute on the cube and not the report, because if there are multiple embeddings
             # they all print in one file.
@@ -60,58 +67,83 @@ def mainFun(controller, modelXbrl, outputFolderName):
 
     # handle the steps after flow through and then emit all of the XML and write the files
     controller.logDebug(_("Generating rendered reports in {}").format(outputFolderName))
-    for cube in sortedCubeList:
-        if cube.noFactsOrAllFactsSuppressed:
-            for embedding in cube.embeddingList:
-                Utils.embeddingGarbageCollect(embedding)
-        elif cube.isEmbedded:
-            continue # unless cube.noFactsOrAllFactsSuppressed we want to save it for later when we embed it
+    parallelReportResults = None
+    if controller.reportProcesses > 1 and not filing.hasEmbeddings and xlWriter is None:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            parallelReportResults = filing.startParallelReportRendering(sortedCubeList, controller.reportProcesses)
         else:
-            embedding = cube.embeddingList[0]
-            if not embedding.isEmbeddingOrReportBroken:
-                filing.reportDriverAfterFlowThroughSuppression(embedding, xlWriter)
-                filing.finishOffReportIfNotEmbedded(embedding)
-            Utils.embeddingGarbageCollect(embedding)
-        Utils.cubeGarbageCollect(cube)
-
-    # now we make sure that every cube referenced by embedded command facts actually gets embedded.  this might not happen
-    # if for example, the embedded command facts were all filtered out.  In that case, we make a generic embedding and
-    # write it to a file, just like we would any other cube that isn't embedded anywhere by an embedding command fact.
-    filing.disallowEmbeddings = True # this stops any more embeddings from happening
-
-    for cube in filing.embeddedCubeSet:
+            controller.logDebug(_("Reports are rendered serially because this platform cannot fork worker processes."))
+    # the threads are started only now, since forking worker processes while other threads are running is not safe.
+    if controller.htmlWriterThreads > 0 and filing.reportHtmlFormat:
+        filing.htmlWriterPool = HtmlWriterPool(controller, controller.htmlWriterThreads)
+    isFailed = True
+    try:
         try:
-            if cube.noFactsOrAllFactsSuppressed:
+            for cube in sortedCubeList:
+                if cube.noFactsOrAllFactsSuppressed:
+                    for embedding in cube.embeddingList:
+                        Utils.embeddingGarbageCollect(embedding)
+                elif cube.isEmbedded:
+                    continue # unless cube.noFactsOrAllFactsSuppressed we want to save it for later when we embed it
+                else:
+                    embedding = cube.embeddingList[0]
+                    if not embedding.isEmbeddingOrReportBroken:
+                        if parallelReportResults is not None and filing.isRenderedByWorker(cube):
+                            # results come back in cube order, so the log and reportSummaryList read exactly as if rendered here.
+                            filing.finishOffReportFromWorker(next(parallelReportResults))
+                        else:
+                            filing.reportDriverAfterFlowThroughSuppression(embedding, xlWriter)
+                            filing.finishOffReportIfNotEmbedded(embedding)
+                    Utils.embeddingGarbageCollect(embedding)
+                Utils.cubeGarbageCollect(cube)
+        finally:
+            if parallelReportResults is not None:
+                filing.stopParallelReportRendering()
+
+        # now we make sure that every cube referenced by embedded command facts actually gets embedded.  this might not happen
+        # if for example, the embedded command facts were all filtered out.  In that case, we make a generic embedding and
+        # write it to a file, just like we would any other cube that isn't embedded anywhere by an embedding command fact.
+        filing.disallowEmbeddings = True # this stops any more embeddings from happening
+
+        for cube in filing.embeddedCubeSet:
+            try:
+                if cube.noFactsOrAllFactsSuppressed:
+                    continue
+            except AttributeError: # may happen if it has been garbage collected above because cube.noFactsOrAllFactsSuppressed
                 continue
-        except AttributeError: # may happen if it has been garbage collected above because cube.noFactsOrAllFactsSuppressed
-            continue
 
-        embedding = Embedding.Embedding(filing, cube, []) # make a generic embedding
-        cube.embeddingList += [embedding]
-        cube.isEmbedded = False
-        filing.embeddingDriverBeforeFlowThroughSuppression(embedding)
-        if not embedding.isEmbeddingOrReportBroken:
-            # the second arg is None because we don't generate excel files for filings with embeddings.
-            filing.reportDriverAfterFlowThroughSuppression(embedding, None)
-            filing.finishOffReportIfNotEmbedded(embedding)
-
-        # it might have other embeddings, but they didn't get embedded and we don't need them anymore.
-        for embedding in cube.embeddingList:
-            Utils.embeddingGarbageCollect(embedding)
-        Utils.cubeGarbageCollect(cube)
-
-    if len(filing.reportSummaryList) > 0:
-        controller.nextFileNum = filing.reportSummaryList[-1].fileNumber + 1
-
-    filing.unusedFactSet = set(modelXbrl.facts) - filing.usedOrBrokenFactSet
-
-    for fact, role, cube, ignore, shortName in filing.skippedFactsList:
-        if fact in filing.unusedFactSet:
-            filing.strExplainSkippedFact(fact, role, shortName)
-
-    if len(filing.unusedFactSet) > 0:
-        filing.handleUncategorizedCube(xlWriter)
-        controller.nextUncategorizedFileNum -= 1
+            embedding = Embedding.Embedding(filing, cube, []) # make a generic embedding
+            cube.embeddingList += [embedding]
+            cube.isEmbedded = False
+            filing.embeddingDriverBeforeFlowThroughSuppression(embedding)
+            if not embedding.isEmbeddingOrReportBroken:
+                # the second arg is None because we don't generate excel files for filings with embeddings.
+                filing.reportDriverAfterFlowThroughSuppression(embedding, None)
+                filing.finishOffReportIfNotEmbedded(embedding)
+
+            # it might have other embeddings, but they didn't get embedded and we don't need them anymore.
+            for embedding in cube.embeddingList:
+                Utils.embeddingGarbageCollect(embedding)
+            Utils.cubeGarbageCollect(cube)
+
+        if len(filing.reportSummaryList) > 0:
+            controller.nextFileNum = filing.reportSummaryList[-1].fileNumber + 1
+
+        filing.unusedFactSet = set(modelXbrl.facts) - filing.usedOrBrokenFactSet
+
+        for fact, role, cube, ignore, shortName in filing.skippedFactsList:
+            if fact in filing.unusedFactSet:
+                filing.strExplainSkippedFact(fact, role, shortName)
+
+        if len(filing.unusedFactSet) > 0:
+            filing.handleUncategorizedCube(xlWriter)
+            controller.nextUncategorizedFileNum -= 1
+        isFailed = False
+    finally:
+        # like stopParallelReportRendering(), the threads are shut down even if a report fails, so they never outlive the filing.
+        if filing.htmlWriterPool is not None:
+            filing.htmlWriterPool.finish(isCancelled=isFailed)
+            filing.htmlWriterPool = None
         
     controller.instanceSummaryList += [Summary.InstanceSummary(filing, modelXbrl)]  
     return True
@@ -119,6 +151,64 @@ def mainFun(controller, modelXbrl, outputFolderName):
 
 
 
+# the filing and cube list that forked report workers render from.  it is only set while a pool is running, and
+# workers get it by inheriting the parent's memory, which is why the pool must use the fork start method.
+parallelReportState = None
+
+def renderReportInWorker(cubeIndex):
+    filing, sortedCubeList = parallelReportState
+    embedding = sortedCubeList[cubeIndex].embeddingList[0]
+    # the worker's copy of the log goes nowhere, so collect the messages and let the parent replay them.
+    logRecordList = []
+    def addToLog(message, messageArgs=(), messageCode='error', file=None, level=logging.DEBUG):
+        logRecordList.append((message, messageArgs, messageCode, file, level))
+    filing.controller.addToLog = addToLog
+    filing.reportDriverAfterFlowThroughSuppression(embedding, None)
+    reportSummary = ReportSummary()
+    embedding.report.createReportSummary(reportSummary)
+    embedding.report.writeHtmlAndOrXmlFiles(reportSummary)
+    return (reportSummary, logRecordList)
+
+
+
+
+class HtmlWriterPool(object):
+    # transforms and writes R htm files on a few threads, since lxml releases the gil while running xslt, so that the main
+    # thread can lay out the next report meanwhile.  results are collected strictly in the order they were submitted, and
+    # only the main thread logs, so the log reads exactly as if every file had been written in line.
+    def __init__(self, controller, threadCount):
+        self.controller = controller
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threadCount)
+        self.maxPendingCount = 2 * threadCount # bounds how many finished trees are held in memory
+        self.pendingFutureQueue = deque()
+
+    def submit(self, function, *args):
+        self.pendingFutureQueue.append(self.executor.submit(function, *args))
+        while (len(self.pendingFutureQueue) > self.maxPendingCount
+               or (len(self.pendingFutureQueue) > 0 and self.pendingFutureQueue[0].done())):
+            self.collectOldest()
+
+    def collectOldest(self):
+        # result() re-raises anything the thread raised, at the same point in report order where it would have been raised.
+        for logFunction, message in self.pendingFutureQueue.popleft().result():
+            logFunction(message)
+
+    def finish(self, isCancelled=False):
+        # once a report has failed, nothing is collected, so no thread's error can replace the report's, and the files that
+        # were not started yet are dropped.  the threads are still waited for, so none outlives the filing.
+        if isCancelled:
+            self.pendingFutureQueue.clear()
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            return
+        try:
+            while len(self.pendingFutureQueue) > 0:
+                self.collectOldest()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True) # only left to cancel if a thread failed
+
+
+
+
 class Filing(object):
     def __init__(self, controller, modelXbrl, outputFolderName):
         self.modelXbrl = modelXbrl
@@ -162,12 +252,27 @@ class Filing(object):
                                     'RestatementAdjustmentMember',
                                     'ChangeInAccountingPrincipleMember'],
                                    ['ScenarioUnspecifiedDomain'])]
+        # member orders from the configuration name their axis as prefix:localName, so resolve them with this filing's prefixes.
+        self.configuredAxisOrders = []
+        for axisName, members, lastMembers in controller.memberOrders:
+            prefix, ignore, localName = axisName.partition(':')
+            namespaceURI = self.modelXbrl.prefixedNamespaces.get(prefix)
+            if namespaceURI is None:
+                controller.logDebug("memberOrders axis {} is not used, the prefix {} is not declared in this filing.".format(axisName, prefix))
+            else:
+                self.configuredAxisOrders += [(arelle.ModelValue.QName(prefix,namespaceURI,localName), members, lastMembers)]
         self.builtinLineItems = [arelle.ModelValue.QName('us-gaap',self.stmNamespace,'StatementLineItems')]
         self.segmentHeadingStopList = [arelle.ModelValue.QName(x,y,z) for x,y,z in self.builtinEquityRowAxes]
         # TODO: change flags like isRR, isInvest to contain the actual namespace or None.
         self.factToEmbeddingDict = {}
         self.factFootnoteDict = defaultdict(list)
         self.startEndContextDict = {}
+        self.axisMemberLookupDictCache = {} # (context, unit) to the axis/member signature shared by all facts with them
+        self.relationshipClosureIndexDict = {} # arcrole to its Utils.RelationshipClosureIndex
+        self.presentationGraphIndex = None # built in populateAndLinkClasses()
+        self.conceptLabelDict = {} # (qname, preferredLabel, fallbackToQname, lang, linkrole) to label, see conceptLabel()
+        self.embeddedCommandProgramDict = {} # command text between the ~s to its Embedding.EmbeddedCommandProgram
+        self.rowFooterDict = {} # concept to the data type, definition and references strings of every row showing it
 
         self.numReports = 0
 
@@ -179,11 +284,11 @@ class Filing(object):
         if not os.path.exists(self.fileNameBase):  # This is usually the Reports subfolder.
             os.mkdir(self.fileNameBase)
 
-        if controller.reportXslt:
-            self.transform = lxml.etree.XSLT(lxml.etree.parse(controller.reportXslt))
         if controller.summaryXslt:
-            self.summary_transform = lxml.etree.XSLT(lxml.etree.parse(controller.summaryXslt))
+            self.summary_transform = Utils.getXslt(controller.summaryXslt)
         self.reportSummaryList = []
+        self.reportPool = None # set by startParallelReportRendering if reports are rendered in worker processes
+        self.htmlWriterPool = None # set in mainFun if R htm files are written on threads
 
         self.rowSeparatorStr = ' | '
         self.titleSeparatorStr = ' - '
@@ -198,21 +303,44 @@ class Filing(object):
 
     def populateAndLinkClasses(self, uncategorizedCube = None):
         duplicateFacts = set()
+        linkedElementContextUnitSet = set()
 
         if uncategorizedCube is not None:
+            # the elements, axes, members and context signatures built by the first pass are reused.  only their links to the
+            # cubes of the first pass are dropped, so that they look like they were built from the unused facts alone.
+            elementDict = {}
             for fact in self.unusedFactSet:
                 # we know these facts aren't broken, because broken facts weren't added to self.unusedFactSet.
                 try:
-                    element = self.elementDict[fact.qname]
+                    element = elementDict[fact.qname]
                 except KeyError:
-                    element = Element(fact.concept)
-                    self.elementDict[fact.qname] = element
+                    try:
+                        element = self.elementDict[fact.qname]
+                        element.inCubes = {}
+                        element.factMemberships = []
+                    except KeyError:
+                        element = Element(fact.concept)
+                    elementDict[fact.qname] = element
                     element.linkCube(uncategorizedCube)
+            self.elementDict = elementDict
+
+            for axis in self.axisDict.values():
+                axis.inCubes = {}
+                axis.hasMembers = {}
+            for context in {fact.context for fact in self.unusedFactSet}:
+                for arelleDimension in context.qnameDims.values():
+                    dimensionConcept = arelleDimension.dimension
+                    memberConcept = arelleDimension.member
+                    if      (dimensionConcept is not None and memberConcept is not None and arelleDimension.isExplicit
+                             and dimensionConcept.qname in self.axisDict and memberConcept.qname in self.memberDict):
+                        # anything not found here has never been seen, and buildAxisMemberLookupDict() will link it.
+                        self.axisDict[dimensionConcept.qname].linkMember(self.memberDict[memberConcept.qname])
             uncategorizedCube.presentationGroup = PresentationGroup.PresentationGroup(self, uncategorizedCube)
             facts = self.unusedFactSet
 
         else:
             # build cubes
+            self.presentationGraphIndex = PresentationGroup.PresentationGraphIndex(self.modelXbrl.relationshipSet(arelle.XbrlConst.parentChild))
             for linkroleUri in self.modelXbrl.relationshipSet(arelle.XbrlConst.parentChild).linkRoleUris:
                 cube = Cube.Cube(self, linkroleUri)
                 self.cubeDict[linkroleUri] = cube
@@ -235,7 +363,7 @@ class Filing(object):
                     # although valid XBRL has at most one default, we don't assume it; instead we act like it's a set of defaults.
                     # check to see whether the defaults are all children of the axis in this presentation group.
                     defaultChildSet = {pcrel.toModelObject 
-                                       for pcrel in Utils.modelRelationshipsTransitiveFrom(parentChildRelationshipSet, concept, linkroleUri)
+                                       for pcrel in self.relationshipClosureIndex(arelle.XbrlConst.parentChild).modelRelationshipsTransitiveFrom(concept, linkroleUri)
                                        if pcrel.toModelObject in defaultSet}
                     if (len(defaultSet)==0  # axis had no default at all
                             or defaultSet != defaultChildSet):
@@ -328,7 +456,7 @@ class Filing(object):
             for concept in self.modelXbrl.qnameConcepts.values():
                 for relationship in self.modelXbrl.relationshipSet(arelle.XbrlConst.parentChild).toModelObject(concept):
                     cube = self.cubeDict[relationship.linkrole]
-                    cube.presentationGroup.traverseToRootOrRoots(concept, None, None, None, set())
+                    cube.presentationGroup.traverseToRootOrRoots(concept)
                     try:
                         element = self.elementDict[concept.qname] # retrieve active Element
                         element.linkCube(cube) # link element to this cube.
@@ -346,7 +474,7 @@ class Filing(object):
 
             facts = self.modelXbrl.facts
 
-        for fact in facts:
+        for factIndex, fact in enumerate(facts):
             if fact.isTuple:
                 #tupleErrStr = ErrorMgr.getError('UNSUPPORTED_TUPLE_FOUND').format(fact.qname)
                 self.controller.logWarn("A Fact with Qname {} is a Tuple and Tuples are forbidden by the EDGAR Filer " \
@@ -395,77 +523,120 @@ class Filing(object):
                     except KeyError:
                         pass
 
-            axisMemberLookupDict = {}
-
-            # add period and unit to axisMemberLookupDict
-            startEndContext = None
-            con = fact.context
-            if fact.context is not None:
-                if con.instantDatetime is not None: # is an instant
-                    startEndTuple = (None, con.instantDatetime)
-                else: # is a startEndContext
-                    startEndTuple = (con.startDatetime, con.endDatetime)
-                try:
-                    startEndContext = self.startEndContextDict[startEndTuple]
-                except KeyError:
-                    startEndContext = StartEndContext(con, startEndTuple)
-                    self.startEndContextDict[startEndTuple] = startEndContext
-                axisMemberLookupDict['period'] = startEndContext
-
-            if fact.unit is not None:
-                axisMemberLookupDict['unit'] = fact.unit.id
+            # facts share a handful of contexts and units, so the axis/member signature is only built once for each pair.
+            try:
+                axisMemberLookupDict, startEndContext, axisMemberList, brokenDimensionList = self.axisMemberLookupDictCache[(fact.context, fact.unit)]
+            except KeyError:
+                axisMemberLookupDict, startEndContext, axisMemberList, brokenDimensionList = self.buildAxisMemberLookupDict(fact.context, fact.unit)
 
-            # add each axis to axisMemberLookupDict
-            for arelleDimension in fact.context.qnameDims.values():
-                dimensionConcept = arelleDimension.dimension
-                memberConcept = arelleDimension.member
+            for dimensionConcept, memberConcept in brokenDimensionList:
                 if dimensionConcept is None:
                     #errStr1 = ErrorMgr.getError('XBRL_DIMENSIONS_INVALID_AXIS_BROKEN').format(fact.context.id, fact.qname)
                     self.controller.logWarn("One of the Axes referenced by the Context {} of Fact {}, or the reference " \
                                             "itself, is broken. The Axis will be ignored for this Fact.".format(
                                             fact.contextID, fact.qname))
-
-                elif memberConcept is None:
+                else:
                     #errStr2 = ErrorMgr.getError('XBRL_DIMENSIONS_INVALID_AXIS_MEMBER_BROKEN').format(dimensionConcept.qname, fact.qname, fact.context.id)
                     self.controller.logWarn("The Member of Axis {} is broken as referenced by the Fact {} with Context {}. " \
                                             "The Axis and Member will be ignored for this Fact.".format(dimensionConcept.qname,
                                             fact.qname, fact.contextID))
 
-                else:
-                    try:
-                        axis = self.axisDict[dimensionConcept.qname]
-                    except KeyError:
-                        axis = Axis(dimensionConcept)
-                        for relationship in self.modelXbrl.relationshipSet(arelle.XbrlConst.dimensionDefault).fromModelObject(dimensionConcept):
-                            axis.defaultArelleConcept = relationship.toModelObject
-                            break
-                        self.axisDict[dimensionConcept.qname] = axis
-                    if arelleDimension.isExplicit: # if true, Member exists, else None. there's also isTyped, for typed dims.
-                        try:
-                            member = self.memberDict[memberConcept.qname]
-                        except KeyError:
-                            member = Member(memberConcept)
-                            self.memberDict[memberConcept.qname] = member
-                        member.linkAxis(axis)
-                        axis.linkMember(member)
-                    axisMemberLookupDict[axis.arelleConcept.qname] = member.arelleConcept.qname
-
-                    # while we're at it, do some other stuff
+            # linking only has to happen the first time an element is seen with a given context and unit.
+            if (element, fact.context, fact.unit) not in linkedElementContextUnitSet:
+                linkedElementContextUnitSet.add((element, fact.context, fact.unit))
+                for axis, member in axisMemberList:
                     for cube in element.inCubes.values():
                         cube.hasAxes[axis.arelleConcept.qname] = axis
                         cube.hasMembers[member.arelleConcept.qname] = member
                         axis.linkCube(cube)
 
-            for cube in element.inCubes.values():
-                # the None in the tuple is only to handle periodStartLabels and periodEndLabels later on
-                cube.factMemberships += [(fact, axisMemberLookupDict, None)]
-                cube.hasElements.add(fact.concept)
-                if fact.unit is not None:
-                    cube.unitAxis[fact.unit.id] = fact.unit
-                if startEndContext is not None:
-                    cube.timeAxis.add(startEndContext)
+                for cube in element.inCubes.values():
+                    cube.hasElements.add(fact.concept)
+                    if fact.unit is not None:
+                        cube.unitAxis[fact.unit.id] = fact.unit
+                    if startEndContext is not None:
+                        cube.timeAxis.add(startEndContext)
+
+            # the fact is recorded once on its element, rather than once per cube.  each cube collects the memberships
+            # of its elements when it is processed, see Cube.materializeFactMemberships().
+            element.factMemberships += [(factIndex, fact, axisMemberLookupDict)]
+
+
+    def buildAxisMemberLookupDict(self, context, unit):
+        # the axisMemberLookupDict is shared by every fact with this context and unit, so nobody should modify it in place.
+        axisMemberLookupDict = {}
+        axisMemberList = []
+        brokenDimensionList = [] # warnings mention the fact, so they are issued per fact by the caller
+
+        # add period and unit to axisMemberLookupDict
+        if context.instantDatetime is not None: # is an instant
+            startEndTuple = (None, context.instantDatetime)
+        else: # is a startEndContext
+            startEndTuple = (context.startDatetime, context.endDatetime)
+        try:
+            startEndContext = self.startEndContextDict[startEndTuple]
+        except KeyError:
+            startEndContext = StartEndContext(context, startEndTuple)
+            self.startEndContextDict[startEndTuple] = startEndContext
+        axisMemberLookupDict['period'] = startEndContext
 
+        if unit is not None:
+            axisMemberLookupDict['unit'] = unit.id
 
+        # add each axis to axisMemberLookupDict
+        for arelleDimension in context.qnameDims.values():
+            dimensionConcept = arelleDimension.dimension
+            memberConcept = arelleDimension.member
+            if dimensionConcept is None or memberConcept is None:
+                brokenDimensionList += [(dimensionConcept, memberConcept)]
+
+            else:
+                try:
+                    axis = self.axisDict[dimensionConcept.qname]
+                except KeyError:
+                    axis = Axis(dimensionConcept)
+                    for relationship in self.modelXbrl.relationshipSet(arelle.XbrlConst.dimensionDefault).fromModelObject(dimensionConcept):
+                        axis.defaultArelleConcept = relationship.toModelObject
+                        break
+                    self.axisDict[dimensionConcept.qname] = axis
+                if arelleDimension.isExplicit: # if true, Member exists, else None. there's also isTyped, for typed dims.
+                    try:
+                        member = self.memberDict[memberConcept.qname]
+                    except KeyError:
+                        member = Member(memberConcept)
+                        self.memberDict[memberConcept.qname] = member
+                    member.linkAxis(axis)
+                    axis.linkMember(member)
+                axisMemberLookupDict[axis.arelleConcept.qname] = member.arelleConcept.qname
+                axisMemberList += [(axis, member)]
+
+        result = (axisMemberLookupDict, startEndContext, axisMemberList, brokenDimensionList)
+        self.axisMemberLookupDictCache[(context, unit)] = result
+        return result
+
+
+
+
+    def conceptLabel(self, concept, preferredLabel=None, fallbackToQname=True, lang=None, linkrole=None):
+        # the same labels are asked for per fact, per node and per sort, and arelle looks each one up through the label
+        # relationships, so they are resolved once per filing.
+        key = (concept.qname, preferredLabel, fallbackToQname, lang, linkrole)
+        try:
+            return self.conceptLabelDict[key]
+        except KeyError:
+            labelStr = concept.label(preferredLabel=preferredLabel, fallbackToQname=fallbackToQname, lang=lang, linkrole=linkrole)
+            self.conceptLabelDict[key] = labelStr
+            return labelStr
+
+
+    def relationshipClosureIndex(self, arcrole):
+        # built once per filing and arcrole, then shared by every linkrole and every concept that asks.
+        try:
+            return self.relationshipClosureIndexDict[arcrole]
+        except KeyError:
+            closureIndex = Utils.RelationshipClosureIndex(self.modelXbrl.relationshipSet(arcrole))
+            self.relationshipClosureIndexDict[arcrole] = closureIndex
+            return closureIndex
 
 
     def checkForEmbeddedCommandAndProcessIt(self, fact):
@@ -478,115 +649,22 @@ class Filing(object):
             return False
         commandText = leftOfTilde
 
-        # we take out the URI first, because it might have double quotes in it and we want to cleanse the rest of the
-        # command of double quotes since the separator command wraps the separator character in double quotes.
-        commandTextList = commandText.split(maxsplit=1) # this is a list of length 1 or 2.
-        linkroleUri = commandTextList.pop(0) # now commandTextList is a list of length 0 or 1
+        # the same commands are often repeated across textBlocks, so each distinct command text is only compiled once.
         try:
-            cube = self.cubeDict[linkroleUri]
+            embeddedCommandProgram = self.embeddedCommandProgramDict[commandText]
         except KeyError:
-            return False # not a valid linkroleUri
-        if len(commandTextList) > 0:
-            commandTextList = commandTextList[0].replace('"', ' ')
-            commandTextList = commandTextList.split()
-
-        outputList = []
-        tokenCounter = 1
-        while len(commandTextList) > 0:
-            listToAddToOutput = []
-
-            token0 = commandTextList.pop(0)
-            tokenCounter += 1
-            token0Lower = token0.casefold()
-            if token0Lower in {'row', 'column'}:
-                listToAddToOutput += [token0Lower]
-            else:
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_TOKEN_NOT_ROW_OR_COLUMN_ERROR').format(token0, tokenCounter, errorStr)
-                self.controller.logError("The token {}, at position{} in the list of tokens in {}, is malformed. " \
-                                         "An individual command can only start with row or column. These embedded " \
-                                         "commands will not be rendered.".format(token0, tokenCounter, errorStr))
-                return False
-
-
-            token1 = commandTextList.pop(0)
-            tokenCounter += 1
-            token1Lower = token1.casefold()
-            if token1Lower in {'period', 'unit', 'primary'}:
-                listToAddToOutput += [token1Lower]
-            elif '_' in token1:
-                listToAddToOutput += [arelle.ModelValue.qname(fact, token1.replace('_',':',1))] # only replace first _, because qnames can have _
-
-            # separator is not supported, we just pop it off and ignore it
-            elif token1Lower == 'separator':
-                if commandTextList.pop(0).casefold() == 'segment':
-                    commandTextList.pop(0)
-                    tokenCounter += 1
-                tokenCounter += 1
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_SEPARATOR_USED_WARNING').format(token1, tokenCounter, errorStr)
-                self.controller.logInfo("The token at position {} in the list of tokens in {}, is separator. " \
-                                        "Currently, this keyword is not supported and was ignored.".format(
-                                        tokenCounter, errorStr))
-                continue
+            embeddedCommandProgram = Embedding.EmbeddedCommandProgram(commandText)
+            self.embeddedCommandProgramDict[commandText] = embeddedCommandProgram
 
-            else:
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_INVALID_FIRST_TOKEN_ERROR').format(token1, tokenCounter, errorStr)
-                self.controller.logError("The token at position {} in the list of tokens in {}, is malformed. " \
-                                         "The axis name can only be period, unit, primary or have an underscore. " \
-                                         "These embedded commands will not be rendered.".format(tokenCounter, errorStr))
-                return False
-
-            token2 = commandTextList.pop(0)
-            tokenCounter += 1
-            token2Lower = token2.casefold()
-            if token2Lower in {'compact', 'nodisplay'}:
-                listToAddToOutput += [token2Lower]
-            elif token2Lower == 'grouped':
-                listToAddToOutput += ['compact']
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_GROUPED_USED_WARNING').format(token2, tokenCounter, errorStr)
-                self.controller.logInfo("The token at position {} in the list of tokens in {}, is grouped. " \
-                                        "Currently, this keyword is not supported and was replaced with compact.".format(
-                                        tokenCounter, errorStr))
-            elif token2Lower == 'unitcell':
-                listToAddToOutput += ['compact']
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_UNITCELL_USED_WARNING').format(token2, tokenCounter, errorStr)
-                self.controller.logInfo("The token at position {} in the list of tokens in {}, is unitcell. " \
-                                        "Currently, this keyword is not supported and was replaced with compact.".format(
-                                        tokenCounter, errorStr))
-            else:
-                errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                #message = ErrorMgr.getError('EMBEDDED_COMMAND_INVALID_SECOND_TOKEN_ERROR').format(token2, tokenCounter, errorStr)
-                self.controller.logError("The token {}, at position {} in the list of tokens in {}, is malformed. The second token " \
-                                         "of an embedded command can only be compact, grouped, nodisplay or unitcell. These " \
-                                         "embedded commands will not be rendered.".format(token2, tokenCounter, errorStr))
-                return False
-
-            # there could be multiple members, so grab them all here
-            tempList = []
-            while len(commandTextList) > 0 and commandTextList[0].casefold() not in {'row', 'column'}:
-                tempList += [commandTextList.pop(0)]
-
-            for tokenMember in tempList: 
-                tokenCounter += 1
-                if '_' in tokenMember:
-                    listToAddToOutput += [arelle.ModelValue.qname(fact, tokenMember.replace('_',':',1))]
-                elif tokenMember == '*' and len(tempList) == 1:
-                    listToAddToOutput += [tokenMember]
-                else:
-                    errorStr = Utils.printErrorStringToDiscribeEmbeddedTextBlockFact(fact)
-                    #message = ErrorMgr.getError('EMBEDDED_COMMAND_INVALID_MEMBER_NAME_ERROR').format(tokenMember, tokenCounter, errorStr)
-                    self.controller.logError("The token {}, at position {} in the list of tokens in {}, is malformed. " \
-                                             "The member name must either be * or have an underscore, and if there is " \
-                                             "a list of members for this axis, they all must contain an underscore. " \
-                                             "These embedded commands will not be rendered.".format(
-                                             tokenMember, tokenCounter, errorStr))
-                    return False
+        try:
+            cube = self.cubeDict[embeddedCommandProgram.linkroleUri]
+        except KeyError:
+            return False # not a valid linkroleUri
 
-            outputList += [listToAddToOutput]
+        embeddedCommandProgram.logMessages(self.controller, fact)
+        if embeddedCommandProgram.isBroken:
+            return False
+        outputList = embeddedCommandProgram.commandTextListOfLists(fact)
 
         cube.isEmbedded = True
         self.hasEmbeddings = True
@@ -602,39 +680,20 @@ class Filing(object):
 
 
     def handleUncategorizedCube(self, xlWriter):
-        # get a fresh start, kill all the old data structures that get built in populateAndLinkClasses()
-        for element in self.elementDict.values():
-            element.__dict__.clear()
-            del element
-        self.elementDict = {}
-
+        # kill the old cubes.  the elements, axes, members and startEndContexts are kept, populateAndLinkClasses() just
+        # relinks the ones the unused facts need to the uncategorized cube.
         for cube in self.cubeDict.values():
             cube.__dict__.clear()
             del cube
         self.cubeDict = {}
 
-        for member in self.memberDict.values():
-            member.__dict__.clear()
-            del member
-        self.memberDict = {}
-
-        for axis in self.axisDict.values():
-            axis.__dict__.clear()
-            del axis
-        self.axisDict = {}
-
-        for startEndContext in self.startEndContextDict.values():
-            startEndContext.__dict__.clear()
-            del startEndContext
-        self.startEndContextDict = {}
-
         uncategorizedCube = Cube.Cube(self, 'http://xbrl.sec.gov/role/uncategorizedFacts')
         uncategorizedCube.fileNumber = self.controller.nextUncategorizedFileNum
         uncategorizedCube.shortName = uncategorizedCube.definitionText = 'Uncategorized Items - ' + self.entrypoint
         uncategorizedCube.isElements = True
         
-        # now run populateAndLinkClasses() again and let it re-populate and re-link everything from scratch but let it do so
-        # only with filing.unusedFactSet as it's fact set and with only the uncategorizedCube, and no other cubes.
+        # now run populateAndLinkClasses() again and let it re-link everything, but let it do so only with
+        # filing.unusedFactSet as it's fact set and with only the uncategorizedCube, and no other cubes.
         self.cubeDict[uncategorizedCube.linkroleUri] = uncategorizedCube
         self.populateAndLinkClasses(uncategorizedCube = uncategorizedCube)
 
@@ -651,6 +710,7 @@ class Filing(object):
 
 
     def cubeDriverBeforeFlowThroughSuppression(self, cube):
+        cube.materializeFactMemberships()
         if cube.isUncategorizedFacts:
             cube.presentationGroup.generateUncategorizedFactsPresentationGroup()
         else:
@@ -694,16 +754,18 @@ class Filing(object):
         if self.controller.debugMode:
             embedding.printEmbedding()
 
+        embedding.assignCoordinateKeys()
+
         report = embedding.report = Report.Report(self, cube, embedding)
-        report.generateRowsOrCols('col', sorted(embedding.factAxisMemberGroupList, key=lambda thing: thing.axisMemberPositionTupleColList))
+        report.generateRowsOrCols('col', sorted(embedding.factAxisMemberGroupList, key=lambda thing: thing.coordinateColTuple))
 
         # this is because if the {Elements} view is used, then you might have lots of facts right next to each other with the same qname
         # this is fine, but each time you render, they might appear in a different order.  so this will sort the facts by value
         # so that each run the same facts don't appear in different orders.
         if cube.isElements:
-            sortedFAMGL = sorted(embedding.factAxisMemberGroupList, key=lambda thing: (thing.axisMemberPositionTupleRowList, thing.fact.value))
+            sortedFAMGL = sorted(embedding.factAxisMemberGroupList, key=lambda thing: (thing.coordinateRowTuple, thing.fact.value))
         else:
-            sortedFAMGL = sorted(embedding.factAxisMemberGroupList, key=lambda thing: thing.axisMemberPositionTupleRowList)
+            sortedFAMGL = sorted(embedding.factAxisMemberGroupList, key=lambda thing: thing.coordinateRowTuple)
         report.generateRowsOrCols('row', sortedFAMGL)
 
         if not cube.isElements:
@@ -756,12 +818,19 @@ class Filing(object):
             if embedding.rowPrimaryPosition != -1 and not cube.isUnlabeled:
                 report.addAbstracts()
 
+            # the segment title and abstract rows shift the rows after them, so the rows are numbered again once they are all in.
+            for i, row in enumerate(report.rowList):
+                row.index = i
+
         if cube.isElements:
             report.generateRowAndOrColHeadingsForElements()
         else:
             report.generateRowAndOrColHeadingsGeneralCase()
 
-        report.emitRFile()
+        if self.canStreamRFile(cube, xlWriter):
+            report.isRFileStreamed = True # there is no tree, report.writeHtmlAndOrXmlFiles() writes the R files from the report itself
+        else:
+            report.emitRFile()
 
         if xlWriter:
             # we pass the cube's shortname since it doesn't have units and stuff tacked onto the end.
@@ -769,6 +838,15 @@ class Filing(object):
             xlWriter.buildWorkSheet(report)
 
 
+    def canStreamRFile(self, cube, xlWriter):
+        # the R file only has to be a tree if the html transform or the excel writer reads it, or if it or a report
+        # inside it is an embedded report, since those are spliced into the R file that embeds them.  the native html
+        # emitter can read the report itself instead, see Htmlout.reportView().
+        return ((self.reportXmlFormat or self.reportHtmlFormat)
+                and (not self.reportHtmlFormat or self.controller.htmlReportEmitter == 'native')
+                and xlWriter is None and not self.hasEmbeddings and not cube.isEmbedded)
+
+
     def finishOffReportIfNotEmbedded(self, embedding):
         reportSummary = ReportSummary()
         embedding.report.createReportSummary(reportSummary)
@@ -780,14 +858,55 @@ class Filing(object):
 
 
 
+    def isRenderedByWorker(self, cube):
+        # cash flow statements stay in the parent, because RemoveStuntedCashFlowColumns reads and changes the fact
+        # memberships of other cubes and self.usedOrBrokenFactSet, which a worker would only change in its own copy.
+        return not cube.isStatementOfCashFlows
+
+
+    def startParallelReportRendering(self, sortedCubeList, processCount):
+        # file numbers are already assigned and flow through suppression is done, so the remaining cubes are independent.
+        # the pool forks now, before the loop in mainFun starts garbage collecting cubes in this process.
+        global parallelReportState
+        cubeIndexList = [cubeIndex for cubeIndex, cube in enumerate(sortedCubeList)
+                         if  not cube.noFactsOrAllFactsSuppressed and not cube.isEmbedded
+                         and not cube.embeddingList[0].isEmbeddingOrReportBroken and self.isRenderedByWorker(cube)]
+        if len(cubeIndexList) < 2:
+            return None
+        self.controller.logDebug(_("Rendering {} reports with {} worker processes").format(len(cubeIndexList), processCount))
+        parallelReportState = (self, sortedCubeList)
+        self.reportPool = multiprocessing.get_context('fork').Pool(min(processCount, len(cubeIndexList)))
+        return self.reportPool.imap(renderReportInWorker, cubeIndexList)
+
+
+    def stopParallelReportRendering(self):
+        global parallelReportState
+        self.reportPool.terminate()
+        self.reportPool.join()
+        self.reportPool = None
+        parallelReportState = None
+
+
+    def finishOffReportFromWorker(self, workerResult):
+        reportSummary, logRecordList = workerResult
+        for message, messageArgs, messageCode, file, level in logRecordList:
+            self.controller.addToLog(message, messageArgs=messageArgs, messageCode=messageCode, file=file, level=level)
+        self.reportSummaryList += [reportSummary]
+
+
     def RemoveStuntedCashFlowColumns(self,report,cube):
         visibleColumns = [col for col in report.colList if not col.isHidden]
         didWeHideAnyCols = False
         if len(visibleColumns)>0:
-            remainingVisibleColumns = visibleColumns.copy()
             maxMonths = max(col.startEndContext.numMonths for col in visibleColumns)
             minFacts = min(len(col.factList) for col in visibleColumns if col.startEndContext.numMonths==maxMonths)
             minToKeep = math.floor(.25*minFacts)
+            # for each fact, the number of visible columns still showing it; a removed column gives its facts back.
+            remainingColumnCountOfFact = Counter()
+            for col in visibleColumns:
+                remainingColumnCountOfFact.update(set(col.factList))
+            factsRemovedFromCubeSet = set()
+            factSetOfOtherCubeDict = {} # built lazily, other cubes' fact memberships don't change here
             for col in visibleColumns:
                 if col.startEndContext.numMonths < maxMonths and len(col.factList) < minToKeep:
                     self.controller.logInfo(("Columns in cash flow ''{}'' have maximum duration {} months and at least {} " \
@@ -797,30 +916,34 @@ class Filing(object):
                                   col.startEndContext.numMonths,len(col.factList)))
                     col.isHidden = True
                     didWeHideAnyCols = True
-                    remainingVisibleColumns.remove(col)
-                    for fact in col.factList: 
-                        appearsInOtherColumn = False
-                        for otherCol in remainingVisibleColumns:
-                            if fact in otherCol.factList:
-                                appearsInOtherColumn = True
-                                break
-                        if not appearsInOtherColumn:
-                            cube.factMemberships = [fm for fm in cube.factMemberships if not fact is fm[0]] # local removal
+                    for fact in set(col.factList):
+                        remainingColumnCountOfFact[fact] -= 1
+                        if remainingColumnCountOfFact[fact] == 0: # it does not appear in another remaining column
+                            factsRemovedFromCubeSet.add(fact) # local removal
                             # Go look whether the fact is now completely uncategorized
                             if fact in self.usedOrBrokenFactSet:
                                 element = self.elementDict[fact.elementQname]
                                 appearsInOtherCube = False
                                 for c in element.inCubes.values():
-                                    if hasattr(c,'factMemberships'): # Some Cube objects seem uninitialized, not sure why.
-                                        for fm in c.factMemberships:
-                                            if fm[0] is fact: # Assumes that factMemberships is an accurate list of facts presented.
-                                                appearsInOtherCube = True
-                                                break # Only need to find one other place the fact appears
-                                        if appearsInOtherCube is True:
+                                    if c is not cube and hasattr(c,'factMemberships'): # Some Cube objects seem uninitialized, not sure why.
+                                        if c.factMemberships is None:
+                                            # c let its fact memberships go before any report was written, and they held every
+                                            # fact of each of its elements then, see Cube.releaseFactMemberships().
+                                            appearsInOtherCube = True
                                             break
+                                        try:
+                                            factSetOfOtherCube = factSetOfOtherCubeDict[c]
+                                        except KeyError:
+                                            # Assumes that factMemberships is an accurate list of facts presented.
+                                            factSetOfOtherCube = factSetOfOtherCubeDict[c] = {fm[0] for fm in c.factMemberships}
+                                        if fact in factSetOfOtherCube:
+                                            appearsInOtherCube = True
+                                            break # Only need to find one other place the fact appears
                                 if appearsInOtherCube is False:
                                     # This was the only place the fact was presented, and now it's hidden.
                                     self.usedOrBrokenFactSet.remove(fact)             
+            if len(factsRemovedFromCubeSet) > 0 and cube.factMemberships is not None: # only an embedded cube still has them
+                cube.factMemberships = [fm for fm in cube.factMemberships if fm[0] not in factsRemovedFromCubeSet]
 
         if didWeHideAnyCols:
             Utils.hideEmptyRows(report.rowList)
@@ -844,15 +967,14 @@ class Filing(object):
                 else:
                     nonStatementElementsAndElementMemberPairs.update(cube.embeddingList[0].hasElementsAndElementMemberPairs)
 
-        for i, cube in enumerate(statementCubesList):
-            # initialize to all the non statement elements and non statement element member pairs
-            elementQnamesInOtherReportsAndElementQnameMemberPairs = nonStatementElementsAndElementMemberPairs.copy()
-            # now add other statements
-            for j, otherStatement in enumerate(statementCubesList):
-                if i != j:
-                    elementQnamesInOtherReportsAndElementQnameMemberPairs.update(otherStatement.embeddingList[0].hasElementsAndElementMemberPairs)
-            # now elementQnamesInOtherReportsAndElementQnameMemberPairs has all the qnames used in every other report except for the statement we're using
+        # count how many statements use each qname or qname member pair, so that for any one statement we can tell whether
+        # another statement uses it by subtracting that statement's own use, instead of building the union of all the others.
+        statementCountOfElementsAndElementMemberPairs = Counter()
+        for cube in statementCubesList:
+            statementCountOfElementsAndElementMemberPairs.update(cube.embeddingList[0].hasElementsAndElementMemberPairs)
 
+        for cube in statementCubesList:
+            hasElementsAndElementMemberPairs = cube.embeddingList[0].hasElementsAndElementMemberPairs
             report = cube.embeddingList[0].report # we know there's no embeddings, so the report is on the first and only embedding
             columnsToKill = []
             nonHiddenColCount = 0
@@ -864,8 +986,11 @@ class Filing(object):
                     nonHiddenColCount += 1
                     setOfElementQnamesInCol = {fact.qname for fact in col.factList}
                     setOfElementQnamesAndQnameMemberPairsForCol = setOfElementQnamesInCol.union(col.elementQnameMemberForColHidingSet)
-                    # the operator <= means subset, not a proper subset.  so if all the facts in the column are elsewhere, then hide column.
-                    if setOfElementQnamesAndQnameMemberPairsForCol <= elementQnamesInOtherReportsAndElementQnameMemberPairs:
+                    # if all the facts in the column are elsewhere, then hide column.  a qname or pair is in another statement
+                    # if more statements use it than this one's own use of it, which is 1 if this statement uses it, else 0.
+                    if all(x in nonStatementElementsAndElementMemberPairs
+                           or statementCountOfElementsAndElementMemberPairs[x] > (x in hasElementsAndElementMemberPairs)
+                           for x in setOfElementQnamesAndQnameMemberPairsForCol):
                         columnsToKill += [col]
                     else:
                         elementQnamesThatWillBeKeptProvidingThatWeHideTheseCols.update(setOfElementQnamesInCol)
@@ -979,5 +1104,6 @@ class Element(object):
     def __init__(self, arelleConcept):
         self.inCubes = {}
         self.arelleConcept = arelleConcept
+        self.factMemberships = [] # (factIndex, fact, axisMemberLookupDict) tuples, in the order the facts were scanned
     def linkCube(self, cube):
         self.inCubes[cube.linkroleUri] = cube
\ No newline at end of file
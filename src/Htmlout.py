@@ -0,0 +1,700 @@
+# -*- coding: utf-8 -*-
+"""
+:mod:`EdgarRenderer.Htmlout`
+~~~~~~~~~~~~~~~~~~~
+Edgar(tm) Renderer was created by staff of the U.S. Securities and Exchange Commission.
+Data and content created by government employees within the scope of their employment
+are not subject to domestic copyright protection. 17 U.S.C. 105.
+"""
+"""
+Write R htm files straight from the InstanceReport tree, or from the report it would be built from, without running InstanceReport.xslt
+"""
+
+import re, math
+from lxml.etree import Element, SubElement, ElementTree, tostring
+
+# the stylesheet's $otherStandardPrefix param is empty, so rows with an empty ElementPrefix are not custom either.
+standardPrefixSet = {'us-gaap_', 'dei_', 'invest_', 'rr_', ''}
+monthNameList = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                 'August', 'September', 'October', 'November', 'December']
+toggleScriptText = ("\n\t\t\t\t\t\t\tfunction toggleNextSibling (e) {"
+                    "\n\t\t\t\t\t\t\tif (e.nextSibling.style.display=='none') {"
+                    "\n\t\t\t\t\t\t\te.nextSibling.style.display='block';"
+                    "\n\t\t\t\t\t\t\t} else { e.nextSibling.style.display='none'; }"
+                    "\n\t\t\t\t\t\t\t}")
+# text the stylesheet writes with disable-output-escaping goes into the tree as a placeholder and is swapped in after serializing.
+rawTextPlaceholderPattern = re.compile(b'EdgarRendererRawText([0-9]+)Z')
+# generate-id() values depend on where libxslt put the node in memory, so they never match between runs.
+generatedIdPattern = re.compile(b' id="id[a-z]?[0-9]+"')
+xpathNumberPattern = re.compile('-?([0-9]+(\\.[0-9]*)?|\\.[0-9]+)$')
+xpathSpacePattern = re.compile('[ \t\r\n]+')
+
+
+def xpathNumber(text):
+    # number() in xpath 1.0 only accepts an optionally negative decimal, everything else is NaN.
+    if text is None:
+        return math.nan
+    text = text.strip(' \t\r\n')
+    if xpathNumberPattern.match(text) is None:
+        return math.nan
+    return float(text)
+
+def xpathString(number):
+    if math.isnan(number):
+        return 'NaN'
+    if math.isinf(number):
+        return 'Infinity' if number > 0 else '-Infinity'
+    if number == math.floor(number):
+        return str(int(number))
+    return ('%.15f' % number).rstrip('0')
+
+def normalizeSpace(text):
+    return xpathSpacePattern.sub(' ', text).strip(' ')
+
+def substringBefore(text, separator):
+    before, found, after = text.partition(separator)
+    return before if found else ''
+
+def substringAfter(text, separator):
+    return text.partition(separator)[2]
+
+def basename(path):
+    while True:
+        if substringAfter(path, '\\'):
+            path = substringAfter(path, '\\')
+        elif substringAfter(path, '/'):
+            path = substringAfter(path, '/')
+        else:
+            return path
+
+def groupDigits(numberPiece):
+    groupList = []
+    while len(numberPiece) > 3:
+        groupList.insert(0, numberPiece[-3:])
+        numberPiece = numberPiece[:-3]
+    groupList.insert(0, numberPiece)
+    return ','.join(groupList)
+
+def formatPercent(number):
+    # format-number(number, '0.00DDD%') as libxslt does it, rounding in floating point to five places.
+    if math.isnan(number):
+        return 'NaN'
+    sign = '-' if number < 0 else ''
+    number = abs(number) * 100
+    if math.isinf(number):
+        return sign + 'Infinity%'
+    scale = 10.0 ** 5
+    number += .5 / scale
+    number -= math.fmod(number, 1.0 / scale)
+    wholeStr = str(int(math.floor(number)))
+    fraction = math.floor(scale * (number - math.floor(number)) + 0.5)
+    optionalDigits = 3
+    while optionalDigits > 0 and math.fmod(fraction, 10.0) < 1.0:
+        fraction /= 10.0
+        optionalDigits -= 1
+    return sign + wholeStr + '.' + str(int(math.floor(fraction))).zfill(2 + optionalDigits) + '%'
+
+def appendText(parentETree, text):
+    if not text:
+        return
+    if len(parentETree) > 0:
+        lastETree = parentETree[-1]
+        lastETree.tail = (lastETree.tail or '') + text
+    else:
+        parentETree.text = (parentETree.text or '') + text
+
+def firstDifference(xsltBytes, nativeBytes):
+    xsltLineList = generatedIdPattern.sub(b' id=""', xsltBytes).splitlines()
+    nativeLineList = generatedIdPattern.sub(b' id=""', nativeBytes).splitlines()
+    for i, (xsltLine, nativeLine) in enumerate(zip(xsltLineList, nativeLineList)):
+        if xsltLine != nativeLine:
+            return (i + 1, xsltLine, nativeLine)
+    if len(xsltLineList) != len(nativeLineList):
+        i = min(len(xsltLineList), len(nativeLineList))
+        return (i + 1, b''.join(xsltLineList[i:i+1]), b''.join(nativeLineList[i:i+1]))
+    return None
+
+
+
+class HtmlWriter(object):
+    # a python port of InstanceReport.xslt, run with asPage='true' and the stylesheet's other params at their defaults.
+    # it reads the same InstanceReport tree the stylesheet would, so embedded reports and the R xml file stay the single
+    # source of truth, and it builds the html with lxml so that serialization is libxml2's, exactly as for the xslt result.
+    # a report that has no R file tree is read through reportView() instead.
+    def __init__(self, tree):
+        self.rootETree = tree.getroot()
+        self.rawTextList = []
+        majorVersion = substringBefore(self.rootETree.findtext('Version', ''), '.')
+        self.isMajorVersionAbove2 = len(majorVersion) > 0 and xpathNumber(majorVersion) > 2
+
+    def htmlBytes(self):
+        htmlETree = Element('html')
+        headETree = SubElement(htmlETree, 'head')
+        SubElement(headETree, 'title')
+        SubElement(headETree, 'link', {'rel':'stylesheet', 'type':'text/css', 'href':'report.css'})
+        SubElement(headETree, 'script', {'type':'text/javascript', 'src':'Show.js'}).text = '/* Do Not Remove This Comment */'
+        SubElement(headETree, 'script', {'type':'text/javascript'}).text = toggleScriptText
+        self.emitInstanceReport(SubElement(htmlETree, 'body'), self.rootETree, True)
+
+        htmlBytes = tostring(ElementTree(htmlETree), method='html', pretty_print=True, encoding='us-ascii')
+        if len(self.rawTextList) > 0:
+            htmlBytes = rawTextPlaceholderPattern.sub(lambda m: self.rawTextList[int(m.group(1))].encode('us-ascii', 'xmlcharrefreplace'),
+                                                      htmlBytes)
+        return htmlBytes
+
+    def appendRawText(self, parentETree, text):
+        if not text:
+            return
+        appendText(parentETree, 'EdgarRendererRawText{}Z'.format(len(self.rawTextList)))
+        self.rawTextList += [text]
+
+
+    def emitInstanceReport(self, parentETree, reportETree, isOuterReport):
+        columnETreeList = reportETree.findall('Columns/Column')
+        rowETreeList = reportETree.findall('Rows/Row')
+        cellETreeList = reportETree.findall('Rows/Row/Cells/Cell')
+
+        # count((Columns/Column | Rows | Rows/Row/Cells/Cell)[not('' = FootnoteIndexer)]), and Rows never has a FootnoteIndexer.
+        hasFootnotes = (reportETree.find('Rows') is not None
+                        or any(e.findtext('FootnoteIndexer') != '' for e in columnETreeList)
+                        or any(e.findtext('FootnoteIndexer') != '' for e in cellETreeList))
+
+        # the notify template, as the three strings of column ids the stylesheet builds up front.
+        anyWithNotes = colsWithNotes = headsWithNotes = ''
+        if hasFootnotes:
+            rowNotes = '0|' if sum(1 for e in rowETreeList if e.findtext('FootnoteIndexer') != '') > 1 else ''
+            cellIdWithNoteSet = {e.findtext('Id') for e in cellETreeList if e.findtext('FootnoteIndexer') != ''}
+            anyWithNotes = colsWithNotes = headsWithNotes = '|'
+            for columnETree in columnETreeList:
+                colId = columnETree.findtext('Id')
+                headNotes = (colId or '') + '|' if columnETree.findtext('FootnoteIndexer') != '' else ''
+                cellNotes = colId + '|' if colId is not None and colId in cellIdWithNoteSet else ''
+                anyWithNotes += rowNotes + headNotes + cellNotes
+                colsWithNotes += rowNotes + cellNotes
+                headsWithNotes += rowNotes + headNotes
+
+        rounding = len(reportETree.findtext('RoundingOption', '')) > 0
+        embeddedReportETree = reportETree.getparent()
+        isBarChartTable = embeddedReportETree is None or len(embeddedReportETree.findtext('BarChartImageFileName', '')) == 0
+
+        if isOuterReport:
+            SubElement(parentETree, 'span', {'style':'display: none;'}).text = 'v' + reportETree.findtext('Version', '')
+
+        if not isBarChartTable:
+            SubElement(parentETree, 'img', {'alt':'Bar Chart', 'src':basename(embeddedReportETree.findtext('BarChartImageFileName', ''))})
+            self.emitOuterFootnotes(parentETree, reportETree)
+            return
+
+        tableETree = SubElement(parentETree, 'table', {'class':'report', 'border':'0', 'cellspacing':'2'})
+        if isOuterReport:
+            reportNameETree = reportETree.find('ReportName')
+            tableETree.set('id', '' if reportNameETree is None else 'idm{}'.format(id(reportNameETree)))
+        if reportETree.findtext('HasEmbeddedReports') != 'true':
+            self.emitViewHead(tableETree, reportETree, columnETreeList, rowETreeList, anyWithNotes, hasFootnotes, rounding)
+        self.emitViewBody(tableETree, reportETree, columnETreeList, rowETreeList, colsWithNotes, headsWithNotes, rounding)
+
+        if not isOuterReport:
+            self.emitOuterFootnotes(parentETree, reportETree)
+            return
+
+        self.emitInnerFootnotes(tableETree, reportETree, columnETreeList, anyWithNotes)
+
+        # the definition and reference lookup table, one entry per element name and per dimension member in the whole page.
+        divETree = SubElement(parentETree, 'div', {'style':'display: none;'})
+        firstRowByElementNameDict = {}
+        for rowETree in reportETree.iter('Row'):
+            elementName = rowETree.findtext('ElementName')
+            if elementName is not None:
+                firstRowByElementNameDict.setdefault(elementName, rowETree)
+        for elementName in sorted(firstRowByElementNameDict):
+            if len(elementName) > 0:
+                self.emitAuthRefData(divETree, firstRowByElementNameDict[elementName], elementName)
+        firstDimensionInfoDict = {}
+        for dimensionInfoETree in reportETree.iter('DimensionInfo'):
+            key = dimensionInfoETree.findtext('dimensionId', '') + dimensionInfoETree.findtext('Id', '')
+            firstDimensionInfoDict.setdefault(key, dimensionInfoETree)
+        for dimensionInfoETree in firstDimensionInfoDict.values():
+            segmentETree = dimensionInfoETree.getparent()
+            isDefaultForEntity = segmentETree.findtext('IsDefaultForEntity')
+            if segmentETree.tag == 'Segment' and isDefaultForEntity is not None and isDefaultForEntity != 'true':
+                dimensionStr = dimensionInfoETree.findtext('dimensionId', '').replace(':', '_')
+                memberStr = dimensionInfoETree.findtext('Id', '').replace(':', '_')
+                self.emitAuthRefData(divETree, dimensionInfoETree, dimensionStr + '=' + memberStr)
+
+
+    def emitViewHead(self, tableETree, reportETree, columnETreeList, rowETreeList, colsWithNotes, hasFootnotes, rounding):
+        showElementNames = reportETree.findtext('ShowElementNames') == 'true'
+        firstLabelList = [columnETree.find('Labels/Label') for columnETree in columnETreeList]
+        firstLabelList = [None if labelETree is None else labelETree.get('Label') for labelETree in firstLabelList]
+        anyEnded = any(label is not None and ' Ended' in label for label in firstLabelList)
+
+        trETree = SubElement(tableETree, 'tr')
+        if reportETree.findtext('DisplayLabelColumn', '') in ('', 'true'):
+            hasLabelFootnotes = any(len(e.findtext('FootnoteIndexer', '')) > 0 for e in rowETreeList)
+            thETree = SubElement(trETree, 'th', {'class':'tl', 'colspan':str(1 + hasLabelFootnotes)})
+            if showElementNames:
+                thETree.text = 'Label'
+            else:
+                thETree.set('rowspan', str(1 + anyEnded))
+                strongETree = SubElement(SubElement(thETree, 'div', {'style':'width: 200px;'}), 'strong')
+                strongETree.text = reportETree.findtext('ReportName', '')
+                brETree = SubElement(strongETree, 'br')
+                if rounding:
+                    brETree.tail = reportETree.findtext('RoundingOption', '')
+        if showElementNames:
+            SubElement(SubElement(trETree, 'th', {'class':'tl'}), 'strong').text = 'Element'
+
+        # promoMgr
+        if showElementNames or anyEnded:
+            for i, columnETree in enumerate(columnETreeList):
+                label = firstLabelList[i]
+                if not showElementNames and i > 0 and label is not None and label == firstLabelList[i - 1]:
+                    continue
+                colspan = self.colCount(columnETreeList, firstLabelList, rowETreeList, colsWithNotes, hasFootnotes, i + 1, label)
+                thETree = SubElement(trETree, 'th', {'class':'th', 'colspan':colspan})
+                if showElementNames:
+                    thETree.text = 'Value'
+                elif label is not None and ' Ended' in label:
+                    thETree.text = label
+        else:
+            for columnETree in columnETreeList:
+                self.emitHeader(trETree, reportETree, columnETree, colsWithNotes)
+
+        if not showElementNames and anyEnded:
+            trETree = SubElement(tableETree, 'tr')
+            for columnETree in columnETreeList:
+                if columnETree.findtext('LabelColumn') != 'true':
+                    self.emitHeader(trETree, reportETree, columnETree, colsWithNotes)
+
+    def colCount(self, columnETreeList, firstLabelList, rowETreeList, colsWithNotes, hasFootnotes, position, thisLabel):
+        # countContiguous: the run of columns from position on that share its first label.
+        numCols = None
+        for j in range(position, len(columnETreeList)):
+            if (columnETreeList[j].findtext('labelColumn') == 'true'
+                    or not (firstLabelList[j] is not None and thisLabel is not None and firstLabelList[j] == thisLabel)):
+                numCols = max(0, j + 1 - position)
+                break
+        if numCols is None:
+            numCols = len(columnETreeList) - position + 1
+        if not hasFootnotes:
+            return str(numCols)
+        # countIndices: the stylesheet sorts these counts as text, descending, and takes the first one.
+        countStrList = []
+        for rowETree in rowETreeList:
+            count = 0
+            for k, cellETree in enumerate(rowETree.findall('Cells/Cell'), 1):
+                if position <= k < position + numCols and '|{}|'.format(cellETree.findtext('Id', '')) in colsWithNotes:
+                    count += 1
+            countStrList += [str(count)]
+        if len(countStrList) == 0:
+            return 'NaN'
+        return str(numCols + int(max(countStrList)))
+
+    def emitHeader(self, trETree, reportETree, columnETree, colsWithNotes):
+        hasFootnoteColumn = '|{}|'.format(columnETree.findtext('Id', '')) in colsWithNotes
+        hasFootnoteHeader = hasFootnoteColumn and len(columnETree.findtext('FootnoteIndexer', '')) > 0
+        thETree = SubElement(trETree, 'th', {'class':'th'})
+        if hasFootnoteColumn and not hasFootnoteHeader:
+            thETree.set('colspan', '2')
+        if reportETree.findtext('ShowElementNames') == 'true':
+            thETree.text = 'Value'
+        else:
+            labelETreeList = [e for e in columnETree.iterfind('Labels/Label') if ' Ended' not in e.get('Label', '')]
+            for i, labelETree in enumerate(labelETreeList):
+                text = labelETree.get('Label', '')
+                if i < len(labelETreeList) - 1:
+                    text += columnETree.findtext('LabelSeparator', '')
+                divETree = SubElement(thETree, 'div')
+                appendText(divETree, text)
+        if hasFootnoteHeader:
+            SubElement(SubElement(trETree, 'th', {'class':'th'}), 'sup').text = columnETree.findtext('FootnoteIndexer')
+
+
+    def emitViewBody(self, tableETree, reportETree, columnETreeList, rowETreeList, colsWithNotes, headsWithNotes, rounding):
+        showElementNames = reportETree.findtext('ShowElementNames') == 'true'
+        displayLabelColumn = reportETree.findtext('DisplayLabelColumn', '') in ('', 'true')
+        hasLabelFootnotes = any(len(e.findtext('FootnoteIndexer', '')) > 0 for e in rowETreeList)
+        parentETree = reportETree.getparent()
+        isTransposed = parentETree is not None and parentETree.findtext('IsTransposed') == 'true'
+
+        for position, rowETree in enumerate(rowETreeList, 1):
+            isReportTitle = rowETree.findtext('IsReportTitle') == 'true'
+            isSegmentTitle = rowETree.findtext('IsSegmentTitle') == 'true'
+            # the stylesheet tests contains(ReportName, Label) from the row, where there is no ReportName, so only an empty label matches.
+            if isReportTitle or (xpathNumber(rowETree.findtext('Id')) == 1 and isSegmentTitle and rowETree.findtext('Label', '') == ''):
+                pass
+            else:
+                # rowStyle
+                if isReportTitle or isSegmentTitle:
+                    rowClass = 'rh'
+                elif rowETree.findtext('IsCalendarTitle') == 'true':
+                    rowClass = 'rc'
+                else:
+                    rowClass = 're' if position % 2 == 1 else 'ro'
+                    if rowETree.findtext('IsTotalLabel') == 'true':
+                        rowClass += 'u'
+                trETree = SubElement(tableETree, 'tr', {'class':rowClass})
+
+                if displayLabelColumn:
+                    if (isSegmentTitle or rowETree.findtext('IsAbstractGroupTitle') == 'true'
+                            or rowETree.findtext('ElementPrefix') in standardPrefixSet):
+                        custom = ''
+                    else:
+                        custom = 'custom'
+                    tdETree = SubElement(trETree, 'td', {'class':'pl ' + custom, 'style':'border-bottom: 0px;', 'valign':'top'})
+                    self.emitAuthRefLink(tdETree, rowETree, rowETreeList[position:], isTransposed)
+                    if hasLabelFootnotes:
+                        tdETree = SubElement(trETree, 'td', {'class':'th', 'style':'border-bottom: 0px;'})
+                        SubElement(tdETree, 'sup').text = rowETree.findtext('FootnoteIndexer', '')
+                if showElementNames:
+                    SubElement(trETree, 'td', {'class':'th', 'style':'border-bottom: 0px;'}).text = rowETree.findtext('ElementName', '')
+                self.emitCells(trETree, rowETree, columnETreeList, colsWithNotes, headsWithNotes, rounding)
+
+            if (rowETree.findtext('IsSubReportEnd') == 'true' and position != len(rowETreeList)
+                    and rowETreeList[position].findtext('IsSegmentTitle') != 'true'):
+                # reportBreak counts Columns/Column from the row, which has none.
+                tdETree = SubElement(SubElement(tableETree, 'tr'), 'td', {'colspan':'1', 'style':'height: 1em;'})
+                SubElement(tdETree, 'hr')
+
+    def emitAuthRefLink(self, tdETree, rowETree, followingRowETreeList, isTransposed):
+        elementName = rowETree.findtext('ElementName', '')
+        if not isTransposed and elementName == '':
+            dimensionStr = memberStr = ''
+            followingRowETree = next((e for e in followingRowETreeList if e.find('MCU') is not None), None)
+            if followingRowETree is not None:
+                for segmentETree in followingRowETree.iterfind('MCU/contextRef/Segments/Segment'):
+                    isDefaultForEntity = segmentETree.findtext('IsDefaultForEntity')
+                    if isDefaultForEntity is not None and isDefaultForEntity != 'true':
+                        dimensionInfoETree = segmentETree.find('DimensionInfo')
+                        if dimensionInfoETree is not None:
+                            dimensionStr = dimensionInfoETree.findtext('dimensionId', '')
+                            memberStr = dimensionInfoETree.findtext('Id', '')
+                        break
+            onclick = "top.Show.showAR( this, 'defref_{}', window );".format((dimensionStr + '=' + memberStr).replace(':', '_'))
+            linkETree = SubElement(tdETree, 'a', {'class':'a', 'href':'javascript:void(0);', 'onclick':onclick})
+        elif isTransposed or rowETree.findtext('IsReportTitle') == 'true' or elementName == '':
+            linkETree = SubElement(tdETree, 'div', {'class':'a'})
+            level = rowETree.findtext('Level')
+            if level is not None and level != '0':
+                linkETree.set('style', 'margin-left: {}em;'.format(level))
+        else:
+            onclick = "top.Show.showAR( this, 'defref_{}', window );".format(elementName)
+            linkETree = SubElement(tdETree, 'a', {'class':'a', 'href':'javascript:void(0);', 'onclick':onclick})
+
+        label = normalizeSpace(rowETree.findtext('Label', ''))
+        if rowETree.findtext('IsAbstractGroupTitle') == 'true':
+            SubElement(linkETree, 'strong').text = label
+        else:
+            appendText(linkETree, label)
+
+    def emitAuthRefData(self, divETree, contextETree, name):
+        definition = contextETree.findtext('ElementDefenition', '')
+        references = contextETree.findtext('ElementReferences', '')
+        hasDefinition = len(definition) > 0 and definition != 'No definition available.'
+        hasReferences = len(references) > 0 and references != 'No authoritative reference available.'
+        if hasDefinition:
+            first = 'Definition'
+        elif hasReferences:
+            first = 'References'
+        else:
+            first = 'Details'
+
+        tableETree = SubElement(divETree, 'table', {'border':'0', 'cellpadding':'0', 'cellspacing':'0', 'class':'authRefData',
+                                                    'style':'display: none;', 'id':'defref_' + name})
+        tdETree = SubElement(SubElement(tableETree, 'tr'), 'td', {'class':'hide'})
+        SubElement(tdETree, 'a', {'style':'color: white;', 'href':'javascript:void(0);', 'onclick':'top.Show.hideAR();'}).text = 'X'
+        tdETree = SubElement(SubElement(tableETree, 'tr'), 'td')
+        bodyETree = SubElement(tdETree, 'div', {'class':'body', 'style':'padding: 2px;'})
+
+        def toggle(section):
+            toggleETree = SubElement(bodyETree, 'a', {'href':'javascript:void(0);', 'onclick':'top.Show.toggleNext( this );'})
+            toggleETree.text = ('- ' if first == section else '+ ') + section
+            sectionETree = SubElement(bodyETree, 'div')
+            if first != section:
+                sectionETree.set('style', 'display: none;')
+            return sectionETree
+
+        if hasDefinition:
+            appendText(SubElement(toggle('Definition'), 'p'), definition)
+        if hasReferences:
+            pETree = SubElement(toggle('References'), 'p')
+            # nl2br splits at the first crlf while there is one anywhere, and only then at bare line feeds.
+            while '\r\n' in references or '\n' in references:
+                before, separator, references = references.partition('\r\n' if '\r\n' in references else '\n')
+                appendText(pETree, before)
+                SubElement(pETree, 'br')
+            appendText(pETree, references)
+        detailsETree = SubElement(toggle('Details'), 'table', {'border':'0', 'cellpadding':'0', 'cellspacing':'0'})
+        dataType = contextETree.findtext('ElementDataType')
+        for labelTdAttrib, labelText, valueTdAttrib, valueText in (
+                ({}, ' Name:', {'style':'white-space:nowrap;'}, name),
+                ({'style':'padding-right: 4px;white-space:nowrap;'}, ' Namespace Prefix:', {}, contextETree.findtext('ElementPrefix', '')),
+                ({}, ' Data Type:', {}, 'na' if dataType is None else dataType),
+                ({}, ' Balance Type:', {}, contextETree.findtext('BalanceType', '')),
+                ({}, ' Period Type:', {}, contextETree.findtext('PeriodType', ''))):
+            trETree = SubElement(detailsETree, 'tr')
+            SubElement(SubElement(trETree, 'td', labelTdAttrib), 'strong').text = labelText
+            appendText(SubElement(trETree, 'td', valueTdAttrib), valueText)
+
+
+    def emitCells(self, trETree, rowETree, columnETreeList, colsWithNotes, headsWithNotes, rounding):
+        for cellETree in rowETree.iterfind('Cells/Cell'):
+            idKey = '|{}|'.format(cellETree.findtext('Id', ''))
+            tdETree = SubElement(trETree, 'td')
+            if idKey in headsWithNotes and idKey not in colsWithNotes:
+                tdETree.set('colspan', '2')
+            embeddedReportETree = cellETree.find('EmbeddedReport/InstanceReport')
+            isNumeric = cellETree.findtext('IsNumeric')
+            if embeddedReportETree is not None:
+                self.emitInstanceReport(tdETree, embeddedReportETree, False)
+            elif isNumeric == 'false':
+                tdETree.set('class', 'text')
+                nonNumericText = cellETree.findtext('NonNumbericText')
+                if cellETree.findtext('DisplayDateInUSFormat') == 'true':
+                    if nonNumericText != '':
+                        appendText(tdETree, self.dateText(nonNumericText or ''))
+                elif nonNumericText != '':
+                    self.appendRawText(tdETree, self.filteredText(nonNumericText or ''))
+                else:
+                    appendText(tdETree, '\xa0')
+            elif isNumeric == 'true':
+                if cellETree.findtext('DisplayZeroAsNone') == 'true' and xpathNumber(cellETree.findtext('NumericAmount')) == 0:
+                    tdETree.set('class', 'nump')
+                    appendText(tdETree, ' none ')
+                else:
+                    tdETree.set('class', 'nump' if xpathNumber(cellETree.findtext('NumericAmount')) >= 0 else 'num')
+                    numeric = cellETree.findtext('RoundedNumericAmount' if rounding else 'NumericAmount', '')
+                    self.emitNumber(tdETree, cellETree, columnETreeList, numeric)
+            SubElement(tdETree, 'span')
+            if idKey in colsWithNotes:
+                tdETree = SubElement(trETree, 'td', {'class':'fn', 'style':'border-bottom: 0px;'})
+                if ((isNumeric == 'true' or len(cellETree.findtext('NonNumbericText', '')) > 0)
+                        and len(cellETree.findtext('FootnoteIndexer', '')) > 0):
+                    SubElement(tdETree, 'sup').text = cellETree.findtext('FootnoteIndexer')
+
+    def dateText(self, text):
+        year = xpathNumber(substringBefore(text, '-'))
+        month = xpathNumber(substringBefore(substringAfter(text, '-'), '-'))
+        dayStr = xpathString(xpathNumber(substringAfter(substringAfter(text, '-'), '-')))
+        monthName = monthNameList[int(month) - 1] if month in range(1, 13) else ''
+        text = monthName[:3] + ('.' if monthName != 'May' else '') + ' '
+        text += (' 0' + dayStr if len(dayStr) == 1 else dayStr) + ',  '
+        return text + xpathString(year)
+
+    def filteredText(self, text):
+        if not self.isMajorVersionAbove2:
+            for agency in ('Moodys', 'StandardPoors', 'Fitch'):
+                if text.startswith('us-gaap:' + agency) and 'RatingMember' in text:
+                    return substringBefore(substringAfter(text, 'us-gaap:' + agency), 'RatingMember')
+        return text
+
+    def emitNumber(self, tdETree, cellETree, columnETreeList, numeric):
+        # numFilters, which deliberately avoids format-number except for ratios.
+        if cellETree.findtext('ShowCurrencySymbol') == 'true':
+            if cellETree.findtext('IsIndependantCurrency') == 'true':
+                currencyCode = cellETree.findtext('CurrencyCode', '')
+                self.appendRawText(tdETree, {'USD':'$', 'EUR':'\u20ac', 'GBP':'\u20a4'}.get(currencyCode, currencyCode))
+            else:
+                cellId = cellETree.findtext('Id')
+                currencySymbolETreeList = [e for columnETree in columnETreeList if cellId is not None and columnETree.findtext('Id') == cellId
+                                           for e in columnETree.iterfind('CurrencySymbol')]
+                codeETreeList = [e for currencySymbolETree in currencySymbolETreeList for e in currencySymbolETree.iterfind('Code')]
+                if len(codeETreeList) > 0:
+                    self.appendRawText(tdETree, ''.join(codeETreeList[0].itertext()))
+                elif len(currencySymbolETreeList) > 0:
+                    appendText(tdETree, ''.join(currencySymbolETreeList[0].itertext()))
+            appendText(tdETree, ' ')
+
+        negative = numeric[:1] == '-'
+        entire = numeric[1:] if negative else numeric
+        decimal = substringAfter(entire, '.')
+        whole = substringBefore(entire, '.') if decimal else entire
+        if cellETree.findtext('IsRatio') == 'true':
+            text = formatPercent(xpathNumber(entire))
+        else:
+            text = groupDigits(whole) + ('.' + decimal if decimal else '')
+        appendText(tdETree, '(' + text + ')' if negative else text)
+
+
+    def emitInnerFootnotes(self, tableETree, reportETree, columnETreeList, colsWithNotes):
+        if reportETree.find('Footnotes/Footnote') is None:
+            return
+        idxs = sum(1 for e in columnETreeList if '|{}|'.format(e.findtext('Id', '')) in colsWithNotes)
+        rowidxs = 2 if colsWithNotes.startswith('|0') else 1
+        colspan = str(len(columnETreeList) + idxs + rowidxs)
+        SubElement(SubElement(tableETree, 'tr'), 'td', {'colspan':colspan})
+        self.emitOuterFootnotes(SubElement(SubElement(tableETree, 'tr'), 'td', {'colspan':colspan}), reportETree)
+
+    def emitOuterFootnotes(self, parentETree, reportETree):
+        footnoteETreeList = reportETree.findall('Footnotes/Footnote')
+        if len(footnoteETreeList) == 0:
+            return
+        tableETree = SubElement(parentETree, 'table', {'class':'outerFootnotes', 'width':'100%'})
+        for footnoteETree in footnoteETreeList:
+            trETree = SubElement(tableETree, 'tr', {'class':'outerFootnote'})
+            SubElement(trETree, 'td', {'style':'vertical-align: top;', 'valign':'top'}).text = '[' + footnoteETree.findtext('NoteId', '') + ']'
+            self.appendRawText(SubElement(trETree, 'td', {'style':'vertical-align: top;', 'valign':'top'}), footnoteETree.findtext('Note', ''))
+
+
+class RFileView(object):
+    # stands in for an element of the R file, with just the lxml calls HtmlWriter makes, so that the native emitter can read
+    # a report straight from its Report, Column, Row and Cell objects when nothing else needs the R file as a tree.
+    # textDict holds the text of each child element HtmlWriter reads, '' if the element is there but empty, and
+    # childListDict the elements it finds by path.
+    def __init__(self, tag=None, textDict=None, childListDict=None, attrib=None, text=None):
+        self.tag = tag
+        self.parent = None
+        self.textDict = {path : ('' if value is None else value) for path, value in (textDict or {}).items()}
+        self.childListDict = childListDict or {}
+        self.descendantListDict = {}
+        self.attrib = attrib or {}
+        self.text = text
+
+    def getroot(self):
+        # the view of a whole report stands in for its tree as well, as HtmlWriter is given a tree.
+        return self
+
+    def getparent(self):
+        return self.parent
+
+    def findtext(self, path, default=None):
+        text = self.textDict.get(path)
+        return default if text is None else text
+
+    def find(self, path):
+        childList = self.childListDict.get(path)
+        return childList[0] if childList else None
+
+    def findall(self, path):
+        return self.childListDict.get(path, [])
+
+    def iterfind(self, path):
+        return iter(self.findall(path))
+
+    def iter(self, tag):
+        return iter(self.descendantListDict.get(tag, []))
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+    def itertext(self):
+        return iter([self.text] if self.text else [])
+
+
+def reportView(report, version):
+    """The parts of report's InstanceReport that HtmlWriter reads, taken from report as Report.emitRFile() would write them.
+    report must have no embedded reports, see Filing.canStreamRFile()."""
+    cube = report.cube
+    visibleColList = [(index, col) for index, col in enumerate(report.colList) if not col.isHidden]
+    columnViewList = [columnView(report, col, index) for index, col in visibleColList]
+    rowViewList = [rowView(report, row, index, visibleColList) for index, row in enumerate(report.rowList) if not row.isHidden]
+    footnoteViewList = [RFileView(textDict={'NoteId' : str(i + 1), 'Note' : footnoteText})
+                        for i, footnoteText in enumerate(report.footnoteTextList)]
+    textDict = {'Version' : version,
+                'DisplayLabelColumn' : str(not cube.isUnlabeled).casefold(),
+                'ShowElementNames' : str(cube.isElements).casefold(),
+                'RoundingOption' : report.RoundingOption,
+                'HasEmbeddedReports' : str(report.hasEmbeddedReports).casefold(),
+                'ReportName' : report.reportName()}
+    childListDict = {'Columns/Column' : columnViewList,
+                     'Rows' : [RFileView('Rows')],
+                     'Rows/Row' : rowViewList,
+                     'Rows/Row/Cells/Cell' : [cellView for view in rowViewList for cellView in view.findall('Cells/Cell')],
+                     'ReportName' : [RFileView('ReportName')],
+                     'Footnotes/Footnote' : footnoteViewList}
+    view = RFileView('InstanceReport', textDict, childListDict)
+    # the columns come before the rows in the R file, and so do their dimension members.
+    view.descendantListDict = {'Row' : rowViewList,
+                               'DimensionInfo' : [dimensionInfoView for columnOrRowView in columnViewList + rowViewList
+                                                  for dimensionInfoView in columnOrRowView.descendantListDict['DimensionInfo']]}
+    return view
+
+def segmentViewList(report, contextRefArgs):
+    # as Report.emitContextRef() writes the Segments of a contextRef.
+    if contextRefArgs is None:
+        return []
+    viewList = []
+    for factAxisMember in report.realAxisMemberList(contextRefArgs[0]):
+        dimensionInfoView = RFileView('DimensionInfo', {'Id' : '' if factAxisMember.member is None else str(factAxisMember.member),
+                                                        'dimensionId' : str(factAxisMember.pseudoAxisName)})
+        segmentView = RFileView('Segment', {'IsDefaultForEntity' : str(factAxisMember.memberIsDefault).casefold()},
+                                {'DimensionInfo' : [dimensionInfoView]})
+        dimensionInfoView.parent = segmentView
+        viewList += [segmentView]
+    return viewList
+
+def columnView(report, col, index):
+    # as Column.emitColumn() writes it.
+    textDict = {'Id' : str(index + 1),
+                'LabelSeparator' : ' ',
+                'FootnoteIndexer' : report.footnoteIndexerStr(col.footnoteNumberSet)}
+    childListDict = {'Labels/Label' : [RFileView('Label', attrib={'Label' : str(header)}) for header in col.headingList]}
+    currencySymbol = col.currencySymbol(index)
+    if currencySymbol is not None:
+        childListDict['CurrencySymbol'] = [RFileView('CurrencySymbol', text=currencySymbol)]
+    view = RFileView('Column', textDict, childListDict)
+    view.descendantListDict['DimensionInfo'] = [segmentView.find('DimensionInfo') for segmentView in segmentViewList(report, col.contextRefArgs(index))]
+    return view
+
+def rowView(report, row, index, visibleColList):
+    # as Row.emitRow() writes it.
+    row.setTotalLabelAndReverseSign()
+    elementName, elementPrefix = row.elementNameAndPrefix()
+    balance, periodType = row.balanceAndPeriodType()
+    typeQname, simpleDataType, doclabel, referencesText = row.conceptFooterStrings()
+    textDict = {'Id' : str(index + 1),
+                'IsAbstractGroupTitle' : str(row.IsAbstractGroupTitle).casefold(),
+                'Level' : str(row.level),
+                'ElementName' : elementName,
+                'ElementPrefix' : elementPrefix,
+                'BalanceType' : balance,
+                'PeriodType' : periodType,
+                'IsReportTitle' : 'false',
+                'IsSegmentTitle' : str(row.isSegmentTitle).casefold(),
+                'IsCalendarTitle' : str(row.IsCalendarTitle).casefold(),
+                'FootnoteIndexer' : report.footnoteIndexerStr(row.footnoteNumberSet),
+                'ElementDataType' : typeQname,
+                'ElementDefenition' : doclabel,
+                'ElementReferences' : referencesText,
+                'IsTotalLabel' : str(row.IsTotalLabel).casefold(),
+                'Label' : report.filing.rowSeparatorStr.join(row.headingList)}
+    childListDict = {'Cells/Cell' : [cellView(report, row, i) for i, col in visibleColList]}
+    segmentList = []
+    if row.factAxisMemberGroup is not None:
+        childListDict['MCU'] = [RFileView('MCU')]
+        segmentList = segmentViewList(report, row.contextRefArgs())
+        childListDict['MCU/contextRef/Segments/Segment'] = segmentList
+    view = RFileView('Row', textDict, childListDict)
+    view.descendantListDict['DimensionInfo'] = [segmentView.find('DimensionInfo') for segmentView in segmentList]
+    return view
+
+def cellView(report, row, i):
+    # as Row.emitRow() writes an empty cell, and Cell.emitCell() any other.
+    cell = row.cellList[i]
+    if cell is None or cell.fact is None or cell.fact.isNil:
+        isNil = cell is not None and cell.fact is not None
+        nonNumericText = cell.NonNumericText if row.isSegmentTitle and report.cube.isUnlabeled and i == 0 else ''
+        return RFileView('Cell', {'Id' : str(i + 1),
+                                  'IsNumeric' : 'false',
+                                  'IsRatio' : str(isNil).casefold(),
+                                  'DisplayZeroAsNone' : str(isNil).casefold(),
+                                  'NumericAmount' : '0',
+                                  'RoundedNumericAmount' : '0',
+                                  'NonNumbericText' : nonNumericText,
+                                  'FootnoteIndexer' : '',
+                                  'CurrencyCode' : '',
+                                  'IsIndependantCurrency' : 'false',
+                                  'ShowCurrencySymbol' : 'false',
+                                  'DisplayDateInUSFormat' : 'false'})
+    IsNumeric, IsRatio, DisplayZeroAsNone, numericAmount, roundedNumericAmount = cell.displayValues()
+    return RFileView('Cell', {'Id' : str(cell.index),
+                              'IsNumeric' : str(IsNumeric).casefold(),
+                              'IsRatio' : str(IsRatio).casefold(),
+                              'DisplayZeroAsNone' : str(DisplayZeroAsNone).casefold(),
+                              'NumericAmount' : str(numericAmount),
+                              'RoundedNumericAmount' : str(roundedNumericAmount),
+                              'NonNumbericText' : cell.NonNumericText,
+                              'FootnoteIndexer' : report.footnoteIndexerStr(cell.footnoteNumberSet),
+                              'CurrencyCode' : cell.currencyCode,
+                              'ShowCurrencySymbol' : str(cell.showCurrencySymbol).casefold(),
+                              'DisplayDateInUSFormat' : str(cell.displayDateInUSFormat()).casefold()})
@@ -9,7 +9,6 @@ are not subject to domestic copyright protection. 17 U.S.C. 105.
 
 from collections import defaultdict
 import Utils
-import arelle.XbrlConst
 
 
 class PresentationGroupNode(object):
@@ -27,17 +26,33 @@ class PresentationGroupNode(object):
         return "[{} {} with {!s} children]".format(self.arelleConcept.qname, self.arelleRelationship.preferredLabel, len(self.childrenList))
 
 
+class PresentationGraphIndex(object):
+    # the parent-child relationships of the whole filing grouped by linkrole, built once per filing instead of asking arelle
+    # for a separate relationship set per presentation group, each of which would scan every parent-child relationship.
+    def __init__(self, relationshipSet):
+        self.parentRelationshipsDict = defaultdict(list) # (linkrole, concept) to the relationships whose child is concept
+        self.relationshipCountDict = defaultdict(int)
+        for relationship in relationshipSet.modelRelationships:
+            self.parentRelationshipsDict[(relationship.linkrole, relationship.toModelObject)].append(relationship)
+            self.relationshipCountDict[relationship.linkrole] += 1
+
+    def parentRelationships(self, linkroleUri, concept):
+        return self.parentRelationshipsDict.get((linkroleUri, concept), [])
+
+
 class PresentationGroup(object):
     def __init__(self, filing, cube):
         self.filing = filing
         self.cube = cube
         self.rootNodeList = []
-        self.linkRelationshipSet = self.filing.modelXbrl.relationshipSet(arelle.XbrlConst.parentChild, self.cube.linkroleUri)
+        self.rootNodeDict = {} # concept to its node in rootNodeList
         self.unitOrdering = []
         self.relationshipToChildNodeDict = {}
+        self.traversedConceptSet = set() # concepts whose whole way up to the roots is already in the graph
 
     def __str__(self):
-        return "[{} has {!s} relationships]".format(self.cube.linkroleUri, len(self.linkRelationshipSet))
+        return "[{} has {!s} relationships]".format(self.cube.linkroleUri,
+                                                    self.filing.presentationGraphIndex.relationshipCountDict[self.cube.linkroleUri])
 
 
     def sortRootNodeListByLabel(self):
@@ -45,7 +60,7 @@ class PresentationGroup(object):
             return
         # it helps to have a canonical root node order, even if it is arbitrary.
         # the "or ''" at the end of the below statement is in case the concept doesn't have a label and returns None, can't sort like that.
-        self.rootNodeList = sorted(self.rootNodeList, key = lambda thing : thing.arelleConcept.label() or '')
+        self.rootNodeList = sorted(self.rootNodeList, key = lambda thing : self.filing.conceptLabel(thing.arelleConcept) or '')
 
 
     # this function builds a graph of all the uncategorized facts and all of their respective axes and members.
@@ -87,61 +102,73 @@ class PresentationGroup(object):
 
     # here we aim to build a subgraph of the presentation graph we are given.  this is because the given graph might be sparsely used.
     # by going directly only to the concepts we know we need, and then traversing up to the root to make a connected subgraph, we can
-    # minimize the exploration of uneeded nodes.
-    def traverseToRootOrRoots(self, concept, relationship, childConcept, passUpNode, localRelationshipSet):
-        if relationship is not None:
-            # this is to catch directed cycles.  each time filing calls this function it will have an empty
-            # localRelationshipSet.  we can't use a global repository of relationships like relationshipToChildNodeDict
-            # because the way this function is called by the filing class, it is ok if it goes over the same relationship
-            # twice.  however, if it goes over the same relationship twice on it's way to the root, then there is a cycle.
-            # in fact, this will catch every possible cycle in our subgraph, we don't care about cycles outside of our subgraph.
-            if relationship in localRelationshipSet:
-                #message = ErrorMgr.getError('PRESENTATION_GROUP_DIRECTED_CYCLE_ERROR').format(self.cube.shortName)
-                self.filing.controller.logFatal(("The presentation group ''{}'' contains a directed cycle, which is a "
-                                                 "violation of XBRL 2.1 section 5.2.4.2.").format(self.cube.shortName))
-                import sys
-                sys.exit()
-            localRelationshipSet.add(relationship)
-
-            try:
-                # let's see if we've already visited this relationship
-                nodeFromDict = self.relationshipToChildNodeDict[relationship]
-                # if we get here, we have already vistied this relationship, in which case we'll maybe add
-                # a child to an existing node and then return.
-                if passUpNode is not None:
-                    self.maybeAddChild(nodeFromDict, passUpNode, passUpNode.arelleRelationship)
-                return
-            except KeyError:
-                # we haven't already visited this relationship, so let's make a new node and maybe add a child.
-                mayBeUnitConcept = childConcept.name in self.filing.modelXbrl.units
-                childNode = PresentationGroupNode(childConcept, relationship, mayBeUnitConcept)
-                if passUpNode is not None:
-                    self.maybeAddChild(childNode, passUpNode, passUpNode.arelleRelationship)
-                passUpNode = childNode
-        else:
-            childNode = None
+    # minimize the exploration of uneeded nodes.  the walk is depth first, first parent first, with an explicit stack so that
+    # deep extension groups don't run into the recursion limit.
+    def traverseToRootOrRoots(self, concept):
+        # once a concept's walk is done, every relationship above it is in relationshipToChildNodeDict, so walking it again
+        # would not add anything.
+        if concept in self.traversedConceptSet:
+            return
+        linkroleUri = self.cube.linkroleUri
+        pathRelationshipSet = set() # relationships between the current node and the concept we started from
+        stack = [(concept, None, None, None)] # (concept, relationship, childConcept, passUpNode)
+        while len(stack) > 0:
+            concept, relationship, childConcept, passUpNode = stack.pop()
+            if concept is None:
+                pathRelationshipSet.remove(relationship) # we are done with everything above this relationship
+                continue
+
+            if relationship is not None:
+                # this is to catch directed cycles.  it is ok to go over the same relationship twice, since many concepts
+                # share the way to their root.  however, if it goes over the same relationship twice on it's way to the root,
+                # then there is a cycle. in fact, this will catch every possible cycle in our subgraph, we don't care about
+                # cycles outside of our subgraph.
+                if relationship in pathRelationshipSet:
+                    #message = ErrorMgr.getError('PRESENTATION_GROUP_DIRECTED_CYCLE_ERROR').format(self.cube.shortName)
+                    self.filing.controller.logFatal(("The presentation group ''{}'' contains a directed cycle, which is a "
+                                                     "violation of XBRL 2.1 section 5.2.4.2.").format(self.cube.shortName))
+                    import sys
+                    sys.exit()
+
+                try:
+                    # let's see if we've already visited this relationship
+                    nodeFromDict = self.relationshipToChildNodeDict[relationship]
+                    # if we get here, we have already vistied this relationship, in which case we'll maybe add
+                    # a child to an existing node and then go no higher.
+                    if passUpNode is not None:
+                        self.maybeAddChild(nodeFromDict, passUpNode, passUpNode.arelleRelationship)
+                    continue
+                except KeyError:
+                    # we haven't already visited this relationship, so let's make a new node and maybe add a child.
+                    mayBeUnitConcept = childConcept.name in self.filing.modelXbrl.units
+                    childNode = PresentationGroupNode(childConcept, relationship, mayBeUnitConcept)
+                    if passUpNode is not None:
+                        self.maybeAddChild(childNode, passUpNode, passUpNode.arelleRelationship)
+                    passUpNode = childNode
+                pathRelationshipSet.add(relationship)
+                stack.append((None, relationship, None, None)) # take it off the path once everything above is done
+            else:
+                childNode = None
+            self.traversedConceptSet.add(concept)
 
-        childrenList = self.linkRelationshipSet.toModelObject(concept)
-        if len(childrenList) == 0:
-            # a concept can have multiple nodes in the presentation group, but it can't have multiple roots.
-            # therefore, if we want to see if we've already visited this root concept, we can just look
-            # through root nodes that we've already visited.
-            for node in self.rootNodeList:
-                if node.arelleConcept == concept:
-                    rootNode = node # we have already made a root node for this concept
-                    break
-            else: # if the above for loop doesn't break, we fall into the else
-                # we have not already made a root concept for this node, so let's make one.
-                # note the relationship is None, root nodes don't have a relationship pointing at them.
-                mayBeUnitConcept = concept.name in self.filing.modelXbrl.units
-                rootNode = PresentationGroupNode(concept, None, mayBeUnitConcept)
-                self.rootNodeList += [rootNode]
+            parentRelationshipList = self.filing.presentationGraphIndex.parentRelationships(linkroleUri, concept)
+            if len(parentRelationshipList) == 0:
+                # a concept can have multiple nodes in the presentation group, but it can't have multiple roots.
+                try:
+                    rootNode = self.rootNodeDict[concept] # we have already made a root node for this concept
+                except KeyError:
+                    # we have not already made a root concept for this node, so let's make one.
+                    # note the relationship is None, root nodes don't have a relationship pointing at them.
+                    mayBeUnitConcept = concept.name in self.filing.modelXbrl.units
+                    rootNode = PresentationGroupNode(concept, None, mayBeUnitConcept)
+                    self.rootNodeList += [rootNode]
+                    self.rootNodeDict[concept] = rootNode
 
-            self.maybeAddChild(rootNode, childNode, relationship)
+                self.maybeAddChild(rootNode, childNode, relationship)
 
-        copy = localRelationshipSet.copy()
-        for newRelationship in childrenList:
-            self.traverseToRootOrRoots(newRelationship.fromModelObject, newRelationship, concept, passUpNode, copy)
+            # reversed, so that the first parent is walked first.
+            for newRelationship in reversed(parentRelationshipList):
+                stack.append((newRelationship.fromModelObject, newRelationship, concept, passUpNode))
 
 
 
@@ -159,19 +186,19 @@ class PresentationGroup(object):
 
     def startPreorderTraversal(self):
         visited = set()
-        giveMemGetPositionDictPrimary = defaultdict(list) # gets populated by recursive call
+        giveMemGetPositionDictPrimary = defaultdict(list) # gets populated by the traversal
 
         self.sortRootNodeListByLabel()
 
         if len(self.rootNodeList) == 1:
-            self.doPreorderTraversal(self.rootNodeList[0], giveMemGetPositionDictPrimary, {}, False, False, visited)
+            self.doPreorderTraversal(self.rootNodeList[0], giveMemGetPositionDictPrimary, False, visited)
         else:
             for rootNode in self.rootNodeList:
                 # later on we're going to need to decide whether to print a warning about if multiple root nodes are being used, so here we keep track of
                 # everything under each root node.  the idea is that if multiple root nodes are being used, the ordering is arbitrary by label, not controlled
                 # in an intentional way by the filer. 
                 setOfConcepts = set()
-                self.doPreorderTraversal(rootNode, giveMemGetPositionDictPrimary, {}, False, setOfConcepts, visited)
+                self.doPreorderTraversal(rootNode, giveMemGetPositionDictPrimary, setOfConcepts, visited)
                 self.cube.rootNodeToConceptSetDict[rootNode] = setOfConcepts
 
         # we searched the whole graph and got back giveMemGetPositionDictPrimary which contains all of the primary elements
@@ -184,87 +211,99 @@ class PresentationGroup(object):
     # in the order of a preorder traversal of the presentation group.  the order won't be simple like 1,2,3, it might 
     # be 5, 20, 53, ... but sorting in increasing order will order axes in the order of a preorder traversal.  we do 
     # this trick several times below too.
-    def doPreorderTraversal(self, node, giveMemGetPositionDictPrimary, giveMemGetPositionDictAxis, parentIsAnAxis, setOfConcepts, visited):
-        if self.cube.noFactsOrAllFactsSuppressed:
-            return
-        preferredLabel = None
-        relationship = node.arelleRelationship
-        if relationship is not None: # root nodes have no relationship
-            if relationship in visited:
-                return
-            visited.add(relationship)
-            preferredLabel = relationship.preferredLabel
-        concept = node.arelleConcept
-
-        # making giveMemGetPositionDict's
-        nodeIsAnAxis = concept.isDimensionItem
-        if nodeIsAnAxis:
-            if concept in visited or concept.qname not in self.cube.hasAxes:
-                # first, make sure we don't visit an axis twice, could happen if it has multiple parents
-                # then, make sure it's an axis for this cube
-                return
-            visited.add(concept) # yes, we are sort of misusing visited for this, but it's ok
-            if relationship is None:
-                axisOrder = Utils.minNumber
-            else:
-                axisOrder = relationship.order
-            parentIsAnAxis = True
-        elif parentIsAnAxis: # only members can be under axes
-            giveMemGetPositionDictAxis[concept.qname] = len(visited)
-        elif not parentIsAnAxis: # we're not on an axis or below an axis, so it's a primary item.
-            try:
-                if preferredLabel in Utils.startEndRoles:
-                    if concept.periodType == 'duration':
-                        self.filing.ignoredPreferredLabels += [(relationship.linkrole,concept.qname,preferredLabel,self.cube.shortName)]
-                        if preferredLabel in Utils.startRoles:
-                            preferredLabel = Utils.durationStartRole # not a role.
+    def doPreorderTraversal(self, rootNode, giveMemGetPositionDictPrimary, setOfConcepts, visited):
+        # the stack holds the nodes still to be visited, each with its giveMemGetPositionDictAxis and parentIsAnAxis, and for
+        # each axis, a marker to finish it off once everything under it is visited.
+        stack = [(rootNode, {}, False)]
+        while len(stack) > 0:
+            node, giveMemGetPositionDictAxis, parentIsAnAxis = stack.pop()
+            if node is None: # finishing off an axis, parentIsAnAxis is holding (concept, axisOrder)
+                self.finishAxisOfPreorderTraversal(giveMemGetPositionDictAxis, *parentIsAnAxis)
+                continue
+
+            if self.cube.noFactsOrAllFactsSuppressed:
+                continue
+            preferredLabel = None
+            relationship = node.arelleRelationship
+            if relationship is not None: # root nodes have no relationship
+                if relationship in visited:
+                    continue
+                visited.add(relationship)
+                preferredLabel = relationship.preferredLabel
+            concept = node.arelleConcept
+
+            # making giveMemGetPositionDict's
+            nodeIsAnAxis = concept.isDimensionItem
+            if nodeIsAnAxis:
+                if concept in visited or concept.qname not in self.cube.hasAxes:
+                    # first, make sure we don't visit an axis twice, could happen if it has multiple parents
+                    # then, make sure it's an axis for this cube
+                    continue
+                visited.add(concept) # yes, we are sort of misusing visited for this, but it's ok
+                if relationship is None:
+                    axisOrder = Utils.minNumber
+                else:
+                    axisOrder = relationship.order
+                parentIsAnAxis = True
+            elif parentIsAnAxis: # only members can be under axes
+                giveMemGetPositionDictAxis[concept.qname] = len(visited)
+            elif not parentIsAnAxis: # we're not on an axis or below an axis, so it's a primary item.
+                try:
+                    if preferredLabel in Utils.startEndRoles:
+                        if concept.periodType == 'duration':
+                            self.filing.ignoredPreferredLabels += [(relationship.linkrole,concept.qname,preferredLabel,self.cube.shortName)]
+                            if preferredLabel in Utils.startRoles:
+                                preferredLabel = Utils.durationStartRole # not a role.
+                            else:
+                                preferredLabel = Utils.durationEndRole # not a real role.
                         else:
-                            preferredLabel = Utils.durationEndRole # not a real role.
-                    else:
-                        self.cube.periodStartEndLabelDict[concept.qname].append(preferredLabel)
-            except AttributeError:
-                pass
-            # see note earlier about len(visited) for an explanation
-            giveMemGetPositionDictPrimary[concept.qname].append((len(visited), preferredLabel))
-
-            # axes and members are abstract too, but nodeIsAnAxis and parentIsAnAxis are false, so we don't have to worry about them here.
-            if concept.isAbstract:
-                self.cube.abstractDict[concept.qname] = len(visited)
-
-        # if it's false, then there is only one root and there's no possibility of ever needing to print a warning message.  otherwise, keep track of what's under
-        # each root node so that if nodes under multiple roots are being used, we can warn that the ordering between them might be unexpected.
-        if setOfConcepts != False and (nodeIsAnAxis or not parentIsAnAxis):
-            setOfConcepts.add(concept)
-
-        # units -- note that a member or element can be used for something else and still be used for unit ordering.
-        if node.mayBeUnitConcept:
-            self.unitOrdering += [(len(visited), concept.name)] # see note earlier about len(visited) for an explanation
-
-        # labels
-        self.buildLabel(concept, preferredLabel)
-
-        # sort children, we are doing this as we go.
-        node.childrenList = sorted(node.childrenList, key = lambda thing : thing.arelleRelationship.order)
-
-        # recurse
-        for childNode in node.childrenList:
-            if parentIsAnAxis:
-                self.doPreorderTraversal(childNode, giveMemGetPositionDictPrimary, giveMemGetPositionDictAxis, parentIsAnAxis, setOfConcepts, visited)
-            else:
-                self.doPreorderTraversal(childNode, giveMemGetPositionDictPrimary, {}, parentIsAnAxis, setOfConcepts, visited)
-
-        if nodeIsAnAxis:
-            # now we've already recursed on all of the axes children, so we have their ordering, so we can add to axisAndMemberOrderDict
-            if len(giveMemGetPositionDictAxis) > 0:
-                if self.cube.isStatementOfEquity:
-                    giveMemGetPositionDictAxis = self.cube.rearrangeGiveMemGetPositionDict(concept.qname,giveMemGetPositionDictAxis)
-                self.cube.axisAndMemberOrderDict[concept.qname] = (giveMemGetPositionDictAxis, axisOrder)
-            else:
-                # every member on this axis is filtered out, this kills the whole cube.
-                #message = ErrorMgr.getError('PRESENTATION_GROUP_CHILDLESS_AXIS_FILTERS_OUT_ALL_FACTS_WARNING').format(self.cube.shortName)
-                self.filing.controller.logWarn(("The presentation group ''{}'' contains an axis with no children, " \
-                                                "which effectively filters out every fact.").format(self.cube.shortName))
-                self.cube.noFactsOrAllFactsSuppressed = True
+                            self.cube.periodStartEndLabelDict[concept.qname].append(preferredLabel)
+                except AttributeError:
+                    pass
+                # see note earlier about len(visited) for an explanation
+                giveMemGetPositionDictPrimary[concept.qname].append((len(visited), preferredLabel))
+
+                # axes and members are abstract too, but nodeIsAnAxis and parentIsAnAxis are false, so we don't have to worry about them here.
+                if concept.isAbstract:
+                    self.cube.abstractDict[concept.qname] = len(visited)
+
+            # if it's false, then there is only one root and there's no possibility of ever needing to print a warning message.  otherwise, keep track of what's under
+            # each root node so that if nodes under multiple roots are being used, we can warn that the ordering between them might be unexpected.
+            if setOfConcepts != False and (nodeIsAnAxis or not parentIsAnAxis):
+                setOfConcepts.add(concept)
+
+            # units -- note that a member or element can be used for something else and still be used for unit ordering.
+            if node.mayBeUnitConcept:
+                self.unitOrdering += [(len(visited), concept.name)] # see note earlier about len(visited) for an explanation
+
+            # labels
+            self.buildLabel(concept, preferredLabel)
+
+            # sort children, we are doing this as we go.
+            node.childrenList = sorted(node.childrenList, key = lambda thing : thing.arelleRelationship.order)
+
+            if nodeIsAnAxis:
+                # once all of the axes children are visited we have their ordering, so we can add to axisAndMemberOrderDict
+                stack.append((None, giveMemGetPositionDictAxis, (concept, axisOrder)))
+            # reversed, so that the first child is visited first.
+            for childNode in reversed(node.childrenList):
+                if parentIsAnAxis:
+                    stack.append((childNode, giveMemGetPositionDictAxis, parentIsAnAxis))
+                else:
+                    stack.append((childNode, {}, parentIsAnAxis))
+
+
+    def finishAxisOfPreorderTraversal(self, giveMemGetPositionDictAxis, concept, axisOrder):
+        if len(giveMemGetPositionDictAxis) > 0:
+            if self.cube.isStatementOfEquity:
+                giveMemGetPositionDictAxis = self.cube.rearrangeGiveMemGetPositionDict(concept.qname,giveMemGetPositionDictAxis)
+            self.cube.axisAndMemberOrderDict[concept.qname] = (giveMemGetPositionDictAxis, axisOrder)
+        else:
+            # every member on this axis is filtered out, this kills the whole cube.
+            #message = ErrorMgr.getError('PRESENTATION_GROUP_CHILDLESS_AXIS_FILTERS_OUT_ALL_FACTS_WARNING').format(self.cube.shortName)
+            self.filing.controller.logWarn(("The presentation group ''{}'' contains an axis with no children, " \
+                                            "which effectively filters out every fact.").format(self.cube.shortName))
+            self.cube.noFactsOrAllFactsSuppressed = True
 
 
 
@@ -273,7 +312,7 @@ class PresentationGroup(object):
 
     def buildLabel(self, concept, preferredLabel = None):
         # if preferredLabel is None, it outputs the standard labelStr
-        labelStr = concept.label(preferredLabel=preferredLabel, fallbackToQname=False)
+        labelStr = self.filing.conceptLabel(concept, preferredLabel=preferredLabel, fallbackToQname=False)
         if labelStr is None: # if no labelStr, labelStr function with fallbackToQname=False returns None
             # below, \g<1> will match to the char that matched ([a-z]) and similarly for \g<1>.
             labelStr = Utils.prettyPrintQname(concept.qname.localName)
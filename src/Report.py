@@ -9,14 +9,45 @@ are not subject to domestic copyright protection. 17 U.S.C. 105.
 
 import os, re, datetime, decimal
 from collections import defaultdict
-from lxml.etree import Element, SubElement, XSLT
+from lxml.etree import Element, SubElement, XSLT, xmlfile, tostring
 import arelle.XbrlConst
-import Utils, Filing, EdgarRenderer
+import Utils, Filing, EdgarRenderer, Htmlout
 
 substituteForEmptyEquityColumnHeading = ['Total']
 
 xlinkRole = '{' + arelle.XbrlConst.xlink + '}role' # constant belongs in XbrlConsts`headingList
 
+def transformAndWriteHtmlFile(controller, tree, baseNameBeforeExtension, fileName):
+    # this runs either in line or on an html writer pool thread, so it touches nothing but the tree and the file, and it
+    # returns its log messages for the caller to log in report order instead of logging them itself.
+    messageList = []
+    baseName = baseNameBeforeExtension + '.htm'
+    if controller.htmlReportEmitter == 'native':
+        messageList += [(controller.logDebug, "Starting native html emitter on {}.xml.".format(baseNameBeforeExtension))]
+        with open(fileName, 'wb') as f:
+            f.write(Htmlout.HtmlWriter(tree).htmlBytes())
+        messageList += [(controller.logDebug, "Finished native html emitter.")]
+        return messageList
+
+    messageList += [(controller.logDebug, "Starting XSLT transform on {}.xml.".format(baseNameBeforeExtension))]
+    result = Utils.getXslt(controller.reportXslt)(tree, asPage=XSLT.strparam('true'))
+    messageList += [(controller.logDebug, "Finished XSLT transform.")]
+    result.write(fileName,method='html',with_tail=False,pretty_print=True,encoding='us-ascii')
+
+    if controller.htmlReportEmitter == 'compare':
+        # golden comparison: the xslt output is what gets written, the native emitter is only checked against it.
+        xsltBytes = tostring(result, method='html', with_tail=False, pretty_print=True, encoding='us-ascii')
+        difference = Htmlout.firstDifference(xsltBytes, Htmlout.HtmlWriter(tree).htmlBytes())
+        if difference is None:
+            messageList += [(controller.logDebug, "Native html emitter matches XSLT on {}.".format(baseName))]
+        else:
+            lineNumber, xsltLine, nativeLine = difference
+            messageList += [(controller.logWarn, ("Native html emitter differs from XSLT on {} at line {}, xslt: {}, native: {}.").format(
+                             baseName, lineNumber, xsltLine.decode('us-ascii').strip(), nativeLine.decode('us-ascii').strip()))]
+    return messageList
+
+
+
 class Report(object):
     def __init__(self, filing, cube, embedding):
         self.filing = filing
@@ -41,6 +72,7 @@ class Report(object):
         self.rootETree = Element('InstanceReport', nsmap={'xsi' : 'http://www.w3.org/2001/XMLSchema-instance'})
         self.columnsETree = SubElement(self.rootETree, 'Columns') # children added later
         self.rowsETree = SubElement(self.rootETree, 'Rows') # children added later
+        self.isRFileStreamed = False # if set, there is no tree, writeHtmlAndOrXmlFiles() streams the R file, see streamXmlFile()
 
         self.shortName = self.cube.shortName # each Report can edit its own shortName
 
@@ -52,24 +84,62 @@ class Report(object):
         self.scalingFactorsQuantaSymbolTupleDict = {}
         self.repressPeriodHeadings = False
 
+        # the cell grid.  row.cellList holds a row's cells by column index, and every Row and Column also has a filledCellDict
+        # of only its non-empty cells, keyed by the Column or Row on the other side, so merges and emptiness checks only visit
+        # cells that exist.  cells must be placed with setCell() to keep these in step.  the visible rows and visible column
+        # indexes are cached, and only rebuilt after some isHidden flag has changed or the row or column list has grown.  code
+        # that replaces rowList or colList with a new list must bump hiddenMaskVersion too, since the new list can be as long.
+        self.hiddenMaskVersion = 0
+        self.visibleRowListCache = (None, None, [])
+        self.visibleColIndexListCache = (None, None, [])
+
+
+    def setCell(self, row, col, cell):
+        row.cellList[col.index] = cell
+        row.filledCellDict[col] = cell
+        col.filledCellDict[row] = cell
+        return cell
+
+    def visibleRowList(self):
+        hiddenMaskVersion, numRows, visibleRowList = self.visibleRowListCache
+        if hiddenMaskVersion != self.hiddenMaskVersion or numRows != len(self.rowList):
+            visibleRowList = [row for row in self.rowList if not row.isHidden]
+            self.visibleRowListCache = (self.hiddenMaskVersion, len(self.rowList), visibleRowList)
+        return visibleRowList
+
+    def visibleColIndexList(self):
+        hiddenMaskVersion, numColumns, visibleColIndexList = self.visibleColIndexListCache
+        if hiddenMaskVersion != self.hiddenMaskVersion or numColumns != len(self.colList):
+            visibleColIndexList = [i for i, col in enumerate(self.colList) if not col.isHidden]
+            self.visibleColIndexListCache = (self.hiddenMaskVersion, len(self.colList), visibleColIndexList)
+        return visibleColIndexList
 
     def generateCellVector(self, rowOrColStr, index):
-        cellVector = []
         if rowOrColStr == 'col':
-            for row in self.rowList:
-                if not row.isHidden:
-                    cellVector += [row.cellList[index]]
-            return (self.colList[index], cellVector)
+            return (self.colList[index], [row.cellList[index] for row in self.visibleRowList()])
         else:
             row = self.rowList[index]
-            for i, cell in enumerate(row.cellList):
-                if not self.colList[i].isHidden:
-                    cellVector += [cell]
-            return (row, cellVector)
+            cellList = row.cellList
+            return (row, [cellList[i] for i in self.visibleColIndexList()])
 
 
 
     def generateRowsOrCols(self, rowOrColStr, sortedFactAxisMemberGroupList):
+        # coordinates are the tuples of ints made by Embedding.assignCoordinateKeys().  every slot always holds the same axis,
+        # so the positions to keep for each of the partial coordinate tuples are worked out once here from the commands.
+        if rowOrColStr == 'row':
+            pseudoAxisNameList = [command.pseudoAxis for command in self.embedding.rowCommands]
+        else:
+            pseudoAxisNameList = [command.pseudoAxis for command in self.embedding.colCommands]
+        indexListWithoutPrimary = [i for i, pseudoAxisName in enumerate(pseudoAxisNameList) if pseudoAxisName != 'primary']
+        indexListWithoutUnit = [i for i, pseudoAxisName in enumerate(pseudoAxisNameList) if pseudoAxisName != 'unit']
+        indexListWithoutUnitPeriod = [i for i, pseudoAxisName in enumerate(pseudoAxisNameList) if pseudoAxisName not in {'unit', 'period'}]
+        indexListWithoutUnitPeriodPrimary = [i for i, pseudoAxisName in enumerate(pseudoAxisNameList) if pseudoAxisName not in {'unit', 'period', 'primary'}]
+        try:
+            periodIndex = pseudoAxisNameList.index('period')
+        except ValueError:
+            periodIndex = None
+
         previousRowOrCol = None
         for factAxisMemberGroup in sortedFactAxisMemberGroupList:
 
@@ -77,12 +147,6 @@ class Report(object):
             # in that case, coordinateListWithoutPrimary == coordinateList so coordinateList is right
             # if primary on rows then one primary Element per Row, so we want coordinateList again
             # because same primary elements have same coordinates.
-            coordinateList = []
-            coordinateListWithoutPrimary = []
-            coordinateListWithoutUnit = []
-            coordinateListWithoutUnitPeriod = []
-            coordinateListWithoutUnitPeriodPrimary = []
-            #groupedCoordinateList = []
             fact = factAxisMemberGroup.fact
             preferredLabel = factAxisMemberGroup.preferredLabel
             startEndContext = None
@@ -96,28 +160,18 @@ class Report(object):
 
             if rowOrColStr == 'row':
                 factAxisMemberList = factAxisMemberGroup.factAxisMemberRowList
+                coordinateList = factAxisMemberGroup.coordinateRowTuple
             else:
                 factAxisMemberList = factAxisMemberGroup.factAxisMemberColList
+                coordinateList = factAxisMemberGroup.coordinateColTuple
 
-            for factAxisMember in factAxisMemberList:
-                pseudoAxisName = factAxisMember.pseudoAxisName
-                axisMemberPositionTuple = factAxisMember.axisMemberPositionTuple
+            if periodIndex is not None:
+                startEndContext = factAxisMemberList[periodIndex].member
 
-                #if rowOrColStr == 'row' and pseudoAxisName in self.embedding.groupedAxisQnameSet:
-                #    groupedCoordinateList += [axisMemberPositionTuple]
-
-                if pseudoAxisName == 'period':
-                    startEndContext = factAxisMember.member
-
-                coordinateList += [axisMemberPositionTuple]
-                if pseudoAxisName != 'primary':
-                    coordinateListWithoutPrimary += [axisMemberPositionTuple]
-                if pseudoAxisName != 'unit':
-                    coordinateListWithoutUnit += [axisMemberPositionTuple]
-                    if pseudoAxisName != 'period':
-                        coordinateListWithoutUnitPeriod += [axisMemberPositionTuple]
-                        if pseudoAxisName != 'primary':
-                            coordinateListWithoutUnitPeriodPrimary += [axisMemberPositionTuple]
+            coordinateListWithoutPrimary = tuple([coordinateList[i] for i in indexListWithoutPrimary])
+            coordinateListWithoutUnit = tuple([coordinateList[i] for i in indexListWithoutUnit])
+            coordinateListWithoutUnitPeriod = tuple([coordinateList[i] for i in indexListWithoutUnitPeriod])
+            coordinateListWithoutUnitPeriodPrimary = tuple([coordinateList[i] for i in indexListWithoutUnitPeriodPrimary])
 
             # if isElements, every single fact should have it's own row and altogether, there should be exactly one column.
             # it looks like 3 columns, but really the style sheet makes those columns.
@@ -160,7 +214,7 @@ class Report(object):
                 for colNum in (self.factToColDefaultDict.get((fact, preferredLabel)) or []):
                     col = self.colList[colNum]
 
-                    previousRowOrCol.cellList[colNum] = Cell(self.filing, previousRowOrCol, col, colNum, fact=fact, preferredLabel=preferredLabel)
+                    self.setCell(previousRowOrCol, col, Cell(self.filing, previousRowOrCol, col, colNum, fact=fact, preferredLabel=preferredLabel))
                     if fact.unit is not None:
                         self.updateUnitTypeToFactSetDefaultDict(fact, col)
                 if fact.unit is not None:
@@ -386,50 +440,44 @@ class Report(object):
         else:
             unitsAxisOnRowsOrCols = self.embedding.columnUnitPosition != -1
 
-        tempRowOrColList = sorted(rowOrColList, key = lambda thing : thing.coordinateListWithoutUnitPeriod)
-        while len(tempRowOrColList) > 0:
-
-            previousCoordinateListWithoutPeriodAndUnit = tempRowOrColList[0].coordinateListWithoutUnitPeriod
-            instantRowOrColList = []
-            durationRowOrColList = []
-            while len(tempRowOrColList) > 0 and previousCoordinateListWithoutPeriodAndUnit == tempRowOrColList[0].coordinateListWithoutUnitPeriod:
-                rowOrCol = tempRowOrColList.pop(0)
-                if not rowOrCol.isHidden:
-                    if rowOrCol.startEndContext.periodTypeStr == 'instant':
-                        instantRowOrColList += [rowOrCol]
-                    else:
-                        durationRowOrColList += [rowOrCol]
-
-            instantRowOrColList.sort (key = lambda thing : thing.startEndContext.endTime)
-            durationRowOrColList.sort(key = lambda thing : thing.startEndContext.endTime)
-
-            while len(instantRowOrColList) > 0 and len(durationRowOrColList) > 0:
-                instantRowOrCol = instantRowOrColList[0]
-                durationRowOrCol = durationRowOrColList[0]
+        # rows or cols that differ only by unit and period are grouped together.  within a group, the first instant ending on a
+        # date is merged into each duration ending on that date, in order.  instants and durations ending on other dates never meet,
+        # and merging only changes the duration and hides the instant of one group, so one pass over the durations does it.
+        groupDict = {}
+        for rowOrCol in rowOrColList:
+            if not rowOrCol.isHidden:
+                try:
+                    instantOfEndTimeDict, durationRowOrColList = groupDict[rowOrCol.coordinateListWithoutUnitPeriod]
+                except KeyError:
+                    instantOfEndTimeDict, durationRowOrColList = groupDict[rowOrCol.coordinateListWithoutUnitPeriod] = ({}, [])
+                if rowOrCol.startEndContext.periodTypeStr == 'instant':
+                    instantOfEndTimeDict.setdefault(rowOrCol.startEndContext.endTime, rowOrCol)
+                else:
+                    durationRowOrColList += [rowOrCol]
 
-                # compare instants to durations.  if not equal, throw one away and try again, else continue
-                if   instantRowOrCol.startEndContext.endTime < durationRowOrCol.startEndContext.endTime:
-                    del instantRowOrColList[0]
-                elif instantRowOrCol.startEndContext.endTime > durationRowOrCol.startEndContext.endTime:
-                    del durationRowOrColList[0]
+        for instantOfEndTimeDict, durationRowOrColList in groupDict.values():
+            if len(instantOfEndTimeDict) == 0:
+                continue
 
-                else:
-                    # if we're doing the rows and units isn't on the rows (and vice versa), we don't check unit compatibility,
-                    # otherwise we need the units to be compatible.
-                    if not unitsAxisOnRowsOrCols or self.areFactsCompatableByUnits(instantRowOrCol, durationRowOrCol):
-                        # test to make sure both rows or cols don't overlap -- unless the overlap is the same
-                        flag = True
-                        instantRowOrColCellVector = self.generateCellVector(rowOrColStr, instantRowOrCol.index)[1]
-                        durationRowOrColCellVector = self.generateCellVector(rowOrColStr, durationRowOrCol.index)[1]
-                        for i in range(len(instantRowOrColCellVector)): # both vectors are the same length
-                            instantCell = instantRowOrColCellVector[i]
-                            durationCell = durationRowOrColCellVector[i]
-                            if instantCell is not None and durationCell is not None and instantCell.fact != durationCell.fact:
+            for durationRowOrCol in durationRowOrColList:
+                instantRowOrCol = instantOfEndTimeDict.get(durationRowOrCol.startEndContext.endTime)
+                if instantRowOrCol is None:
+                    continue
+
+                # if we're doing the rows and units isn't on the rows (and vice versa), we don't check unit compatibility,
+                # otherwise we need the units to be compatible.
+                if not unitsAxisOnRowsOrCols or self.areFactsCompatableByUnits(instantRowOrCol, durationRowOrCol):
+                    # test to make sure both rows or cols don't overlap -- unless the overlap is the same
+                    flag = True
+                    durationFilledCellDict = durationRowOrCol.filledCellDict
+                    for otherRowOrCol, instantCell in instantRowOrCol.filledCellDict.items():
+                        if not otherRowOrCol.isHidden:
+                            durationCell = durationFilledCellDict.get(otherRowOrCol)
+                            if durationCell is not None and instantCell.fact != durationCell.fact:
                                 flag = False
                                 break # vectors overlap, can't be combined
-                        if flag:
-                            self.deepCopyRowsOrCols(rowOrColStr, durationRowOrCol, instantRowOrCol)
-                    del durationRowOrColList[0]
+                    if flag:
+                        self.deepCopyRowsOrCols(rowOrColStr, durationRowOrCol, instantRowOrCol)
 
 
     def areFactsCompatableByUnits(self, colOrRowToBeMerged, colOrRowToBeMergedInto):
@@ -450,26 +498,22 @@ class Report(object):
 
 
     def deepCopyRowsOrCols(self, rowOrColStr, mergeIntoThisRowOrCol, mergeRowOrCol):
-        mergeIntoThisRowOrColCellVector = self.generateCellVector(rowOrColStr, mergeIntoThisRowOrCol.index)[1]
-        mergeRowOrColCellVector = self.generateCellVector(rowOrColStr, mergeRowOrCol.index)[1]
-
-        for i in range(len(mergeIntoThisRowOrColCellVector)):
-            mergeCell = mergeRowOrColCellVector[i]
+        # only the visible non-empty cells of mergeRowOrCol are copied, each into the cell on the same row (or column).
+        for otherRowOrCol, mergeCell in mergeRowOrCol.filledCellDict.items():
 
-            if mergeCell is not None: # do a deep copy
+            if not otherRowOrCol.isHidden: # do a deep copy
                 fact = mergeCell.fact
                 preferredLabel = mergeCell.preferredLabel
                 if fact.unit is not None: # update unitTypeToFactSetDefaultDict with new cell
                     self.updateUnitTypeToFactSetDefaultDict(fact, mergeIntoThisRowOrCol)
 
                 if rowOrColStr == 'col':
-                    row = self.rowList[i]
+                    row = otherRowOrCol
                     col = mergeIntoThisRowOrCol
-                    mergeIntoThisCell = row.cellList[col.index] = Cell(self.filing, row, col, col.index, fact=fact, preferredLabel=preferredLabel)
                 else:
                     row = mergeIntoThisRowOrCol
-                    col = self.colList[i]
-                    mergeIntoThisCell = row.cellList[i] = Cell(self.filing, row, col, i, fact=fact, preferredLabel=preferredLabel)
+                    col = otherRowOrCol
+                mergeIntoThisCell = self.setCell(row, col, Cell(self.filing, row, col, col.index, fact=fact, preferredLabel=preferredLabel))
 
                 mergeIntoThisCell.currencySymbol =      mergeCell.currencySymbol
                 mergeIntoThisCell.currencyCode =        mergeCell.currencyCode
@@ -479,16 +523,31 @@ class Report(object):
         mergeIntoThisRowOrCol.factList += mergeRowOrCol.factList
 
     def hideRedundantColumns(self):
+        # a column is hidden if all its facts are in a column that is still showing, the columns being visited in order.  rather
+        # than test col1 against every other column, each column is filed under one of its facts, since it can only be a subset
+        # of col1 if col1 has that fact.  so only the columns filed under col1's facts are tested.  a column with no facts is a
+        # subset of any column.
         factSets = {}
+        colsOfFirstFactDict = defaultdict(list)
+        colsWithNoFactsList = []
         for col in self.colList:
             if not col.isHidden:
-                factSets[col] = set(col.factList) # fact objects are unique and not copied.
-        for col1,facts1 in factSets.items():
+                facts = factSets[col] = set(col.factList) # fact objects are unique and not copied.
+                if len(col.factList) > 0:
+                    colsOfFirstFactDict[col.factList[0]].append(col)
+                else:
+                    colsWithNoFactsList.append(col)
+
+        for col1, facts1 in factSets.items():
             if not col1.isHidden:
-                for col2,facts2 in factSets.items():
-                    if not col1 is col2 and not col2.isHidden:
-                        if facts2.issubset(facts1):
-                            col2.isHidden = True
+                for fact in facts1:
+                    for col2 in colsOfFirstFactDict.get(fact, ()):
+                        if not col1 is col2 and not col2.isHidden:
+                            if factSets[col2].issubset(facts1):
+                                col2.isHidden = True
+                for col2 in colsWithNoFactsList:
+                    if not col1 is col2:
+                        col2.isHidden = True
 
     def updateUnitTypeToFactSetDefaultDict(self, fact, rowOrCol):
         if fact.concept.isMonetary:
@@ -610,8 +669,7 @@ class Report(object):
         for i, rowOrCol in enumerate(rowOrColList):
             if not rowOrCol.isHidden:
 
-                cellVector = self.generateCellVector(rowOrColStr, i)[1]
-                listOfFootnoteNumberSetsForNonEmptyCells = [cell.footnoteNumberSet for cell in cellVector if cell is not None]
+                listOfFootnoteNumberSetsForNonEmptyCells = [cell.footnoteNumberSet for otherRowOrCol, cell in rowOrCol.filledCellDict.items() if not otherRowOrCol.isHidden]
 
                 # intersection below can take many arguments, the * below spreads out the list into multiple arguments
                 try:
@@ -629,14 +687,13 @@ class Report(object):
 
     def writeFootnoteIndexerEtree(self, footnoteNumberSet, etreeNode):
         if len(footnoteNumberSet) > 0:
-            numberListForDisplayStr = ''
-            for number in sorted(footnoteNumberSet):
-                numberListForDisplayStr += '[{!s}],'.format(number)
-            numberListForDisplayStr = numberListForDisplayStr[:-1] # "[:-1]" cuts off trailing comma from string
-            SubElement(etreeNode, 'FootnoteIndexer').text = numberListForDisplayStr
+            SubElement(etreeNode, 'FootnoteIndexer').text = self.footnoteIndexerStr(footnoteNumberSet)
         else:
             SubElement(etreeNode, 'FootnoteIndexer') # the stylesheet needs this, even if empty?
 
+    def footnoteIndexerStr(self, footnoteNumberSet):
+        return ','.join('[{!s}]'.format(number) for number in sorted(footnoteNumberSet))
+
 
     def removeVerticalInteriorSymbols(self):
         for i, col in enumerate(self.colList):
@@ -666,17 +723,17 @@ class Report(object):
 
 
     def makeSegmentTitleRows(self):
-        counter = 0
+        # the new rowList is built in one pass, each segment title row going in just before the row it heads.
+        newRowList = []
         prevRow = None
         forbiddenAxisSet = {'primary', 'unit', 'period'}.union(self.promotedAxes)
 
-        while counter < len(self.rowList):
+        for row in self.rowList:
 
-            row = self.rowList[counter]
             if      (not row.isHidden and
                      (prevRow == None or row.coordinateListWithoutUnitPeriodPrimary != prevRow.coordinateListWithoutUnitPeriodPrimary)):
 
-                prevRow = self.rowList[counter]
+                prevRow = row
 
                 # build heading list
                 headingList = []
@@ -688,22 +745,24 @@ class Report(object):
                     else:
                         axisInSegmentTitleHeaderBoolList += [False]
 
-                # make new segment title row and insert into rowList
+                # make new segment title row and put it in newRowList
                 if headingList != []:
-                    headerRow = Row(self.filing, self, index=counter, isSegmentTitle=True)
+                    headerRow = Row(self.filing, self, isSegmentTitle=True)
                     if self.cube.isUnlabeled:
                         # this is because the heading column on the left gets killed if the cube is "unlabeled" so we have to move the heading over
                         # into the first cell.
-                        headerRow.cellList[0] = Cell(self.filing, headerRow, self.colList[0], 0, NonNumericText=self.filing.rowSeparatorStr.join(headingList))
+                        self.setCell(headerRow, self.colList[0], Cell(self.filing, headerRow, self.colList[0], 0, NonNumericText=self.filing.rowSeparatorStr.join(headingList)))
                     # you'd think we didn't need to add heading list for isUnlabeled, since we're pushing the heading into the cell too,
                     # but unless it's in both the R-file row "Label" field, and the cell, the style sheet will hide the first row of each report,
                     # which it shouldn't.  so, because it works, we do both.
                     headerRow.headingList = headingList
                     headerRow.axisInSegmentTitleHeaderBoolList = axisInSegmentTitleHeaderBoolList
-                    self.rowList.insert(counter, headerRow)
-                    counter += 1
+                    newRowList += [headerRow]
+
+            newRowList += [row]
 
-            counter += 1
+        self.rowList = newRowList
+        self.hiddenMaskVersion += 1 # a new list, see Report.__init__()
 
 
     def addAbstracts(self):
@@ -711,18 +770,17 @@ class Report(object):
         # we will compare with the other elements on the primary Axis.
         sortedListOfAbstractQnamePositionTuples = sorted(self.cube.abstractDict.items(), key = lambda thing: thing[1])
 
+        # the new rowList is built in one pass, each abstract row going in just before the first row under it.
+        newRowList = []
         sortedListOfAbstractFactsPosition = 0
-        counter = 0
-        while counter < len(self.rowList):
-
-            row = self.rowList[counter]
+        for row in self.rowList:
 
             if row.isHidden:
                 pass
             elif row.isSegmentTitle or row.IsCalendarTitle:
                 sortedListOfAbstractFactsPosition = 0
             else:
-                factPrimaryAxisPosition = row.coordinateList[self.embedding.rowPrimaryPosition][1]
+                factPrimaryAxisPosition = row.factAxisMemberGroup.factAxisMemberRowList[self.embedding.rowPrimaryPosition].axisMemberPositionTuple[1]
                 if      (sortedListOfAbstractFactsPosition < len(sortedListOfAbstractQnamePositionTuples) and
                          factPrimaryAxisPosition > sortedListOfAbstractQnamePositionTuples[sortedListOfAbstractFactsPosition][1]):
 
@@ -735,12 +793,14 @@ class Report(object):
                     # add a row
                     elementQname = sortedListOfAbstractQnamePositionTuples[sortedListOfAbstractFactsPosition][0]
                     if not( elementQname in self.filing.builtinLineItems):
-                        abstractRow = Row(self.filing, self, index=counter, IsAbstractGroupTitle=True, elementQname=elementQname)
+                        abstractRow = Row(self.filing, self, IsAbstractGroupTitle=True, elementQname=elementQname)
                         abstractRow.headingList = [self.cube.labelDict[elementQname]]
-                        self.rowList.insert(counter, abstractRow)
-                        counter += 1 # we add to the row counter twice, because we're adding a row
+                        newRowList += [abstractRow]
                     sortedListOfAbstractFactsPosition += 1
-            counter += 1
+            newRowList += [row]
+
+        self.rowList = newRowList
+        self.hiddenMaskVersion += 1 # a new list, see Report.__init__()
 
 
     def generateRowAndOrColHeadingsForElements(self):
@@ -914,7 +974,7 @@ class Report(object):
         mergeableRows = defaultdict(list)
         for row in self.rowList:
             if not row.isHidden and row.IsCalendarTitle:
-                coordinateListWithoutPeriod = tuple([row.elementQnameStr]+row.coordinateListWithoutUnitPeriodPrimary) # TODO - pretend unit can't appear on rows
+                coordinateListWithoutPeriod = (row.elementQnameStr,) + row.coordinateListWithoutUnitPeriodPrimary # TODO - pretend unit can't appear on rows
                 mergeableRows[coordinateListWithoutPeriod] += [row]        
         for rowList in mergeableRows.values():
             for index, thisRow in enumerate(rowList):
@@ -933,66 +993,76 @@ class Report(object):
     def emitRFile(self):
         # we emit the cols and rows first and then plug them into the header and footer later.
         # this is because there are side effects of the col and row processing that the header and footer depend on.
-        self.emitRFileCols()
-        self.emitRFileRows()
-        self.emitRFileHeaderAndFooter()
+        numberOfCols = self.emitRFileCols()
+        numberOfRows = self.emitRFileRows()
+        self.emitRFileHeader(self.rootETree)
+        self.rootETree.append(self.columnsETree)
+        self.rootETree.append(self.rowsETree)
+        self.emitRFileFooter(self.rootETree, numberOfCols, numberOfRows)
 
     def emitRFileCols(self):
+        numberOfCols = 0
         for index, col in enumerate(self.colList):
             if not col.isHidden:
                 col.emitColumn(index)
+                numberOfCols += 1
+        return numberOfCols
 
     def emitRFileRows(self):
+        numberOfRows = 0
         for index, row in enumerate(self.rowList):
             if not row.isHidden:
                 row.emitRow(index)
+                numberOfRows += 1
+        return numberOfRows
 
-    def emitRFileHeaderAndFooter(self):
-        SubElement(self.rootETree, 'Version').text = EdgarRenderer.VERSION
-        SubElement(self.rootETree, 'ReportLongName').text = self.cube.definitionText
-        SubElement(self.rootETree, 'DisplayLabelColumn').text = str(not self.cube.isUnlabeled).casefold()
+    def emitRFileHeader(self, parentETree):
+        SubElement(parentETree, 'Version').text = EdgarRenderer.VERSION
+        SubElement(parentETree, 'ReportLongName').text = self.cube.definitionText
+        SubElement(parentETree, 'DisplayLabelColumn').text = str(not self.cube.isUnlabeled).casefold()
 
-        SubElement(self.rootETree, 'ShowElementNames').text = str(self.cube.isElements).casefold()
+        SubElement(parentETree, 'ShowElementNames').text = str(self.cube.isElements).casefold()
         
         if self.RoundingOption is None:
-            SubElement(self.rootETree, 'RoundingOption')
+            SubElement(parentETree, 'RoundingOption')
         else:
-            SubElement(self.rootETree, 'RoundingOption').text = self.RoundingOption
+            SubElement(parentETree, 'RoundingOption').text = self.RoundingOption
 
-        SubElement(self.rootETree, 'HasEmbeddedReports').text = str(self.hasEmbeddedReports).casefold()
+        SubElement(parentETree, 'HasEmbeddedReports').text = str(self.hasEmbeddedReports).casefold()
 
-        self.rootETree.append(self.columnsETree)
-        self.rootETree.append(self.rowsETree)
-
-        footnotes = SubElement(self.rootETree, 'Footnotes')
+    def emitRFileFooter(self, parentETree, numberOfCols, numberOfRows):
+        footnotes = SubElement(parentETree, 'Footnotes')
         for i, footnoteText in enumerate(self.footnoteTextList):
             footnote = SubElement(footnotes, 'Footnote')
             SubElement(footnote, 'NoteId').text = str(i + 1) # +1 because it starts at 1 not zero
             SubElement(footnote, 'Note').text = footnoteText
-        SubElement(self.rootETree, 'IsEquityReport').text = 'false'
+        SubElement(parentETree, 'IsEquityReport').text = 'false'
 
-        ReportName = self.shortName 
-        if self.filing.verboseHeadingsForDebugging:
-            ReportName += ' ---- {}'.format(self.cube.linkroleUri)
-        SubElement(self.rootETree, 'ReportName').text = ReportName
+        SubElement(parentETree, 'ReportName').text = self.reportName()
+
+        SubElement(parentETree, 'MonetaryRoundingLevel').text = 'UnKnown'
+        SubElement(parentETree, 'SharesRoundingLevel').text = 'UnKnown'
+        SubElement(parentETree, 'PerShareRoundingLevel').text = 'UnKnown'
+        SubElement(parentETree, 'ExchangeRateRoundingLevel').text = 'UnKnown'
+        SubElement(parentETree, 'HasCustomUnits').text = 'true'
+        SubElement(parentETree, 'IsEmbedReport').text = 'false'
+        SubElement(parentETree, 'IsMultiCurrency').text = 'false'
+        SubElement(parentETree, 'ReportType').text = 'Sheet'
+        SubElement(parentETree, 'RoleURI').text = self.cube.linkroleUri
+        SubElement(parentETree, 'NumberOfCols').text = str(numberOfCols)
+        SubElement(parentETree, 'NumberOfRows').text = str(numberOfRows)
 
-        SubElement(self.rootETree, 'MonetaryRoundingLevel').text = 'UnKnown'
-        SubElement(self.rootETree, 'SharesRoundingLevel').text = 'UnKnown'
-        SubElement(self.rootETree, 'PerShareRoundingLevel').text = 'UnKnown'
-        SubElement(self.rootETree, 'ExchangeRateRoundingLevel').text = 'UnKnown'
-        SubElement(self.rootETree, 'HasCustomUnits').text = 'true'
-        SubElement(self.rootETree, 'IsEmbedReport').text = 'false'
-        SubElement(self.rootETree, 'IsMultiCurrency').text = 'false'
-        SubElement(self.rootETree, 'ReportType').text = 'Sheet'
-        SubElement(self.rootETree, 'RoleURI').text = self.cube.linkroleUri
-        SubElement(self.rootETree, 'NumberOfCols').text = str(int(self.rootETree.xpath('count(/InstanceReport/Columns/Column)')))
-        SubElement(self.rootETree, 'NumberOfRows').text = str(int(self.rootETree.xpath('count(/InstanceReport/Rows/Row)')))
 
 
 
 
 
 
+    def reportName(self):
+        ReportName = self.shortName 
+        if self.filing.verboseHeadingsForDebugging:
+            ReportName += ' ---- {}'.format(self.cube.linkroleUri)
+        return ReportName
 
     def emitContextRef(self, mcuETree, factAxisMemberList, context):
         contextRefETree = SubElement(mcuETree, 'contextRef')
@@ -1007,7 +1077,7 @@ class Report(object):
                 SubElement(contextRefETree, 'PeriodStartDate').text = startEndContext.startTimePretty
             SubElement(contextRefETree, 'PeriodEndDate').text = startEndContext.endTimePretty
 
-        realAxisList = [factAxisMember for factAxisMember in factAxisMemberList if factAxisMember.pseudoAxisName not in {'primary', 'period', 'unit'}]
+        realAxisList = self.realAxisMemberList(factAxisMemberList)
         if len(realAxisList) > 0:
             segmentsETree = SubElement(contextRefETree, 'Segments')
         for factAxisMember in realAxisList:
@@ -1025,6 +1095,9 @@ class Report(object):
             SubElement(DimensionInfoETree, 'dimensionId').text = str(factAxisMember.pseudoAxisName)
             SubElement(DimensionInfoETree, 'type').text = 'explicitMember'
 
+    def realAxisMemberList(self, factAxisMemberList):
+        return [factAxisMember for factAxisMember in factAxisMemberList if factAxisMember.pseudoAxisName not in {'primary', 'period', 'unit'}]
+
     def emitUPS(self, mcuETree, unit):
         if len(unit.measures[0]) > 0:
             upsETree = SubElement(mcuETree, 'UPS')
@@ -1067,6 +1140,10 @@ class Report(object):
 
     def writeHtmlAndOrXmlFiles(self, reportSummary):
         baseNameBeforeExtension = self.filing.fileNamePrefix + str(self.cube.fileNumber)
+        if self.isRFileStreamed:
+            if self.filing.reportXmlFormat: self.streamXmlFile(baseNameBeforeExtension, reportSummary)
+            if self.filing.reportHtmlFormat: self.writeHtmlFile(baseNameBeforeExtension, None, reportSummary)
+            return
         tree = self.rootETree.getroottree()
         if self.filing.reportXmlFormat: self.writeXmlFile(baseNameBeforeExtension, tree, reportSummary)
         if self.filing.reportHtmlFormat: self.writeHtmlFile(baseNameBeforeExtension, tree, reportSummary)
@@ -1079,15 +1156,65 @@ class Report(object):
         tree.write(fileName, xml_declaration=True, encoding='utf-8', pretty_print=True)
 
 
+    def streamXmlFile(self, baseNameBeforeExtension, reportSummary):
+        # this does emitRFile() and writeXmlFile() in one go, for when nothing needs the R file as a tree, see Filing.canStreamRFile().
+        # each Column and Row is built under an empty Columns or Rows element, written out and dropped, so only one of them
+        # is ever held as xml at a time, not the whole report with all its text blocks.
+        baseName = baseNameBeforeExtension + '.xml'
+        reportSummary.xmlFileName = baseName
+
+        fileName = os.path.join(self.filing.fileNameBase, baseName)
+        with xmlfile(fileName, encoding='utf-8') as xf:
+            xf.write_declaration()
+            with xf.element('InstanceReport', nsmap={'xsi' : 'http://www.w3.org/2001/XMLSchema-instance'}):
+                headerETree = Element('InstanceReport')
+                self.emitRFileHeader(headerETree)
+                for childETree in headerETree:
+                    xf.write(childETree, pretty_print=True)
+
+                numberOfCols = 0
+                with xf.element('Columns'):
+                    for index, col in enumerate(self.colList):
+                        if not col.isHidden:
+                            self.columnsETree = Element('Columns')
+                            col.emitColumn(index)
+                            xf.write(self.columnsETree[0], pretty_print=True)
+                            numberOfCols += 1
+
+                numberOfRows = 0
+                with xf.element('Rows'):
+                    for index, row in enumerate(self.rowList):
+                        if not row.isHidden:
+                            self.rowsETree = Element('Rows')
+                            row.emitRow(index)
+                            xf.write(self.rowsETree[0], pretty_print=True)
+                            numberOfRows += 1
+
+                footerETree = Element('InstanceReport')
+                self.emitRFileFooter(footerETree, numberOfCols, numberOfRows)
+                for childETree in footerETree:
+                    xf.write(childETree, pretty_print=True)
+        self.columnsETree = self.rowsETree = None
+
+
     def writeHtmlFile(self, baseNameBeforeExtension, tree, reportSummary):
         baseName = baseNameBeforeExtension + '.htm'
         reportSummary.htmlFileName = baseName     
 
-        self.controller.logDebug("Starting XSLT transform on {}.xml.".format(baseNameBeforeExtension))
         fileName = os.path.join(self.filing.fileNameBase, baseName)
-        result = self.filing.transform(tree, asPage=XSLT.strparam('true'))
-        self.controller.logDebug("Finished XSLT transform.")
-        result.write(fileName,method='html',with_tail=False,pretty_print=True,encoding='us-ascii')
+        if tree is None:
+            # there is no tree, see Filing.canStreamRFile(), so the native emitter reads this report's rows and columns.  that
+            # has to happen here and not on a pool thread, since they are garbage collected as soon as the report is written.
+            self.controller.logDebug("Starting native html emitter on {}.".format(baseName))
+            with open(fileName, 'wb') as f:
+                f.write(Htmlout.HtmlWriter(Htmlout.reportView(self, EdgarRenderer.VERSION)).htmlBytes())
+            self.controller.logDebug("Finished native html emitter.")
+        elif self.filing.htmlWriterPool is not None:
+            # the tree is finished, so a pool thread can transform and write it while we lay out the next report.
+            self.filing.htmlWriterPool.submit(transformAndWriteHtmlFile, self.controller, tree, baseNameBeforeExtension, fileName)
+        else:
+            for logFunction, message in transformAndWriteHtmlFile(self.controller, tree, baseNameBeforeExtension, fileName):
+                logFunction(message)
 
 
     def generateBarChart(self):
@@ -1200,13 +1327,15 @@ class Row(object):
     #              isSegmentTitle=False, IsCalendarTitle=False, IsAbstractGroupTitle=False, elementQname=None, level=0):
     #===========================================================================
     def __init__(self, filing, report, startEndContext=None, index=None, factAxisMemberGroup=None,
-                 coordinateList=[], coordinateListWithoutPrimary=[], coordinateListWithoutUnit=[],
-                 coordinateListWithoutUnitPeriod=[], coordinateListWithoutUnitPeriodPrimary=[],
+                 coordinateList=(), coordinateListWithoutPrimary=(), coordinateListWithoutUnit=(),
+                 coordinateListWithoutUnitPeriod=(), coordinateListWithoutUnitPeriodPrimary=(),
                  isSegmentTitle=False, IsCalendarTitle=False, IsAbstractGroupTitle=False, elementQname=None, level=0):
         self.filing = filing
         self.report = report
         if index is None:
             self.index = report.numRows
+        else:
+            self.index = index
         self.report.numRows += 1
         self.factAxisMemberGroup = factAxisMemberGroup
         self.coordinateList = coordinateList
@@ -1225,6 +1354,7 @@ class Row(object):
         self.factList = []
         self.level = level
         self.cellList = [None for ignore in range(report.numColumns)]
+        self.filledCellDict = {} # Column to Cell, see Report.setCell()
         self.footnoteNumberSet = set()
         self.originalElementQname = elementQname
 
@@ -1237,7 +1367,7 @@ class Row(object):
         self.preferredLabel = None
         if not (isSegmentTitle or IsAbstractGroupTitle or report.embedding.rowPrimaryPosition == -1 or factAxisMemberGroup.preferredLabel is None):
             self.preferredLabel = factAxisMemberGroup.preferredLabel.rpartition('/')[2]
-        self.isHidden = False
+        self._isHidden = False
         self.startEndContext = startEndContext
 
         self.context = None
@@ -1251,6 +1381,17 @@ class Row(object):
         self.unitTypeToFactSetDefaultDict = defaultdict(set)
 
 
+    @property
+    def isHidden(self):
+        return self._isHidden
+
+    @isHidden.setter
+    def isHidden(self, isHidden):
+        if isHidden != self._isHidden:
+            self._isHidden = isHidden
+            self.report.hiddenMaskVersion += 1 # the report's cached visible rows are now stale
+
+
     def emitRow(self, index):
         rowETree = SubElement(self.report.rowsETree, 'Row', FlagID='0')
         self.emitRowHeader(rowETree, index)
@@ -1304,21 +1445,44 @@ class Row(object):
         SubElement(rowETree, 'LabelSeparator').text = ' '
         SubElement(rowETree, 'Level').text = str(self.level)
 
-        elementPrefix = ''
-        if self.elementQnameStr is not None and self.report.embedding.rowPrimaryPosition != -1:
-            SubElement(rowETree, 'ElementName').text = self.elementQnameStr
-            elementPrefix = self.elementQnameStr[:(self.elementQnameStr.find('_')+1)]
-            SubElement(rowETree, 'ElementPrefix').text = elementPrefix
-        elif len(self.factList) > 0         and self.report.embedding.rowPrimaryPosition != -1:
-            elementQname = str(self.factList[0].qname).replace(':', '_')
-            SubElement(rowETree, 'ElementName').text = elementQname
-            elementPrefix = elementQname[:(elementQname.find('_')+1)]
+        elementName, elementPrefix = self.elementNameAndPrefix()
+        if elementName is not None:
+            SubElement(rowETree, 'ElementName').text = elementName
             SubElement(rowETree, 'ElementPrefix').text = elementPrefix
         else:
             SubElement(rowETree, 'ElementName')
             SubElement(rowETree, 'ElementPrefix')
         SubElement(rowETree, 'IsBaseElement').text = str('us-gaap' in elementPrefix.casefold()).casefold()
 
+        balance, periodType = self.balanceAndPeriodType()
+        SubElement(rowETree, 'BalanceType').text = balance
+        SubElement(rowETree, 'PeriodType').text = periodType
+        SubElement(rowETree, 'IsReportTitle').text = 'false'
+        SubElement(rowETree, 'IsSegmentTitle').text = str(self.isSegmentTitle).casefold()
+        SubElement(rowETree, 'IsCalendarTitle').text = str(self.IsCalendarTitle).casefold()
+        SubElement(rowETree, 'IsEquityPrevioslyReportedAsRow').text = 'false'
+        SubElement(rowETree, 'IsEquityAdjustmentRow').text = 'false'
+        SubElement(rowETree, 'IsBeginningBalance').text = str(self.isBeginningBalance()).casefold()        
+        SubElement(rowETree, 'IsEndingBalance').text = str(self.isEndingBalance()).casefold()
+
+        self.setTotalLabelAndReverseSign()
+        SubElement(rowETree, 'IsReverseSign').text = str(self.IsReverseSign).casefold()
+        if self.preferredLabel is not None:
+            SubElement(rowETree, 'PreferredLabelRole').text = self.preferredLabel
+
+        self.report.writeFootnoteIndexerEtree(self.footnoteNumberSet, rowETree)
+
+    def elementNameAndPrefix(self):
+        # the element name is None if the row doesn't show an element, and then its prefix is ''.
+        if self.elementQnameStr is not None and self.report.embedding.rowPrimaryPosition != -1:
+            elementName = self.elementQnameStr
+        elif len(self.factList) > 0         and self.report.embedding.rowPrimaryPosition != -1:
+            elementName = str(self.factList[0].qname).replace(':', '_')
+        else:
+            return (None, '')
+        return (elementName, elementName[:(elementName.find('_')+1)])
+
+    def balanceAndPeriodType(self):
         concept = None
         balance = 'na'
         periodType = 'duration'
@@ -1329,17 +1493,9 @@ class Row(object):
                 periodType = concept.periodType
                 if concept.balance is not None:
                     balance = concept.balance
+        return (balance, periodType)
 
-        SubElement(rowETree, 'BalanceType').text = balance
-        SubElement(rowETree, 'PeriodType').text = periodType
-        SubElement(rowETree, 'IsReportTitle').text = 'false'
-        SubElement(rowETree, 'IsSegmentTitle').text = str(self.isSegmentTitle).casefold()
-        SubElement(rowETree, 'IsCalendarTitle').text = str(self.IsCalendarTitle).casefold()
-        SubElement(rowETree, 'IsEquityPrevioslyReportedAsRow').text = 'false'
-        SubElement(rowETree, 'IsEquityAdjustmentRow').text = 'false'
-        SubElement(rowETree, 'IsBeginningBalance').text = str(self.isBeginningBalance()).casefold()        
-        SubElement(rowETree, 'IsEndingBalance').text = str(self.isEndingBalance()).casefold()
-
+    def setTotalLabelAndReverseSign(self):
         if self.preferredLabel == 'totalLabel':
             self.IsTotalLabel = True
         elif self.preferredLabel == 'negatedTotal':
@@ -1349,12 +1505,6 @@ class Row(object):
         if self.preferredLabel is not None and re.compile('negated').match(self.preferredLabel):
             self.IsReverseSign = True
 
-        SubElement(rowETree, 'IsReverseSign').text = str(self.IsReverseSign).casefold()
-        if self.preferredLabel is not None:
-            SubElement(rowETree, 'PreferredLabelRole').text = self.preferredLabel
-
-        self.report.writeFootnoteIndexerEtree(self.footnoteNumberSet, rowETree)
-
     def isBeginningBalance(self):
         # TODO: Accomodate cases where startLabel is in not-fully-formed rollforward.
         return (self.preferredLabel is not None and 'periodStart' in self.preferredLabel)
@@ -1368,41 +1518,7 @@ class Row(object):
 
 
     def emitRowFooter(self, rowETree):
-        theRealQname = self.originalElementQname
-        typeQname = ''
-        simpleDataType = 'na'
-        doclabel = 'No definition available.'
-        referencesText = 'No definition available.' # Compatibility with RE2
-        if theRealQname is not None:
-            concept = self.filing.modelXbrl.qnameConcepts[theRealQname]
-            if concept is not None:
-                typeQname = str(concept.typeQname)
-                simpleDataType = self.simpleDataType(concept)
-                thedoclabel = concept.label(preferredLabel=arelle.XbrlConst.documentationLabel, fallbackToQname=False,lang='en-US',linkrole=arelle.XbrlConst.defaultLinkRole)
-                if thedoclabel is not None:
-                    doclabel = thedoclabel
-                references = []
-                relationshipList = concept.modelXbrl.relationshipSet(arelle.XbrlConst.conceptReference).fromModelObject(concept)
-                def arbitrarykey(x):
-                    return x.sourceline
-                relationshipList.sort(key=arbitrarykey)
-                for refrel in relationshipList:
-                    ref = refrel.toModelObject
-                    if ref is not None:
-                        try:                     
-                            references += [(ref.attrib[xlinkRole],ref)]
-                        except KeyError:
-                            pass
-                if len(references)>0:
-                    referencesText = ''
-                    for (i,(role,ref)) in enumerate(references):
-                        referencesText += 'Reference '+str(i+1)+': '+role+'\n\n\n\n'
-                        for e in ref.iter():
-                            if e.text is not None:
-                                text = e.text.strip()                                
-                                if len(text)>0:
-                                    referencesText += ' -'+e.localName+' '+text+'\n\n\n\n'
-
+        typeQname, simpleDataType, doclabel, referencesText = self.conceptFooterStrings()
         SubElement(rowETree, 'ElementDataType').text = typeQname
         SubElement(rowETree, 'SimpleDataType').text = simpleDataType
         SubElement(rowETree, 'ElementDefenition').text = doclabel
@@ -1412,20 +1528,16 @@ class Row(object):
         SubElement(rowETree, 'Label').text = self.filing.rowSeparatorStr.join(self.headingList)
 
         if self.factAxisMemberGroup is not None: # could be an abstract row or something like that
-            otherAxisOnRows = any(fam.pseudoAxisName not in {'period', 'unit', 'primary'} for fam in self.factAxisMemberGroup.factAxisMemberRowList)
-    
-            SubElement(rowETree, 'hasSegments').text = str(otherAxisOnRows).casefold()
+            SubElement(rowETree, 'hasSegments').text = str(self.hasOtherAxis()).casefold()
             SubElement(rowETree, 'hasScenarios').text = 'false'
         
             # BEGIN MCU
             mcuETree = SubElement(rowETree, 'MCU')
             #SubElement(mcuETree, 'KeyName')
 
-            if self.context is not None:
-                if self.report.embedding.rowPeriodPosition != -1:
-                    self.report.emitContextRef(mcuETree, self.factAxisMemberGroup.factAxisMemberRowList, self.context)
-                elif otherAxisOnRows:
-                    self.report.emitContextRef(mcuETree, self.factAxisMemberGroup.factAxisMemberRowList, None)
+            contextRefArgs = self.contextRefArgs()
+            if contextRefArgs is not None:
+                self.report.emitContextRef(mcuETree, *contextRefArgs)
     
             if self.report.embedding.rowPrimaryPosition != -1 and self.factAxisMemberGroup.fact.unit is not None:
                 # the primary pseudoaxis is on the rows, so show the units for that fact
@@ -1433,6 +1545,66 @@ class Row(object):
             # END MCU
 
 
+    def conceptFooterStrings(self):
+        theRealQname = self.originalElementQname
+        concept = None
+        if theRealQname is not None:
+            concept = self.filing.modelXbrl.qnameConcepts[theRealQname]
+        # a concept shows up in many reports, but its definition and references are the same in every one of them.
+        try:
+            return self.filing.rowFooterDict[concept]
+        except KeyError:
+            footerStrings = self.filing.rowFooterDict[concept] = self.rowFooterStrings(concept)
+            return footerStrings
+
+    def hasOtherAxis(self):
+        return any(fam.pseudoAxisName not in {'period', 'unit', 'primary'} for fam in self.factAxisMemberGroup.factAxisMemberRowList)
+
+    def contextRefArgs(self):
+        # the fact axis members and context for the row's contextRef, or None if the row has none.
+        if self.factAxisMemberGroup is None or self.context is None:
+            return None
+        if self.report.embedding.rowPeriodPosition != -1:
+            return (self.factAxisMemberGroup.factAxisMemberRowList, self.context)
+        elif self.hasOtherAxis():
+            return (self.factAxisMemberGroup.factAxisMemberRowList, None)
+        return None
+
+    def rowFooterStrings(self, concept):
+        typeQname = ''
+        simpleDataType = 'na'
+        doclabel = 'No definition available.'
+        referencesText = 'No definition available.' # Compatibility with RE2
+        if concept is not None:
+            typeQname = str(concept.typeQname)
+            simpleDataType = self.simpleDataType(concept)
+            thedoclabel = self.filing.conceptLabel(concept, preferredLabel=arelle.XbrlConst.documentationLabel, fallbackToQname=False,lang='en-US',linkrole=arelle.XbrlConst.defaultLinkRole)
+            if thedoclabel is not None:
+                doclabel = thedoclabel
+            references = []
+            relationshipList = concept.modelXbrl.relationshipSet(arelle.XbrlConst.conceptReference).fromModelObject(concept)
+            def arbitrarykey(x):
+                return x.sourceline
+            relationshipList.sort(key=arbitrarykey)
+            for refrel in relationshipList:
+                ref = refrel.toModelObject
+                if ref is not None:
+                    try:                     
+                        references += [(ref.attrib[xlinkRole],ref)]
+                    except KeyError:
+                        pass
+            if len(references)>0:
+                referencesTextList = []
+                for (i,(role,ref)) in enumerate(references):
+                    referencesTextList += ['Reference '+str(i+1)+': '+role+'\n\n\n\n']
+                    for e in ref.iter():
+                        if e.text is not None:
+                            text = e.text.strip()                                
+                            if len(text)>0:
+                                referencesTextList += [' -'+e.localName+' '+text+'\n\n\n\n']
+                referencesText = ''.join(referencesTextList)
+        return (typeQname, simpleDataType, doclabel, referencesText)
+
     def simpleDataType(self,concept): # Try to be compatible with RE2 limited notion of data type
         t = concept.baseXsdType.casefold()
         if t in ['boolean','token']:
@@ -1462,7 +1634,8 @@ class Column(object):
         self.coordinateListWithoutUnit = coordinateListWithoutUnit
         self.coordinateListWithoutUnitPeriod = coordinateListWithoutUnitPeriod
         self.footnoteNumberSet = set()
-        self.isHidden = False
+        self._isHidden = False
+        self.filledCellDict = {} # Row to Cell, see Report.setCell()
         self.headingList = []
         self.factList = []
         self.elementQnameMemberForColHidingSet = set()
@@ -1479,12 +1652,21 @@ class Column(object):
             self.preferredLabel = None
 
 
-    def emitColumn(self, index):
-        # this first clause of the if is because for the case of isUnlabeled, we have to move the value of the segment title row
-        # into the first cell, in which case there is a cell with no fact, which will cause an attribute error.
-        firstColOfAnUnlabeledCube = self.report.cube.isUnlabeled and index == 0
+    @property
+    def isHidden(self):
+        return self._isHidden
 
-        colVector = self.report.generateCellVector('col', index)[1]
+    @isHidden.setter
+    def isHidden(self, isHidden):
+        if isHidden != self._isHidden:
+            self._isHidden = isHidden
+            self.report.hiddenMaskVersion += 1 # the report's cached visible column indexes are now stale
+
+
+    def emitColumn(self, index):
+        # index is reused for the labels below, so anything that needs the column's position is worked out first.
+        contextRefArgs = self.contextRefArgs(index)
+        currencySymbol = self.currencySymbol(index)
 
         columnETree = SubElement(self.report.columnsETree, 'Column', FlagID='0')
         SubElement(columnETree, 'Id').text = str(index+1)
@@ -1498,28 +1680,43 @@ class Column(object):
             #SubElement(labelsETree, 'Label', Key='', Id=str(index), Label=str(header))
             SubElement(labelsETree, 'Label', Id=str(index), Label=str(header))
 
-        otherAxisOnCols = any(fam.pseudoAxisName not in {'period', 'unit', 'primary'} for fam in self.factAxisMemberGroup.factAxisMemberColList)
-        SubElement(columnETree, 'hasSegments').text = str(otherAxisOnCols).casefold()
+        SubElement(columnETree, 'hasSegments').text = str(self.hasOtherAxis()).casefold()
         SubElement(columnETree, 'hasScenarios').text = 'false'
 
         mcuETree = SubElement(columnETree, 'MCU')
 
-        if self.context is not None and not firstColOfAnUnlabeledCube:
-            if self.report.embedding.columnPeriodPosition != -1:
-                self.report.emitContextRef(mcuETree, self.factAxisMemberGroup.factAxisMemberColList, self.context)
-            elif otherAxisOnCols:
-                self.report.emitContextRef(mcuETree, self.factAxisMemberGroup.factAxisMemberColList, None)
+        if contextRefArgs is not None:
+            self.report.emitContextRef(mcuETree, *contextRefArgs)
 
         if self.report.embedding.columnPrimaryPosition != -1 and self.factAxisMemberGroup.fact.unit is not None:
             # the primary pseudoaxis is on the cols, so show the units for that fact
             self.report.emitUPS(mcuETree, self.factAxisMemberGroup.fact.unit)
 
+        if currencySymbol is not None:
+            SubElement(columnETree, 'CurrencySymbol').text = currencySymbol
+
+    def hasOtherAxis(self):
+        return any(fam.pseudoAxisName not in {'period', 'unit', 'primary'} for fam in self.factAxisMemberGroup.factAxisMemberColList)
+
+    def contextRefArgs(self, index):
+        # the fact axis members and context for the column's contextRef, or None if the column has none.  for the case of
+        # isUnlabeled, we have to move the value of the segment title row into the first cell, in which case there is a cell
+        # with no fact, so the first column of an unlabeled cube has none.
+        if self.context is None or (self.report.cube.isUnlabeled and index == 0):
+            return None
+        if self.report.embedding.columnPeriodPosition != -1:
+            return (self.factAxisMemberGroup.factAxisMemberColList, self.context)
+        elif self.hasOtherAxis():
+            return (self.factAxisMemberGroup.factAxisMemberColList, None)
+        return None
+
+    def currencySymbol(self, index):
         if self.report.embedding.columnUnitPosition != -1:
             # by design, there can only be one currency per column, if the unit axis is on the columns.
-            for cell in colVector:
+            for cell in self.report.generateCellVector('col', index)[1]:
                 if cell is not None and cell.showCurrencySymbol:
-                    SubElement(columnETree, 'CurrencySymbol').text = cell.currencySymbol
-                    break
+                    return cell.currencySymbol
+        return None
                 
 
 
@@ -1573,23 +1770,10 @@ class Cell(object):
 
 
         #########################################
-        IsNumeric = fact.isNumeric
-        IsRatio = False
-        NumericAmount = ''
-        valueStr = self.handleFactValue()
-        if IsNumeric:
-            IsRatio = Utils.isRate(fact, self.filing) # Rename to DisplayAsPercent
-            NumericAmount = valueStr
-        else:
-            self.NonNumericText = valueStr
+        IsNumeric, IsRatio, DisplayZeroAsNone, numericAmount, roundedNumericAmount = self.displayValues()
         SubElement(cellETree, 'IsNumeric').text = str(IsNumeric).casefold()
         SubElement(cellETree, 'IsRatio').text = str(IsRatio).casefold()
-
-        dataTypeSet = {'NonNegativePure4Type', 'NonPositivePure4Type', 'pureItemType', 'NonNegativeMonetaryType', 'NonPositiveMonetaryType'}
-        SubElement(cellETree, 'DisplayZeroAsNone').text = str(self.filing.isRR and fact.concept.typeQname.localName in dataTypeSet).casefold()
-
-        # handle scaling
-        numericAmount, roundedNumericAmount = self.handleScalingAndPrecision(IsNumeric, NumericAmount)
+        SubElement(cellETree, 'DisplayZeroAsNone').text = str(DisplayZeroAsNone).casefold()
         SubElement(cellETree, 'NumericAmount').text = str(numericAmount)
         SubElement(cellETree, 'RoundedNumericAmount').text = str(roundedNumericAmount)
  
@@ -1624,8 +1808,30 @@ class Cell(object):
 
 
         #########################################
-        displayDateInUSFormatBool = re.compile('[0-9]{4}-[0-9]{2}-[0-9]{2}').match(self.NonNumericText) is not None
-        SubElement(cellETree, 'DisplayDateInUSFormat').text = str(displayDateInUSFormatBool).casefold()
+        SubElement(cellETree, 'DisplayDateInUSFormat').text = str(self.displayDateInUSFormat()).casefold()
+
+    def displayValues(self):
+        # what emitCell writes about the value of the fact, which also leaves the text of a non numeric fact in NonNumericText.
+        fact = self.fact
+        IsNumeric = fact.isNumeric
+        IsRatio = False
+        NumericAmount = ''
+        valueStr = self.handleFactValue()
+        if IsNumeric:
+            IsRatio = Utils.isRate(fact, self.filing) # Rename to DisplayAsPercent
+            NumericAmount = valueStr
+        else:
+            self.NonNumericText = valueStr
+
+        dataTypeSet = {'NonNegativePure4Type', 'NonPositivePure4Type', 'pureItemType', 'NonNegativeMonetaryType', 'NonPositiveMonetaryType'}
+        DisplayZeroAsNone = self.filing.isRR and fact.concept.typeQname.localName in dataTypeSet
+
+        # handle scaling
+        numericAmount, roundedNumericAmount = self.handleScalingAndPrecision(IsNumeric, NumericAmount)
+        return (IsNumeric, IsRatio, DisplayZeroAsNone, numericAmount, roundedNumericAmount)
+
+    def displayDateInUSFormat(self):
+        return re.compile('[0-9]{4}-[0-9]{2}-[0-9]{2}').match(self.NonNumericText) is not None
 
 
 
@@ -1703,7 +1909,7 @@ class Cell(object):
         else:
             try:
                 qnameToGetTheLabelOf = self.filing.factToQlabelDict[fact]
-                return self.filing.modelXbrl.qnameConcepts[qnameToGetTheLabelOf].label(self.preferredLabel)
+                return self.filing.conceptLabel(self.filing.modelXbrl.qnameConcepts[qnameToGetTheLabelOf], preferredLabel=self.preferredLabel)
             except KeyError:
                 if Utils.isFactTypeEqualToOrDerivedFrom(fact, Utils.isDurationItemTypeQname):
                     return Utils.handleDurationItemType(fact)
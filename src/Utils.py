@@ -6,7 +6,9 @@ Edgar(tm) Renderer was created by staff of the U.S. Securities and Exchange Comm
 Data and content created by government employees within the scope of their employment 
 are not subject to domestic copyright protection. 17 U.S.C. 105.
 """
-import re, sys, math, logging
+import re, sys, os, logging, threading
+from collections import defaultdict
+import lxml.etree
 import arelle.XbrlConst
 
 startRoles = ['http://www.xbrl.org/2003/role/periodStartLabel', 'http://www.xbrl.org/2009/role/negatedPeriodStartLabel']
@@ -47,7 +49,7 @@ def printErrorStringToDiscribeEmbeddedTextBlockFact(embeddedCommandFact):
 
 def hideEmptyRows(rowList):
     for row in rowList:
-        if not any(cell.fact.value != '' or cell.fact.isNil for cell in row.cellList if cell is not None and not cell.column.isHidden):
+        if not any(cell.fact.value != '' or cell.fact.isNil for col, cell in row.filledCellDict.items() if not col.isHidden):
             row.isHidden = True
 
 
@@ -59,6 +61,37 @@ def booleanFromString(x):
     else:
         return (x.casefold() == "true")
 
+
+# stylesheets are parsed once per process and compiled once per thread, since an XSLT object must not be run by two
+# threads at the same time.  both caches are keyed by path and check the file's mtime, so an edited stylesheet is reloaded.
+xsltDocumentDict = {} # path -> (mtime, parsed stylesheet)
+xsltDocumentLock = threading.Lock()
+xsltThreadLocal = threading.local()
+
+def getXslt(path):
+    mtime = os.path.getmtime(path)
+    try:
+        xsltDict = xsltThreadLocal.xsltDict
+    except AttributeError:
+        xsltDict = xsltThreadLocal.xsltDict = {} # path -> (mtime, XSLT)
+    try:
+        cachedMtime, xslt = xsltDict[path]
+        if cachedMtime == mtime:
+            return xslt
+    except KeyError:
+        pass
+    with xsltDocumentLock:
+        try:
+            cachedMtime, xsltDocument = xsltDocumentDict[path]
+        except KeyError:
+            cachedMtime = None
+        if cachedMtime != mtime:
+            xsltDocument = lxml.etree.parse(path)
+            xsltDocumentDict[path] = (mtime, xsltDocument)
+        xslt = lxml.etree.XSLT(xsltDocument) # compiles from a copy of the document
+    xsltDict[path] = (mtime, xslt)
+    return xslt
+
 isImageRegex = re.compile('.*\.(jpg|gif|png)$')
 isXmlRegex = re.compile('.*\.x(ml|sd)')
 isEfmRegex = re.compile('.*[0-9]{8}((_(cal|def|lab|pre))?\.xml|\.xsd)$')
@@ -244,55 +277,39 @@ def isDurationItemTypeQname(typeQname):
     """(bool) -- True if the type qname is xbrli:durationItemType"""
     return typeQname.localName == 'durationItemType' and typeQname.namespaceURI == arelle.XbrlConst.xbrli
 
-def modelRelationshipsTransitiveFrom(relationshipSet, concept, linkroleUri, result=set()):
-    """Return the subset of a relationship set in the transitive closure starting from concept, limited to linkroleUri."""
-    for r in relationshipSet.modelRelationshipsFrom[concept]:
-        if r.linkrole == linkroleUri and r not in result:
-            result.add(r)
-            modelRelationshipsTransitiveFrom(relationshipSet,r.toModelObject,linkroleUri,result)
-    return result
-
-
-def heapsort(l, cmp):  # l is a list, cmp is a two-argument fn
-    n = len(l)
-    if n < 2:
-        return l
-    m = math.floor(n / 2)
-    ll = heapsort(l[:m], cmp)
-    ul = heapsort(l[m:], cmp)
-    nl = []  # New list
-    i = 0
-    j = 0
-    while True:  # merge the sublists known to be sorted
-        c = cmp(ll[i], ul[j])
-        if c < 0:  # ul is before ll, consume one from ul
-            nl += [ul[j]]
-            j += 1
-        elif c == 0:  # ll equals ul, preserve their relative order
-            nl += [ll[i], ul[j]]
-            i += 1
-            j += 1
-        else:  # ll is before ul, consume one from ll
-            nl += [ll[i]]
-            i += 1
-        if i == len(ll):  # at the end of ll, append rest of ul
-            nl += ul[j:]
-            break
-        if j == len(ul):  # at the end of ul, append rest of ll
-            nl += ll[i:]
-            break
-    return nl
-
-def compareInOrdering(x, y, l, o):
-    if x in o:
-        return -1
-    try:  # return -1 if x comes after y in list l, otherwise return 0
-        tail = l[l.index(y) + 1:]  # tail is what comes after y
-        if x in tail:
-            return -1
-    except:
-        pass
-    return 0
+class RelationshipClosureIndex(object):
+    """Transitive closure of one arcrole's relationship set, limited to a linkrole, memoized per starting concept."""
+    def __init__(self, relationshipSet):
+        # group the relationships by (fromModelObject, linkrole) once, rather than filtering by linkrole on every step.
+        self.relationshipsFromDict = defaultdict(list)
+        for r in relationshipSet.modelRelationships:
+            self.relationshipsFromDict[(r.fromModelObject, r.linkrole)].append(r)
+        self.closureDict = {}
+
+    def modelRelationshipsTransitiveFrom(self, concept, linkroleUri):
+        """Return the frozenset of relationships in linkroleUri reachable from concept."""
+        try:
+            return self.closureDict[(concept, linkroleUri)]
+        except KeyError:
+            pass
+        result = set()
+        stack = [concept]
+        while len(stack) > 0:
+            for r in self.relationshipsFromDict.get((stack.pop(), linkroleUri), ()):
+                if r not in result: # also stops directed cycles
+                    result.add(r)
+                    stack.append(r.toModelObject)
+        result = self.closureDict[(concept, linkroleUri)] = frozenset(result)
+        return result
+
+
+def orderMembers(memberList, positionDict, lastPositionDict):
+    """Return memberList with the members in positionDict sorted by their position into the places those members already
+    occupy, and the members in lastPositionDict moved to the end, sorted by their position. Other members keep their places."""
+    lastMemberList = sorted((x for x in memberList if x in lastPositionDict), key=lastPositionDict.__getitem__)
+    memberList = [x for x in memberList if x not in lastPositionDict]
+    orderedMemberIter = iter(sorted((x for x in memberList if x in positionDict), key=positionDict.__getitem__))
+    return [next(orderedMemberIter) if x in positionDict else x for x in memberList] + lastMemberList
 
 def commonPrefix(str1, str2):  # count characters that form the prefix of both str1 and str2
     i = 0
@@ -11,6 +11,7 @@ Convert Html Tables into Excel tables
 """
 
 import os.path, re, datetime, lxml, decimal, collections, openpyxl.cell, openpyxl.styles, openpyxl.worksheet.dimensions
+import Utils
 
 # note that number pattern allows word before number like shares (1,234,567) (but would misfire on same in text block!)
 numberPattern = re.compile(r"\s*[_A-Za-z\xC0-\xD6\xD8-\xF6\xF8-\xFF\u0100-\u02FF\u0370-\u037D\u037F-\u1FFF\u200C-\u200D\u2070-\u218F\u2C00-\u2FEF\u3001-\uD7FF\uF900-\uFDCF\uFDF0-\uFFFD]*"
@@ -33,7 +34,7 @@ class XlWriter(object):
     def __init__(self, controller, outputFolderName):
         self.controller = controller
         self.outputFolderName = outputFolderName
-        self.simplified_transform = lxml.etree.XSLT(lxml.etree.parse(controller.excelXslt))
+        self.simplified_transform = Utils.getXslt(controller.excelXslt)
         self.wb = openpyxl.Workbook(encoding='utf-8')
         self.sheetNames = set() # prevent duplicates
         self.workSheet = None
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Tests import the renderer modules the same way EdgarRenderer.py does, by module name from the src directory.
+"""
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Cube`, on fake cubes that carry just the attributes the tested methods read.
+"""
+import random, datetime
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+import pytest
+import arelle.ModelValue
+import Cube, Filing, Utils
+
+class FakeController(object):
+    def __init__(self):
+        self.messageList = []
+    def logDebug(self, message):
+        self.messageList.append(message)
+    logInfo = logDebug
+
+class FakeFact(object):
+    def __init__(self, qname):
+        self.qname = qname
+        self.context = None
+
+
+def handlePeriodStartEndLabelByScanning(self,discoveredDurations=[]):
+    # Cube.handlePeriodStartEndLabel as it was before the durations were indexed by start and end time.
+    def matchingDurationSet(iFxm,preferredLabel):
+        # iFxm = instant Fact - axis - membership tuple.
+        # return set of tuples consisting of start/end time tuple and start/end role
+        ignore, iAxm, ignore = iFxm # iAxm = instant AxisMembership
+        iPeriod = iAxm['period'] # instant Period (Period is a synonym for StartEndContext)
+        iTime = iPeriod.endTime # instant Time
+        assert iPeriod.periodTypeStr == 'instant'
+        durations = set() # set of Periods to return
+        if len(discoveredDurations)==0:
+            for dFxm in self.factMemberships: # dFxm = duration's fact axis-membership tuple
+                dAxm = dFxm[1] # duration's AxisMembership dictionary
+                dPeriod = dAxm['period'] # duration's startEndContext
+                if dPeriod.periodTypeStr == 'duration' and not dPeriod in durations:
+                    if 'Start' in preferredLabel:
+                        dTimeToMatch = dPeriod.startTime
+                    else:
+                        dTimeToMatch = dPeriod.endTime
+                    if dTimeToMatch == iTime:
+                        durations.add(dPeriod)
+        else:
+            for dPeriod in discoveredDurations:
+                if not dPeriod in durations:
+                    if 'Start' in preferredLabel:
+                        dTimeToMatch = dPeriod.startTime
+                    else:
+                        dTimeToMatch = dPeriod.endTime
+                    if dTimeToMatch == iTime:
+                        durations.add(dPeriod)
+        return {((d.startTime,d.endTime),preferredLabel) for d in durations}
+
+    initialSize = len(self.factMemberships)
+    i = initialSize - 1
+
+    # set of instants with periodStart or periodEnd that could not be matched to a duration.
+    skippedFactMembershipSet = set() # TODO: this could could probably be a list, rather than a set, BC
+
+    while i >= 0:
+        factMembership = self.factMemberships[i]
+        fact, axisMemberLookupDict, role = factMembership
+        # The startEndPreferredLabelList shows what label roles the presentation linkbase expected to be present.
+        startEndPreferredLabelList = (self.periodStartEndLabelDict.get(fact.qname) or [])
+        if len(startEndPreferredLabelList) > 0:
+            startTupleSet = set()  # the set of durations that the instant of this fact begins
+            for startRole in Utils.startRoles:
+                if startRole in startEndPreferredLabelList:
+                    startTupleSet.update(matchingDurationSet(factMembership,startRole))
+            endTupleSet = set() # the set of durations that the instant of this fact ends
+            for endRole in Utils.endRoles:
+                if endRole in startEndPreferredLabelList:
+                    endTupleSet.update(matchingDurationSet(factMembership,endRole))
+            setOfMatches = startTupleSet.union(endTupleSet)
+            if len(setOfMatches)==0:
+                for role in startEndPreferredLabelList:
+                    skippedFactMembershipSet.add((fact,role,self,self.linkroleUri,self.shortName))
+
+            for startEndTuple, preferredLabel in setOfMatches:
+                try: # if startEndContext exists, find it
+                    newStartEndContext = self.filing.startEndContextDict[startEndTuple]
+                except KeyError: # if not, create one and add it to respective data structures
+                    newStartEndContext = Filing.StartEndContext(fact.context, startEndTuple)
+                    self.filing.startEndContextDict[startEndTuple] = newStartEndContext
+                    self.timeAxis.add(newStartEndContext)
+                tempAxisMemberLookupDict = axisMemberLookupDict.copy()
+                tempAxisMemberLookupDict['period'] = newStartEndContext
+                #  append to the fact memberships list that we were counting down from the end of.
+                self.factMemberships += [(fact, tempAxisMemberLookupDict, preferredLabel)]
+        i -= 1
+    skippedFactSet = {x[0] for x in skippedFactMembershipSet}
+    if (len(skippedFactSet) == initialSize
+        and len(discoveredDurations)==0):
+        # if we skipped all the facts it means there were no durations.
+        # go 'discover' the durations by comparing start and end instants.
+        moments = sorted(list({fxm[1]['period'].endTime for fxm in self.factMemberships}))
+        if len(moments) > 1:
+            self.controller.logInfo(("In ''{}'', no matching durations for {} instant facts presented with start or end " \
+                                     "preferred labels. Now inferring durations to form columns. Simplify the presentation " \
+                                     "to get a more compact layout.").format(self.shortName, len(skippedFactSet)))
+            intervals = []
+            for i,endTime in enumerate(moments[1:]):
+                startTime = moments[i]
+                intervals += [Filing.StartEndContext(None,(startTime,endTime))]
+            self.hasDiscoveredDurations = True
+            self.handlePeriodStartEndLabel(discoveredDurations=intervals)
+
+    self.filing.skippedFactsList += list(skippedFactMembershipSet)
+
+class FakePeriodCube(object):
+    def __init__(self, factMemberships, periodStartEndLabelDict):
+        self.filing = SimpleNamespace(startEndContextDict={}, skippedFactsList=[])
+        self.controller = FakeController()
+        self.linkroleUri = 'http://example.com/role/Equity'
+        self.shortName = 'Equity'
+        self.timeAxis = set()
+        self.hasDiscoveredDurations = False
+        self.factMemberships = factMemberships
+        self.periodStartEndLabelDict = periodStartEndLabelDict
+    handlePeriodStartEndLabel = Cube.Cube.handlePeriodStartEndLabel
+
+class FakeScanningPeriodCube(FakePeriodCube):
+    handlePeriodStartEndLabel = handlePeriodStartEndLabelByScanning
+
+def makePeriodCube(cubeClass, periodCount, elementCount, seed, withDurations=True):
+    """A cube with elementCount elements over periodCount quarter ends.  A tenth of the elements are instants presented
+    with period start and/or end labels, the rest are durations over quarters, years and a few odd spans.  Without
+    durations, every element is one instant fact with a period start or end label, so that the durations are discovered."""
+    rng = random.Random(seed)
+    timeList = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=91 * i) for i in range(periodCount)]
+    startEndContextDict = {}
+    def period(startEndTuple):
+        try:
+            return startEndContextDict[startEndTuple]
+        except KeyError:
+            startEndContext = startEndContextDict[startEndTuple] = Filing.StartEndContext(None, startEndTuple)
+            return startEndContext
+    durationTupleList = [(timeList[i], timeList[i + 1]) for i in range(periodCount - 1)]
+    durationTupleList += [(timeList[i], timeList[i + 4]) for i in range(0, periodCount - 4, 4)]
+    durationTupleList += [(timeList[i], timeList[i + 3]) for i in range(1, periodCount - 3, 7)]
+    factMemberships = []
+    periodStartEndLabelDict = {}
+    roleChoiceList = [[Utils.startRoles[0]], [Utils.endRoles[0]], [Utils.startRoles[0], Utils.endRoles[0]],
+                      [Utils.endRoles[1], Utils.startRoles[0]]]
+    for i in range(elementCount):
+        fact = FakeFact('e{}'.format(i))
+        if not withDurations:
+            periodStartEndLabelDict[fact.qname] = rng.choice(roleChoiceList)
+            factMemberships.append((fact, {'period' : period((None, rng.choice(timeList))), 'unit' : 'USD'}, None))
+        elif i % 10 == 0:
+            periodStartEndLabelDict[fact.qname] = rng.choice(roleChoiceList)
+            for instantTime in rng.sample(timeList, rng.randint(1, periodCount)):
+                factMemberships.append((fact, {'period' : period((None, instantTime)), 'unit' : 'USD'}, None))
+        else:
+            for startEndTuple in rng.sample(durationTupleList, rng.randint(1, 6)):
+                factMemberships.append((fact, {'period' : period(startEndTuple), 'unit' : 'USD'}, None))
+    cube = cubeClass(factMemberships, periodStartEndLabelDict)
+    cube.filing.startEndContextDict.update(startEndContextDict)
+    return cube
+
+def periodOutcome(cube, initialSize):
+    # the memberships appended for one instant fact come out of a set, and the scan's order among them followed its set of
+    # periods, which is ordered by object identity and so differs from run to run.  so the facts that memberships are
+    # appended for must come in the same order, and the appended memberships must be the same as a multiset.
+    def periodKey(period):
+        return (period.startTime, period.endTime)
+    membershipList = [(fact.qname, periodKey(axisMemberLookupDict['period']), axisMemberLookupDict['unit'], role)
+                      for fact, axisMemberLookupDict, role in cube.factMemberships]
+    return (membershipList[:initialSize], [membership[0] for membership in membershipList[initialSize:]],
+            Counter(membershipList[initialSize:]),
+            sorted((fact.qname, role, linkroleUri) for fact, role, ignore, linkroleUri, shortName in cube.filing.skippedFactsList),
+            {periodKey(period) for period in cube.timeAxis},
+            set(cube.filing.startEndContextDict), cube.hasDiscoveredDurations, cube.controller.messageList)
+
+@pytest.mark.parametrize('seed', range(10))
+def testPeriodStartEndLabelMatchesScan(seed):
+    scanningCube = makePeriodCube(FakeScanningPeriodCube, 12, 40, seed)
+    initialSize = len(scanningCube.factMemberships)
+    scanningCube.handlePeriodStartEndLabel()
+    cube = makePeriodCube(FakePeriodCube, 12, 40, seed)
+    cube.handlePeriodStartEndLabel()
+    assert len(cube.factMemberships) > initialSize
+    assert periodOutcome(cube, initialSize) == periodOutcome(scanningCube, initialSize)
+
+@pytest.mark.parametrize('seed', range(3))
+def testPeriodStartEndLabelDiscoveredDurationsMatchScan(seed):
+    scanningCube = makePeriodCube(FakeScanningPeriodCube, 8, 30, seed, withDurations=False)
+    initialSize = len(scanningCube.factMemberships)
+    scanningCube.handlePeriodStartEndLabel()
+    cube = makePeriodCube(FakePeriodCube, 8, 30, seed, withDurations=False)
+    cube.handlePeriodStartEndLabel()
+    assert cube.hasDiscoveredDurations and len(cube.factMemberships) > initialSize
+    assert periodOutcome(cube, initialSize) == periodOutcome(scanningCube, initialSize)
+
+def testStressPeriodStartEndLabelWith50PeriodsAnd500Elements():
+    # benchmarks/periodStartEndLabels.py times the two on the same cube.
+    scanningCube = makePeriodCube(FakeScanningPeriodCube, 50, 500, 50)
+    initialSize = len(scanningCube.factMemberships)
+    scanningCube.handlePeriodStartEndLabel()
+    cube = makePeriodCube(FakePeriodCube, 50, 500, 50)
+    cube.handlePeriodStartEndLabel()
+    assert len(cube.factMemberships) > initialSize + 1000
+    assert periodOutcome(cube, initialSize) == periodOutcome(scanningCube, initialSize)
+
+
+def survivorsOfMovementAnalysisByCrossCheck(self,sortedList):
+    # Cube.SurvivorsOfMovementAnalysis as it was before the instants were indexed by time.
+    movementCandidateList = [[None,d,None] for d in sortedList if d.periodTypeStr == 'duration']
+    for i in sortedList:
+        if i.periodTypeStr == 'instant':
+            instantTime = i.endTime
+            for movement in movementCandidateList:
+                d = movement[1]
+                if instantTime == d.startTime:
+                    movement[0] = i
+                if instantTime == d.endTime:
+                    movement[2] = i
+    movementList = [m for m in movementCandidateList if m[0] is not None and m[1] is not None and m[2] is not None]
+    giveContextGetMovementsDict = defaultdict(list)
+    for c in sortedList:
+        giveContextGetMovementsDict[c] += [m for m in movementList if c in m]
+    self.controller.logDebug("Statement {} has {} Movements.".format(self.shortName, len(movementList)))
+    for contextID, movements in giveContextGetMovementsDict.items():
+        if len(movements)==0:
+            sortedList.remove(contextID)
+            self.controller.logDebug("Context {} was not part of a complete Movement".format(contextID))
+    return sortedList
+
+class FakeEquityCube(object):
+    def __init__(self, timeAxis):
+        self.controller = FakeController()
+        self.controller.logWarn = self.controller.logDebug
+        self.shortName = 'Statement of Stockholders Equity'
+        self.timeAxis = timeAxis
+        self.isStatementOfEquity = True
+        self.axisAndMemberOrderDict = {}
+    populatePeriodPseudoaxis = Cube.Cube.populatePeriodPseudoaxis
+    SurvivorsOfMovementAnalysis = Cube.Cube.SurvivorsOfMovementAnalysis
+
+class FakeCrossCheckEquityCube(FakeEquityCube):
+    SurvivorsOfMovementAnalysis = survivorsOfMovementAnalysisByCrossCheck
+
+def monthEnd(year, month):
+    # xbrl end times are the day after the period's last day
+    return datetime.datetime(year + month // 12, month % 12 + 1, 1)
+
+def equityTimeAxis(classPeriodList):
+    """The period pseudo axis of an equity statement whose classes each report the given instants and durations, as
+    (instant month ends, (start month end, end month end) durations) with months counted from 2010-01."""
+    startEndContextDict = {}
+    for instantList, durationList in classPeriodList:
+        for startEndTuple in [(None, monthEnd(2010, m)) for m in instantList] + [(monthEnd(2010, s), monthEnd(2010, e)) for s, e in durationList]:
+            if startEndTuple not in startEndContextDict:
+                startEndContextDict[startEndTuple] = Filing.StartEndContext(None, startEndTuple)
+    return set(startEndContextDict.values())
+
+# month ends are counted from the end of december 2009, so 12 is the end of 2010 and 0 the end of 2009.
+equityShapeDict = {
+    # three years of annual movements, with common stock, apic and retained earnings all reporting each year end.
+    '10-K': [([0, 12, 24, 36], [(0, 12), (12, 24), (24, 36)])] * 3,
+    # a 10-Q with nine months year to date for this and last year, and third quarter durations that have no instant at
+    # their start, so only the year to date movements survive.
+    '10-Q': [([24, 33, 12, 21], [(24, 33), (12, 21), (30, 33), (18, 21)]), ([24, 33], [(24, 33), (30, 33)])],
+    # preferred stock was issued in the middle year, so its class starts at a balance that no duration ends at, and
+    # treasury stock has a duration but only a closing balance.
+    'partial classes': [([0, 12, 24, 36], [(0, 12), (12, 24), (24, 36)]), ([18, 24, 36], [(18, 24), (24, 36)]),
+                        ([36], [(24, 36)]), ([], [(30, 36)])],
+    # a transition period: a six month stub between two fiscal years, with movements on both sides of it.
+    'transition period': [([0, 12, 18, 30], [(0, 12), (12, 18), (18, 30), (6, 18)])],
+    # no movement is complete, so the statement falls back to its plain period order.
+    'no movements': [([12], [(0, 6)]), ([24], [(12, 18)])],
+}
+
+def equityOutcome(cube):
+    giveMemGetPositionDict, ignore = cube.axisAndMemberOrderDict['period']
+    return (sorted(giveMemGetPositionDict.items(), key=lambda item: item[1]), cube.isStatementOfEquity, cube.controller.messageList)
+
+def randomEquityShape(rng):
+    # a few classes, each with balances at some year and quarter ends and movements between some of them.
+    classPeriodList = []
+    for i in range(rng.randint(1, 6)):
+        instantList = rng.sample(range(0, 48, 3), rng.randint(0, 8))
+        durationList = []
+        for j in range(rng.randint(0, 8)):
+            start = rng.randrange(0, 45, 3)
+            durationList.append((start, start + rng.choice([3, 6, 9, 12])))
+        classPeriodList.append((instantList, durationList))
+    return classPeriodList
+
+@pytest.mark.parametrize('shape', sorted(equityShapeDict))
+def testSurvivorsOfMovementAnalysisOnEquityShapes(shape):
+    timeAxis = equityTimeAxis(equityShapeDict[shape])
+    crossCheckCube = FakeCrossCheckEquityCube(timeAxis)
+    crossCheckCube.populatePeriodPseudoaxis()
+    cube = FakeEquityCube(timeAxis)
+    cube.populatePeriodPseudoaxis()
+    assert equityOutcome(cube) == equityOutcome(crossCheckCube)
+    assert cube.isStatementOfEquity == (shape != 'no movements')
+
+def testSurvivorsOfMovementAnalysisOnRandomEquityShapes():
+    rng = random.Random(36)
+    for i in range(300):
+        timeAxis = equityTimeAxis(randomEquityShape(rng))
+        crossCheckCube = FakeCrossCheckEquityCube(timeAxis)
+        crossCheckCube.populatePeriodPseudoaxis()
+        cube = FakeEquityCube(timeAxis)
+        cube.populatePeriodPseudoaxis()
+        assert equityOutcome(cube) == equityOutcome(crossCheckCube)
+
+
+class FakeOrderingCube(object):
+    def __init__(self, configuredAxisOrders, builtinAxisOrders):
+        self.filing = SimpleNamespace(configuredAxisOrders=configuredAxisOrders, builtinAxisOrders=builtinAxisOrders)
+        self.memberOrderingDict = {}
+    memberOrdering = Cube.Cube.memberOrdering
+
+def testConfiguredMemberOrderMatchesAxisNamespace():
+    usGaapAxis = arelle.ModelValue.QName('us-gaap', 'http://fasb.org/us-gaap/2015-01-31', 'StatementScenarioAxis')
+    companyAxis = arelle.ModelValue.QName('abc', 'http://abc.com/20151231', 'StatementScenarioAxis')
+    cube = FakeOrderingCube([(companyAxis, ['FirstMember', 'SecondMember'], ['LastMember'])],
+                            [(usGaapAxis, ['ScenarioPreviouslyReportedMember'], ['ScenarioUnspecifiedDomain'])])
+    firstPositionDict, lastPositionDict = cube.memberOrdering(companyAxis)
+    assert firstPositionDict == {arelle.ModelValue.QName('abc', 'http://abc.com/20151231', 'FirstMember') : 0,
+                                 arelle.ModelValue.QName('abc', 'http://abc.com/20151231', 'SecondMember') : 1}
+    assert lastPositionDict == {arelle.ModelValue.QName('abc', 'http://abc.com/20151231', 'LastMember') : 0}
+    # the configured order names the company's axis, so the us-gaap axis of the same local name keeps its builtin order.
+    firstPositionDict, lastPositionDict = cube.memberOrdering(usGaapAxis)
+    assert list(firstPositionDict) == [arelle.ModelValue.QName('us-gaap', 'http://fasb.org/us-gaap/2015-01-31', 'ScenarioPreviouslyReportedMember')]
+    assert cube.memberOrdering(arelle.ModelValue.QName('xyz', 'http://xyz.com/20151231', 'StatementScenarioAxis')) is None
@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Embedding`, on real embeddings of fake cubes and facts.
+"""
+import random, datetime
+from collections import defaultdict
+from types import SimpleNamespace
+import pytest
+from lxml import etree
+from arelle.ModelObject import ModelObject
+import Embedding, Filing, Report, Utils
+
+class FakeController(object):
+    def __init__(self):
+        self.messageList = []
+    def logDebug(self, message):
+        self.messageList.append(('debug', message))
+    def logWarn(self, message):
+        self.messageList.append(('warn', message))
+    def logInfo(self, message):
+        self.messageList.append(('info', message))
+    def logError(self, message):
+        self.messageList.append(('error', message))
+
+class FakeConcept(object):
+    def __init__(self, qname, isMonetary, isShares):
+        self.qname = qname
+        self.isMonetary = isMonetary
+        self.isShares = isShares
+    def label(self, preferredLabel=None, fallbackToQname=True):
+        return 'Label of ' + self.qname
+
+class FakeFact(object):
+    def __init__(self, concept, contextID, unitID):
+        self.concept = concept
+        self.qname = concept.qname
+        self.contextID = contextID
+        self.unitID = unitID
+    def unitSymbol(self):
+        return '$' if self.unitID == 'USD' else ''
+
+segmentAxis = 'abc:SegmentAxis'
+productAxis = 'abc:ProductAxis'
+noDefaultAxis = 'abc:NoDefaultAxis'
+uncommandedAxis = 'abc:UncommandedAxis'
+
+def makeEmbedding(factCount, signatureCount, seed):
+    """An embedding with commands for period and segment in columns, and primary, product, no default and unit in rows,
+    over factCount facts spread across signatureCount dimension signatures.  Some signatures are filtered, because of an
+    axis that has no command, a member that is not in the presentation, or a defaulted axis that has no default."""
+    rng = random.Random(seed)
+    controller = FakeController()
+    filing = SimpleNamespace(controller=controller, factToEmbeddingDict={}, usedOrBrokenFactSet=set(), startEndContextDict={},
+                             ignoredPreferredLabels=[],
+                             conceptLabel=lambda concept, preferredLabel=None, fallbackToQname=True: 'Label of ' + concept.qname)
+    labelDict = {'USD' : 'USD ($)', 'shares' : 'shares', 'abc:SegmentDomain' : 'Segments', 'abc:ProductDomain' : 'Products'}
+    segmentMemberList = ['abc:Segment{}Member'.format(i) for i in range(6)]
+    productMemberList = ['abc:Product{}Member'.format(i) for i in range(8)]
+    for member in segmentMemberList + productMemberList + ['abc:NoDefaultMember']:
+        labelDict[member] = member.partition(':')[2]
+    def fakeAxis(axisQname, defaultQname):
+        return SimpleNamespace(arelleConcept=SimpleNamespace(qname=axisQname),
+                               defaultArelleConcept=None if defaultQname is None else SimpleNamespace(qname=defaultQname))
+    cube = SimpleNamespace(shortName='Segments', linkroleUri='http://abc.com/role/Segments', hasDiscoveredDurations=False,
+                           isUncategorizedFacts=False, defaultFilteredOutAxisSet=set(), labelDict=labelDict,
+                           hasAxes={segmentAxis : fakeAxis(segmentAxis, 'abc:SegmentDomain'), productAxis : fakeAxis(productAxis, 'abc:ProductDomain'),
+                                    noDefaultAxis : fakeAxis(noDefaultAxis, None)},
+                           presentationGroup=SimpleNamespace(rootNodeList=[None]), factMemberships=[])
+    embedding = Embedding.Embedding(filing, cube, [])
+    embedding.colCommands = [SimpleNamespace(pseudoAxis='period', rowOrColumn='col'), SimpleNamespace(pseudoAxis=segmentAxis, rowOrColumn='col')]
+    embedding.rowCommands = [SimpleNamespace(pseudoAxis='primary', rowOrColumn='row'), SimpleNamespace(pseudoAxis=productAxis, rowOrColumn='row'),
+                             SimpleNamespace(pseudoAxis=noDefaultAxis, rowOrColumn='row'), SimpleNamespace(pseudoAxis='unit', rowOrColumn='row')]
+    embedding.rowPrimaryPosition = 0
+    embedding.columnPrimaryPosition = -1
+
+    periodList = [Filing.StartEndContext(None, (datetime.datetime(2010 + i, 1, 1), datetime.datetime(2011 + i, 1, 1))) for i in range(5)]
+    conceptList = [FakeConcept('abc:Concept{}'.format(i), i % 3 != 0, i % 3 == 0) for i in range(100)]
+    primaryDict = defaultdict(list)
+    for i, concept in enumerate(conceptList[:90]): # the last ten concepts are not in the presentation, so their facts are filtered
+        primaryDict[concept.qname] += [(i, None)]
+        if i % 15 == 0:
+            primaryDict[concept.qname] += [(i + 1000, 'http://www.xbrl.org/2003/role/totalLabel')]
+    embedding.getMemberPositionsOnAxisDictOfDicts = {
+        'primary' : primaryDict, 'period' : {period : i for i, period in enumerate(periodList)}, 'unit' : {'USD' : 0, 'shares' : 1},
+        segmentAxis : dict({member : i for i, member in enumerate(segmentMemberList[:5])}, **{'abc:SegmentDomain' : -1}),
+        productAxis : dict({member : i for i, member in enumerate(productMemberList)}, **{'abc:ProductDomain' : -1}),
+        noDefaultAxis : {'abc:NoDefaultMember' : 0}}
+
+    # like Filing.buildAxisMemberLookupDict, facts with the same context and unit share one lookup dict.
+    signatureList = []
+    while len(signatureList) < signatureCount:
+        unitID = rng.choice(['USD', 'shares'])
+        getMemberOnAxisForFactDict = {'period' : rng.choice(periodList), 'unit' : unitID}
+        for axis, memberList in ((segmentAxis, segmentMemberList), (productAxis, productMemberList)):
+            if rng.random() < 0.7:
+                getMemberOnAxisForFactDict[axis] = rng.choice(memberList) # Segment5Member is not in the presentation
+        if rng.random() < 0.85:
+            getMemberOnAxisForFactDict[noDefaultAxis] = 'abc:NoDefaultMember' # otherwise filtered with a warning per fact
+        if rng.random() < 0.03:
+            getMemberOnAxisForFactDict[uncommandedAxis] = 'abc:OtherMember'
+        signatureList.append(('c{}'.format(len(signatureList)), unitID, getMemberOnAxisForFactDict))
+    for i in range(factCount):
+        contextID, unitID, getMemberOnAxisForFactDict = signatureList[i % signatureCount]
+        fact = FakeFact(conceptList[(i // signatureCount) % len(conceptList)], contextID, unitID)
+        if i % 997 == 0:
+            filing.factToEmbeddingDict[fact] = None
+        cube.factMemberships.append((fact, getMemberOnAxisForFactDict, None))
+    return embedding
+
+def processOrFilterFactsPerFact(self):
+    # Embedding.processOrFilterFacts as it was before dimension signatures, so every fact works out its own axes.
+    pseudoAxisRowColStrTuples = [(command.pseudoAxis, command.rowOrColumn) for command in self.rowCommands + self.colCommands]
+    pseudoAxisSet = {pseudoAxisRowColStrTuple[0] for pseudoAxisRowColStrTuple in pseudoAxisRowColStrTuples}
+    if self.rowPrimaryPosition != -1:
+        primaryRowOrColStr = 'row'
+        primaryIndex = self.rowPrimaryPosition
+    else:
+        primaryRowOrColStr = 'col'
+        primaryIndex = len(self.rowCommands) + self.columnPrimaryPosition
+    for fact, getMemberOnAxisForFactDict, periodStartEndLabel in self.cube.factMemberships:
+        factAxisMemberGroupList = buildFactAxisMemberGroupsForFactOrFilterPerFact(self, pseudoAxisRowColStrTuples, pseudoAxisSet, fact,
+                                                                                  getMemberOnAxisForFactDict, periodStartEndLabel,
+                                                                                  primaryIndex, primaryRowOrColStr)
+        if len(factAxisMemberGroupList) == 0:
+            if fact in self.filing.factToEmbeddingDict:
+                self.controller.logDebug(("In ''{}'', the fact {!s} with context {}, which contains an embedded command, " \
+                                         "was filtered out.").format(self.cube.shortName, fact.qname, fact.contextID))
+            continue
+        self.factAxisMemberGroupList += factAxisMemberGroupList
+        if fact.unitID is not None:
+            self.unitsWeAreKeepingSet.add(fact.unitID)
+        self.hasElementsAndElementMemberPairs.add(fact.qname)
+        self.filing.usedOrBrokenFactSet.add(fact)
+        if fact.concept.isMonetary or fact.concept.isShares or fact.unitSymbol() != '':
+            self.unitsToScaleGloballySet[fact.unitID].add(fact)
+    if len(self.factAxisMemberGroupList) == 0:
+        errorStr = Utils.printErrorStringToDisambiguateEmbeddedOrNot(self.factThatContainsEmbeddedCommand)
+        self.controller.logDebug(("In ''{}'', all of the facts have been filtered out. Therefore, it will " \
+                                  "not be rendered.").format(self.cube.shortName, errorStr))
+        self.isEmbeddingOrReportBroken = True
+        self.cube.excludeFromNumbering = True
+        return
+    if len(self.cube.presentationGroup.rootNodeList) > 1:
+        usedConceptsSet = {factAxisMemberGroup.fact.concept for factAxisMemberGroup in self.factAxisMemberGroupList}
+        usedConceptsSet.update(pseudoAxisSet - self.setOfGivenAxes - {'unit', 'primary', 'period'})
+        numUsedRootNodes = 0
+        for rootNodeConceptSet in self.cube.rootNodeToConceptSetDict.values():
+            if not rootNodeConceptSet.isdisjoint(usedConceptsSet):
+                numUsedRootNodes += 1
+                if numUsedRootNodes == 2:
+                    self.controller.logWarn("Presentation group ''{}'', has multiple root nodes. XBRL allows unordered root nodes, "\
+                                            "but rendering requires ordering.  They will instead be ordered by their labels.  To "\
+                                            "avoid undesirable ordering of axes and primary items across multiple root nodes, "\
+                                            "rearrange the presentation group to have only a single root node.".format(
+                                            self.cube.shortName))
+                    break
+
+def buildFactAxisMemberGroupsForFactOrFilterPerFact(self, pseudoAxisRowColStrTuples, pseudoAxisSet, fact, getMemberOnAxisForFactDict,
+                                                    periodStartEndLabel, primaryIndex, primaryRowOrColStr):
+    if len(set(getMemberOnAxisForFactDict) - pseudoAxisSet) > 0:
+        return []
+    factAxisMemberTupleList = []
+    for axisIndex, (pseudoAxisName, rowOrColStr) in enumerate(pseudoAxisRowColStrTuples):
+        if pseudoAxisName != 'primary':
+            factAxisMember = generateFactAxisMemberForNonPrimaryPerFact(self, fact, axisIndex, periodStartEndLabel, pseudoAxisName,
+                                                                        getMemberOnAxisForFactDict)
+            if factAxisMember is None:
+                return []
+            factAxisMemberTupleList += [(factAxisMember, rowOrColStr)]
+    factAxisMemberGroupList = []
+    for factAxisMemberForPrimary, label in generateFactAxisMemberLabelListForPrimaryPerFact(self, fact, primaryIndex, periodStartEndLabel):
+        factAxisMemberGroup = Embedding.FactAxisMemberGroup(fact)
+        factAxisMemberGroup.preferredLabel = label
+        factAxisMemberTupleListCopy = factAxisMemberTupleList.copy()
+        factAxisMemberTupleListCopy.insert(primaryIndex, (factAxisMemberForPrimary, primaryRowOrColStr))
+        # the axisMemberPositionTupleRowList and axisMemberPositionTupleColList kept alongside are gone from FactAxisMemberGroup.
+        for factAxisMember, rowOrColStr in factAxisMemberTupleListCopy:
+            if rowOrColStr == 'row':
+                factAxisMemberGroup.factAxisMemberRowList += [factAxisMember]
+            else:
+                factAxisMemberGroup.factAxisMemberColList += [factAxisMember]
+        factAxisMemberGroupList += [factAxisMemberGroup]
+    return factAxisMemberGroupList
+
+def generateFactAxisMemberLabelListForPrimaryPerFact(self, fact, axisIndex, periodStartEndLabel):
+    getMemberPositionsOnAxisDict = self.getMemberPositionsOnAxisDictOfDicts['primary']
+    factAxisMemberLabelList = []
+    for positionOnPrimaryAxis, labelRole in getMemberPositionsOnAxisDict[fact.qname]:
+        if (labelRole not in Utils.startEndRoles or periodStartEndLabel == labelRole):
+            factAxisMember = Embedding.FactAxisMember('primary', fact.qname)
+            factAxisMember.axisMemberPositionTuple = (axisIndex, positionOnPrimaryAxis)
+            if labelRole in Utils.durationStartEndRoles:
+                labelStr = fact.qname.localName
+                for linkroleUri, qname, originalLabelRole, shortName in self.filing.ignoredPreferredLabels:
+                    if      (self.cube.linkroleUri == linkroleUri and
+                             fact.concept.qname == qname and
+                             Utils.matchedDurationRoles(originalLabelRole,labelRole)):
+                        errorStr = Utils.printErrorStringToDisambiguateEmbeddedOrNot(self.factThatContainsEmbeddedCommand)
+                        self.controller.logWarn(("In ''{}''{}, ".format(shortName, errorStr)
+                                                  +"element {!s} with value {} ".format(qname, Utils.strFactValue(fact))
+                                                  +"has label {}, but the context is a duration, not an instant. "
+                                                    .format(originalLabelRole.split("/")[-1])
+                                                  +"It will be treated as if it had no label."))
+            else:
+                labelStr = fact.concept.label(preferredLabel=labelRole, fallbackToQname=True)
+            factAxisMember.memberLabel = labelStr
+            factAxisMemberLabelList += [(factAxisMember, labelRole)]
+    return factAxisMemberLabelList
+
+def generateFactAxisMemberForNonPrimaryPerFact(self, fact, axisIndex, periodStartEndLabel, pseudoAxisName, getMemberOnAxisForFactDict):
+    getMemberPositionsOnAxisDict = self.getMemberPositionsOnAxisDictOfDicts[pseudoAxisName]
+    memberLabel = None
+    memberQname = getMemberOnAxisForFactDict.get(pseudoAxisName)
+    if pseudoAxisName == 'period' and self.cube.hasDiscoveredDurations:
+        substituteInstant = memberQname.endTime
+        memberQname = self.filing.startEndContextDict[(None, substituteInstant)]
+    if memberQname is None:
+        if pseudoAxisName in {'unit', 'period'}:
+            memberPositionOnAxis = Utils.minNumber
+        else:
+            if pseudoAxisName in self.cube.defaultFilteredOutAxisSet:
+                return None
+            axis = self.cube.hasAxes[pseudoAxisName]
+            try:
+                axisDefaultQname = axis.defaultArelleConcept.qname
+            except AttributeError:
+                axisDefaultQname = None
+                if not self.cube.isUncategorizedFacts:
+                    errorStr = Utils.printErrorStringToDisambiguateEmbeddedOrNot(self.factThatContainsEmbeddedCommand)
+                    self.controller.logWarn(("In ''{}''{}, the fact {!s} with context {} was filtered because the " \
+                                             "axis {!s} has no default.").format(self.cube.shortName, errorStr, fact.qname,
+                                             fact.contextID, axis.arelleConcept.qname))
+                    return None
+            if pseudoAxisName in self.cube.defaultFilteredOutAxisSet:
+                return None
+            try:
+                memberLabel = self.cube.labelDict[axisDefaultQname]
+            except KeyError:
+                memberLabel = axisDefaultQname
+            try:
+                memberPositionOnAxis = getMemberPositionsOnAxisDict[axisDefaultQname]
+            except KeyError:
+                if self.cube.isUncategorizedFacts:
+                    memberPositionOnAxis = len(getMemberPositionsOnAxisDict)
+                else:
+                    return None
+        memberIsDefault = True
+    else:
+        try:
+            memberPositionOnAxis = getMemberPositionsOnAxisDict[memberQname]
+        except KeyError:
+            return None
+        if pseudoAxisName == 'period':
+            memberLabel = memberQname.label
+        else:
+            if pseudoAxisName != 'unit':
+                self.hasElementsAndElementMemberPairs.add((fact.qname, memberQname))
+            try:
+                memberLabel = self.cube.labelDict[memberQname]
+            except KeyError:
+                if pseudoAxisName == 'unit':
+                    memberLabel, ignore = Utils.getUnitStr(fact)
+                else:
+                    memberLabel = Utils.prettyPrintQname(memberQname.localName)
+        memberIsDefault = False
+    return Embedding.FactAxisMember(pseudoAxisName, memberQname, axisMemberPositionTuple = (axisIndex, memberPositionOnAxis),
+                                    memberLabel = memberLabel, memberIsDefault = memberIsDefault)
+
+def factAxisMemberKey(factAxisMember):
+    return (factAxisMember.pseudoAxisName, factAxisMember.member, factAxisMember.axisMemberPositionTuple,
+            factAxisMember.memberLabel, factAxisMember.memberIsDefault)
+
+def embeddingOutcome(embedding, factList):
+    # facts are compared by their position in the cube, since each embedding has its own fake facts.
+    factIndexDict = {fact : i for i, fact in enumerate(factList)}
+    def comparableKey(factAxisMember):
+        # periods are StartEndContext objects of their own embedding, so they are compared by label.
+        key = factAxisMemberKey(factAxisMember)
+        if factAxisMember.pseudoAxisName == 'period':
+            return key[:1] + (factAxisMember.member.label,) + key[2:]
+        return key
+    return ([(factIndexDict[factAxisMemberGroup.fact], factAxisMemberGroup.preferredLabel,
+              [comparableKey(x) for x in factAxisMemberGroup.factAxisMemberRowList],
+              [comparableKey(x) for x in factAxisMemberGroup.factAxisMemberColList])
+             for factAxisMemberGroup in embedding.factAxisMemberGroupList],
+            embedding.hasElementsAndElementMemberPairs, embedding.unitsWeAreKeepingSet,
+            sorted(factIndexDict[fact] for fact in embedding.filing.usedOrBrokenFactSet),
+            {unitID : sorted(factIndexDict[fact] for fact in factSet) for unitID, factSet in embedding.unitsToScaleGloballySet.items()},
+            embedding.isEmbeddingOrReportBroken, embedding.controller.messageList)
+
+def embeddingFactList(embedding):
+    return [fact for fact, ignore, ignore in embedding.cube.factMemberships]
+
+def runBoth(factCount, signatureCount, seed):
+    perFactEmbedding = makeEmbedding(factCount, signatureCount, seed)
+    processOrFilterFactsPerFact(perFactEmbedding)
+    embedding = makeEmbedding(factCount, signatureCount, seed)
+    embedding.processOrFilterFacts()
+    # every FactAxisMember of the signature path is the interned one, so equal members are the same object.
+    for factAxisMemberGroup in embedding.factAxisMemberGroupList:
+        for factAxisMember in factAxisMemberGroup.factAxisMemberRowList + factAxisMemberGroup.factAxisMemberColList:
+            assert embedding.factAxisMemberDict[factAxisMemberKey(factAxisMember)] is factAxisMember
+    outcome = embeddingOutcome(embedding, embeddingFactList(embedding))
+    assert outcome == embeddingOutcome(perFactEmbedding, embeddingFactList(perFactEmbedding))
+    return outcome
+
+def testProcessOrFilterFactsMatchesPerFactPath():
+    for seed in range(10):
+        outcome = runBoth(1200, 60, seed)
+        keptFactCount = len(outcome[3])
+        assert 0 < keptFactCount < 1200
+        assert any(level == 'warn' for level, message in outcome[-1])
+
+def testProcessOrFilterFactsMatchesPerFactPathWith20kFactsAnd200Signatures():
+    # benchmarks/processOrFilterFacts.py times the two on the same embedding.
+    outcome = runBoth(20000, 200, 39)
+    assert len(outcome[0]) > 10000
+
+
+
+class FakeTextBlockFact(ModelObject):
+    # a real arelle element, so the prefixes of the embedded commands resolve against its own xmlns declarations.
+    @property
+    def value(self):
+        return self.text
+    @property
+    def qname(self):
+        return self.get('name')
+    @property
+    def contextID(self):
+        return self.get('contextRef')
+
+def makeTextBlockFact(value, namespaceURI='http://abc.com/2020', contextID='c1'):
+    parser = etree.XMLParser()
+    parser.set_element_class_lookup(etree.ElementDefaultClassLookup(element=FakeTextBlockFact))
+    fact = etree.fromstring('<fact xmlns:abc="{}" name="abc:SegmentsTextBlock" contextRef="{}"/>'.format(namespaceURI, contextID), parser)
+    fact.text = value
+    return fact
+
+segmentsRole = 'http://abc.com/role/Segments'
+
+# command text, then (rowOrColumn, pseudoAxis, formattingType, memberList, position) per command, then (logLevel, token, position)
+# per message.  positions count the linkrole uri as 1.
+@pytest.mark.parametrize('commandText, commandNodeTupleList, messageTupleList', [
+    (segmentsRole + ' Column Period NoDisplay * row primary compact * row abc_Segment_Axis compact abc_EastMember abc_WestMember',
+     [('column', 'period', 'nodisplay', ['*'], 2), ('row', 'primary', 'compact', ['*'], 6),
+      ('row', 'abc:Segment_Axis', 'compact', ['abc:EastMember', 'abc:WestMember'], 10)], []),
+    (segmentsRole + ' row separator "," column period compact *',
+     [('column', 'period', 'compact', ['*'], 5)], [('info', 'separator', 3)]),
+    (segmentsRole + ' row separator segment "-" column unit compact *',
+     [('column', 'unit', 'compact', ['*'], 6)], [('info', 'separator', 3)]),
+    (segmentsRole + ' row separator',
+     [], [('info', 'separator', 3)]),
+    (segmentsRole + ' row primary grouped * column period UnitCell *',
+     [('row', 'primary', 'compact', ['*'], 2), ('column', 'period', 'compact', ['*'], 6)], [('info', 'grouped', 4), ('info', 'UnitCell', 8)]),
+    (segmentsRole + ' rows primary compact *',
+     [], [('error', 'rows', 2)]),
+    (segmentsRole + ' row primary compact * column segment compact *',
+     [('row', 'primary', 'compact', ['*'], 2)], [('error', 'segment', 7)]),
+    (segmentsRole + ' row primary compressed *',
+     [], [('error', 'compressed', 4)]),
+    (segmentsRole + ' row abc_SegmentAxis compact abc_EastMember colum period compact *',
+     [], [('error', 'colum', 6)]),
+    (segmentsRole + ' row primary compact * colum period compact *',
+     [], [('error', '*', 5)]),
+    (segmentsRole + ' row abc_SegmentAxis compact abc_EastMember *',
+     [], [('error', '*', 6)]),
+    (segmentsRole + ' row',
+     [], [('error', 'row', 2)]),
+    (segmentsRole + ' row period',
+     [], [('error', 'row', 2)]),
+    (segmentsRole + ' row period compact',
+     [], [('error', 'row', 2)]),
+    (segmentsRole + ' row period compact column primary compact *',
+     [], [('error', 'row', 2)]),
+    (segmentsRole,
+     [], []),
+])
+def testEmbeddedCommandProgramCompilesCommandsAndPositions(commandText, commandNodeTupleList, messageTupleList):
+    embeddedCommandProgram = Embedding.EmbeddedCommandProgram(commandText)
+    assert embeddedCommandProgram.linkroleUri == segmentsRole
+    assert [(commandNode.rowOrColumn, commandNode.pseudoAxis, commandNode.formattingType, commandNode.memberList, commandNode.position)
+            for commandNode in embeddedCommandProgram.commandNodeList] == commandNodeTupleList
+    assert [(logLevel, token, position) for logLevel, messageFormat, token, position in embeddedCommandProgram.messageList] == messageTupleList
+    assert embeddedCommandProgram.isBroken == any(logLevel == 'error' for logLevel, token, position in messageTupleList)
+
+@pytest.mark.parametrize('commandText', ['', ' ', ' \t\n '])
+def testEmbeddedCommandProgramOfWhitespaceMatchesNoCube(commandText):
+    embeddedCommandProgram = Embedding.EmbeddedCommandProgram(commandText)
+    assert embeddedCommandProgram.linkroleUri is None
+    assert embeddedCommandProgram.commandNodeList == [] and embeddedCommandProgram.messageList == []
+    assert not embeddedCommandProgram.isBroken
+
+def makeEmbeddingFiling():
+    return SimpleNamespace(controller=FakeController(), cubeDict={segmentsRole : SimpleNamespace(isEmbedded=False, embeddingList=[])},
+                           embeddedCommandProgramDict={}, factToEmbeddingDict={}, hasEmbeddings=False, disallowEmbeddings=True)
+
+def testWhitespaceBetweenTildesIsNotAnEmbedding():
+    filing = makeEmbeddingFiling()
+    assert not Filing.Filing.checkForEmbeddedCommandAndProcessIt(filing, makeTextBlockFact('<p>~ \n ~</p>'))
+    assert filing.factToEmbeddingDict == {} and filing.controller.messageList == []
+
+def testEmbeddedCommandProgramIsReusedAcrossFactsWithTheirOwnNamespaces():
+    # the same command text, in two facts that bind the abc prefix to different namespaces.
+    filing = makeEmbeddingFiling()
+    value = '<p>~ {} column period compact * row abc_SegmentAxis compact abc_EastMember abc_WestMember row primary compact * ~</p>'.format(segmentsRole)
+    fact2020 = makeTextBlockFact(value, 'http://abc.com/2020')
+    fact2021 = makeTextBlockFact(value, 'http://abc.com/2021', 'c2')
+    assert Filing.Filing.checkForEmbeddedCommandAndProcessIt(filing, fact2020)
+    assert Filing.Filing.checkForEmbeddedCommandAndProcessIt(filing, fact2021)
+    assert len(filing.embeddedCommandProgramDict) == 1
+    embedding2020 = filing.factToEmbeddingDict[fact2020]
+    embedding2021 = filing.factToEmbeddingDict[fact2021]
+    assert filing.cubeDict[segmentsRole].embeddingList == [embedding2020, embedding2021]
+    for embedding, namespaceURI in ((embedding2020, 'http://abc.com/2020'), (embedding2021, 'http://abc.com/2021')):
+        commandTextListOfLists = embedding.commandTextListOfLists
+        assert commandTextListOfLists[0] == ['column', 'period', 'compact', '*']
+        assert commandTextListOfLists[2] == ['row', 'primary', 'compact', '*']
+        assert [(qname.namespaceURI, qname.localName) for qname in commandTextListOfLists[1][1:2] + commandTextListOfLists[1][3:]] == \
+               [(namespaceURI, 'SegmentAxis'), (namespaceURI, 'EastMember'), (namespaceURI, 'WestMember')]
+    # each embedding gets its own lists, since Embedding rewrites them in place.
+    embedding2020.handleTransposedByModifyingCommandText()
+    assert embedding2021.commandTextListOfLists[0][0] == 'column'
+
+def testBrokenEmbeddedCommandProgramIsLoggedForEachFact():
+    filing = makeEmbeddingFiling()
+    value = '<p>~ {} row primary grouped * column period compressed * ~</p>'.format(segmentsRole)
+    assert not Filing.Filing.checkForEmbeddedCommandAndProcessIt(filing, makeTextBlockFact(value, contextID='c1'))
+    assert not Filing.Filing.checkForEmbeddedCommandAndProcessIt(filing, makeTextBlockFact(value, contextID='c2'))
+    assert len(filing.embeddedCommandProgramDict) == 1 and filing.factToEmbeddingDict == {}
+    assert not filing.cubeDict[segmentsRole].isEmbedded
+    assert [logLevel for logLevel, message in filing.controller.messageList] == ['info', 'error', 'info', 'error']
+    assert filing.controller.messageList[1][1].startswith('The token compressed, at position 8 in the list of tokens in the embedded commands of '
+                                                          'the textBlock fact abc:SegmentsTextBlock, with the context c1, is malformed.')
+    assert 'with the context c2, is grouped.' in filing.controller.messageList[2][1]
+
+
+
+class FakeLayoutFact(object):
+    # facts are dictionary keys in Report.factToColDefaultDict, so they hash by identity.
+    def __init__(self, number):
+        self.qname = 'abc:Concept{}'.format(number)
+        self.context = 'c1'
+        self.unit = None
+        self.isNumeric = False
+
+def makeLayoutEmbedding(seed):
+    """An embedding with primary, segment and unit on the rows and period and product on the columns, whose positions mix
+    ints, floats equal to ints and tuples, with different members at equal positions, and whose units are then reordered
+    like a presentation group unit ordering would."""
+    rng = random.Random(seed)
+    filing = SimpleNamespace(controller=FakeController(), numReports=0, startEndContextDict={})
+    cube = SimpleNamespace(shortName='Layout', isElements=False, isStatementOfEquity=False)
+    embedding = Embedding.Embedding(filing, cube, [])
+    embedding.rowCommands = [SimpleNamespace(pseudoAxis=pseudoAxis) for pseudoAxis in ('primary', segmentAxis, 'unit')]
+    embedding.colCommands = [SimpleNamespace(pseudoAxis=pseudoAxis) for pseudoAxis in ('period', productAxis)]
+    embedding.rowPrimaryPosition = 0
+    embedding.rowUnitPosition = 2
+    embedding.columnPrimaryPosition = embedding.columnUnitPosition = -1
+    periodList = [Filing.StartEndContext(None, (datetime.datetime(2015 + i, 1, 1), datetime.datetime(2016 + i, 1, 1))) for i in range(7)]
+    memberPositionListDict = {
+        'primary' : [('abc:Concept{}'.format(i), i // 2) for i in range(10)], # two concepts at each position
+        segmentAxis : [(None, -1), ('abc:EastMember', 1), ('abc:WestMember', 1.0), ('abc:NorthMember', 0.5), ('abc:SouthMember', 2)],
+        'unit' : [(None, Utils.minNumber), ('USD', 0), ('EUR', 1), ('shares', 2)],
+        'period' : [(period, (2015 + i // 2, i % 2)) for i, period in enumerate(periodList[:6])] + [(periodList[6], (2015, 0))],
+        productAxis : [(None, -1.0), ('abc:WidgetMember', 0), ('abc:GadgetMember', 0.25), ('abc:GizmoMember', 0.25)]}
+    pseudoAxisList = [command.pseudoAxis for command in embedding.rowCommands + embedding.colCommands]
+    for i in range(rng.randint(1, 80)):
+        factAxisMemberGroup = Embedding.FactAxisMemberGroup(FakeLayoutFact(i))
+        for axisIndex, pseudoAxisName in enumerate(pseudoAxisList):
+            member, position = rng.choice(memberPositionListDict[pseudoAxisName])
+            factAxisMember = embedding.internFactAxisMember(pseudoAxisName, member, (axisIndex, position), str(member), member is None)
+            if axisIndex < len(embedding.rowCommands):
+                factAxisMemberGroup.factAxisMemberRowList += [factAxisMember]
+            else:
+                factAxisMemberGroup.factAxisMemberColList += [factAxisMember]
+        embedding.factAxisMemberGroupList += [factAxisMemberGroup]
+    # like possiblyReorderUnitsAfterTheFactAccordingToPresentationGroup(), each unit FactAxisMember is reordered once.
+    unitOrderDict = dict(zip(['USD', 'EUR', 'shares'], rng.sample([0, 1, 1, 2], 3))) # sometimes two units tie
+    for factAxisMember in {factAxisMemberGroup.factAxisMemberRowList[2] for factAxisMemberGroup in embedding.factAxisMemberGroupList}:
+        if factAxisMember.member is not None:
+            embedding.reorderUnitHelper(factAxisMember, unitOrderDict)
+    return embedding
+
+def positionTupleList(factAxisMemberList, excludedPseudoAxisSet=frozenset()):
+    # the lists of (axisIndex, positionOnAxis) tuples that rows and columns were sorted and compared by.
+    return [factAxisMember.axisMemberPositionTuple for factAxisMember in factAxisMemberList if factAxisMember.pseudoAxisName not in excludedPseudoAxisSet]
+
+def compare(a, b):
+    return (a > b) - (a < b)
+
+def assertComparisonsAgree(thingList, oldKey, newKey):
+    for a in thingList:
+        for b in thingList:
+            assert compare(newKey(a), newKey(b)) == compare(oldKey(a), oldKey(b))
+
+@pytest.mark.parametrize('seed', range(40))
+def testCoordinateKeysSortAndCompareLikeAxisMemberPositionTuples(seed):
+    embedding = makeLayoutEmbedding(seed)
+    embedding.assignCoordinateKeys()
+    factAxisMemberGroupList = embedding.factAxisMemberGroupList
+    for oldKey, newKey in ((lambda thing : positionTupleList(thing.factAxisMemberRowList), lambda thing : thing.coordinateRowTuple),
+                           (lambda thing : positionTupleList(thing.factAxisMemberColList), lambda thing : thing.coordinateColTuple)):
+        assert sorted(factAxisMemberGroupList, key=newKey) == sorted(factAxisMemberGroupList, key=oldKey)
+        assertComparisonsAgree(factAxisMemberGroupList, oldKey, newKey)
+
+    # Filing.mainFun lays out the columns, then the rows, each in coordinate order.
+    report = Report.Report(embedding.filing, embedding.cube, embedding)
+    report.generateRowsOrCols('col', sorted(factAxisMemberGroupList, key=lambda thing : thing.coordinateColTuple))
+    report.generateRowsOrCols('row', sorted(factAxisMemberGroupList, key=lambda thing : thing.coordinateRowTuple))
+    for rowOrColList, factAxisMemberListName, excludedPseudoAxisSetDict in (
+            (report.rowList, 'factAxisMemberRowList', {'coordinateList' : set(), 'coordinateListWithoutPrimary' : {'primary'},
+                                                       'coordinateListWithoutUnit' : {'unit'}, 'coordinateListWithoutUnitPeriod' : {'unit', 'period'},
+                                                       'coordinateListWithoutUnitPeriodPrimary' : {'unit', 'period', 'primary'}}),
+            (report.colList, 'factAxisMemberColList', {'coordinateList' : set(), 'coordinateListWithoutUnit' : {'unit'},
+                                                       'coordinateListWithoutUnitPeriod' : {'unit', 'period'}})):
+        # a new row or column starts wherever the old coordinate list changed.
+        oldCoordinateListList = [positionTupleList(getattr(factAxisMemberGroup, factAxisMemberListName))
+                                 for factAxisMemberGroup in sorted(factAxisMemberGroupList, key=lambda thing : positionTupleList(getattr(thing, factAxisMemberListName)))]
+        assert len(rowOrColList) == sum(1 for i, coordinateList in enumerate(oldCoordinateListList) if i == 0 or coordinateList != oldCoordinateListList[i - 1])
+        for attributeName, excludedPseudoAxisSet in excludedPseudoAxisSetDict.items():
+            assertComparisonsAgree(rowOrColList,
+                                   lambda thing : positionTupleList(getattr(thing.factAxisMemberGroup, factAxisMemberListName), excludedPseudoAxisSet),
+                                   lambda thing : getattr(thing, attributeName))
+
+def testLayoutEmbeddingsHaveTiesAcrossMembers():
+    # the random embeddings above must include different members at equal positions, including an int and a float.
+    tieCount = 0
+    for seed in range(40):
+        factAxisMemberSet = {factAxisMember for factAxisMemberGroup in makeLayoutEmbedding(seed).factAxisMemberGroupList
+                             for factAxisMember in factAxisMemberGroup.factAxisMemberRowList + factAxisMemberGroup.factAxisMemberColList}
+        positionList = [factAxisMember.axisMemberPositionTuple for factAxisMember in factAxisMemberSet]
+        tieCount += len(positionList) - len(set(positionList))
+    assert tieCount > 100
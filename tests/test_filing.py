@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Filing`, end to end on the small filing in fixtures/filing and on fake cubes.
+"""
+import os, random, filecmp, multiprocessing, threading
+from types import SimpleNamespace
+import pytest
+from lxml.etree import XMLParser, parse, tostring
+import EdgarRenderer, Filing, Report, Utils, Htmlout
+
+fixtureFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+resourcesFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
+
+def renderFiling(entrypoint, reportsFolder, *extraArgs):
+    """Render entrypoint into reportsFolder and return the messages logged while the reports were generated."""
+    controller = EdgarRenderer.EdgarRenderer()
+    options, rendererOk = EdgarRenderer.parseOptions(controller, ['-f', entrypoint, '-r', str(reportsFolder),
+                                                                  '--resources', resourcesFolder, '--renderingService', 'Instance',
+                                                                  '--reportFormat', 'HtmlAndXml', '--excelXslt', '',
+                                                                  '--debugMode'] + list(extraArgs))
+    assert rendererOk
+    messageList = []
+    addToLog = controller.addToLog
+    def recordingAddToLog(message, messageArgs=(), messageCode='error', file=None, level=0):
+        messageList.append((messageCode, message.replace(str(reportsFolder), '<reports>')))
+        addToLog(message, messageArgs=messageArgs, messageCode=messageCode, file=file, level=level)
+    controller.addToLog = recordingAddToLog
+    assert controller.runRenderer(options)
+    # only the part of the log written while rendering reports is comparable, the rest has timings and temporary folders.
+    start = next(i for i, (code, message) in enumerate(messageList) if message.startswith('Generating rendered reports'))
+    end = next(i for i, (code, message) in enumerate(messageList) if message.startswith('End of rendering'))
+    return messageList[start:end]
+
+def assertSameFolders(folder1, folder2):
+    comparison = filecmp.dircmp(str(folder1), str(folder2))
+    assert comparison.left_only == [] and comparison.right_only == []
+    match, mismatch, errors = filecmp.cmpfiles(str(folder1), str(folder2), comparison.common_files, shallow=False)
+    assert mismatch == [] and errors == []
+    assert 'R1.htm' in match and 'FilingSummary.xml' in match
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='parallel rendering needs fork')
+def testParallelRenderingMatchesSerial(tmp_path, monkeypatch):
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    entrypoint = os.path.join(fixtureFolder, 'filing', 'tst.xml')
+    serialLog = renderFiling(entrypoint, tmp_path / 'serial', '--reportProcesses', '0')
+    parallelLog = renderFiling(entrypoint, tmp_path / 'parallel', '--reportProcesses', '2')
+    assertSameFolders(tmp_path / 'serial', tmp_path / 'parallel')
+    workerMessageList = [message for code, message in parallelLog if message.startswith('Rendering ')]
+    assert workerMessageList == ['Rendering 6 reports with 2 worker processes']
+    assert serialLog == [m for m in parallelLog if m[1] not in workerMessageList]
+
+def recordHtmlWriterPoolFinishes(monkeypatch):
+    # the list gets isCancelled for each pool, once its finish(), which shuts the threads down, has returned.
+    finishedList = []
+    htmlWriterPoolClass = Filing.HtmlWriterPool
+    class RecordingHtmlWriterPool(htmlWriterPoolClass):
+        def finish(self, isCancelled=False):
+            try:
+                htmlWriterPoolClass.finish(self, isCancelled=isCancelled)
+            finally:
+                finishedList.append(isCancelled)
+    monkeypatch.setattr(Filing, 'HtmlWriterPool', RecordingHtmlWriterPool)
+    return finishedList
+
+def failFourthReport(monkeypatch, beforeFailing=lambda : None):
+    finishOffReportIfNotEmbedded = Filing.Filing.finishOffReportIfNotEmbedded
+    def failingFinishOffReportIfNotEmbedded(self, embedding):
+        # the first reports are handed to the threads, then one fails before the rest are written.
+        if len(self.reportSummaryList) == 3:
+            beforeFailing()
+            raise RuntimeError('report failed')
+        finishOffReportIfNotEmbedded(self, embedding)
+    monkeypatch.setattr(Filing.Filing, 'finishOffReportIfNotEmbedded', failingFinishOffReportIfNotEmbedded)
+
+def testHtmlWriterThreadsAreCancelledWhenReportFails(tmp_path, monkeypatch):
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    finishedList = recordHtmlWriterPoolFinishes(monkeypatch)
+    failFourthReport(monkeypatch)
+    with pytest.raises(RuntimeError) as excinfo:
+        renderFiling(os.path.join(fixtureFolder, 'filing', 'tst.xml'), tmp_path / 'reports', '--htmlWriterThreads', '2')
+    assert str(excinfo.value) == 'report failed'
+    assert finishedList == [True]
+
+def testHtmlWriterErrorDoesNotReplaceReportError(tmp_path, monkeypatch):
+    # the writers are held until the report has failed, so they fail while still pending, and are never collected.
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    finishedList = recordHtmlWriterPoolFinishes(monkeypatch)
+    reportFailedEvent = threading.Event()
+    def failingTransformAndWriteHtmlFile(controller, tree, baseNameBeforeExtension, fileName):
+        reportFailedEvent.wait(10)
+        raise OSError('writer failed')
+    monkeypatch.setattr(Report, 'transformAndWriteHtmlFile', failingTransformAndWriteHtmlFile)
+    failFourthReport(monkeypatch, reportFailedEvent.set)
+    with pytest.raises(RuntimeError) as excinfo:
+        renderFiling(os.path.join(fixtureFolder, 'filing', 'tst.xml'), tmp_path / 'reports', '--htmlWriterThreads', '2')
+    assert str(excinfo.value) == 'report failed'
+    assert finishedList == [True]
+
+def testHtmlWriterErrorIsRaisedWhenReportsSucceed(tmp_path, monkeypatch):
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    finishedList = recordHtmlWriterPoolFinishes(monkeypatch)
+    def failingTransformAndWriteHtmlFile(controller, tree, baseNameBeforeExtension, fileName):
+        raise OSError('writer failed')
+    monkeypatch.setattr(Report, 'transformAndWriteHtmlFile', failingTransformAndWriteHtmlFile)
+    with pytest.raises(OSError) as excinfo:
+        renderFiling(os.path.join(fixtureFolder, 'filing', 'tst.xml'), tmp_path / 'reports', '--htmlWriterThreads', '2')
+    assert str(excinfo.value) == 'writer failed'
+    # the error comes either from a file collected while reports are written, or from the drain at the end.
+    assert finishedList in ([False], [True])
+
+def testCubesReleaseFactMembershipsBeforeReportsAreWritten(tmp_path, monkeypatch):
+    # the fixture filing has no embedded reports, so no cube should still hold its fact memberships once reports are written.
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    heldCountList = []
+    finishOffReportIfNotEmbedded = Filing.Filing.finishOffReportIfNotEmbedded
+    def recordingFinishOffReportIfNotEmbedded(self, embedding):
+        heldCountList.append(sum(1 for cube in self.cubeDict.values() if getattr(cube, 'factMemberships', None) is not None))
+        finishOffReportIfNotEmbedded(self, embedding)
+    monkeypatch.setattr(Filing.Filing, 'finishOffReportIfNotEmbedded', recordingFinishOffReportIfNotEmbedded)
+    renderFiling(os.path.join(fixtureFolder, 'filing', 'tst.xml'), tmp_path / 'reports')
+    assert len(heldCountList) == 6 and set(heldCountList) == {0}
+
+def canonicalXml(fileName):
+    return tostring(parse(fileName, XMLParser(remove_blank_text=True)), method='c14n')
+
+def testNativeEmitterWithoutTreeMatchesXslt(tmp_path, monkeypatch):
+    # the fixture filing has no embedded reports, so the native emitter reads its reports without building R file trees.
+    monkeypatch.setenv('TEMP', str(tmp_path))
+    entrypoint = os.path.join(fixtureFolder, 'filing', 'tst.xml')
+    renderFiling(entrypoint, tmp_path / 'xslt', '--htmlReportEmitter', 'Xslt')
+    for reportFormat in ('Html', 'HtmlAndXml'):
+        nativeLog = renderFiling(entrypoint, tmp_path / reportFormat, '--reportFormat', reportFormat, '--htmlReportEmitter', 'Native')
+        assert ('debug', 'Starting native html emitter on R1.htm.') in nativeLog
+        rFileNameList = sorted(f for f in os.listdir(str(tmp_path / 'xslt')) if f.startswith('R') and f[1:2].isdigit())
+        assert 'R6.htm' in rFileNameList
+        for fileName in rFileNameList:
+            if fileName.endswith('.htm'):
+                with open(str(tmp_path / 'xslt' / fileName), 'rb') as f1, open(str(tmp_path / reportFormat / fileName), 'rb') as f2:
+                    assert Htmlout.firstDifference(f1.read(), f2.read()) is None, fileName
+            elif reportFormat == 'HtmlAndXml':
+                assert canonicalXml(str(tmp_path / 'xslt' / fileName)) == canonicalXml(str(tmp_path / reportFormat / fileName)), fileName
+            else:
+                assert not os.path.exists(str(tmp_path / reportFormat / fileName))
+
+
+
+class FakeController(object):
+    def __init__(self):
+        self.messageList = []
+    def logInfo(self, message):
+        self.messageList.append(message)
+
+class FakeColumn(object):
+    # columns are dictionary keys in row.filledCellDict, so unlike SimpleNamespace they hash by identity.
+    def __init__(self, index, isHidden, elementQnameMemberForColHidingSet):
+        self.index = index
+        self.isHidden = isHidden
+        self.factList = []
+        self.elementQnameMemberForColHidingSet = elementQnameMemberForColHidingSet
+
+def makeFlowThroughFiling(statementCount, seed):
+    """A fake filing with statementCount statement cubes, plus disclosures and equity statements, whose columns draw
+    their facts from a shared pool so that many but not all columns are covered by other reports."""
+    rng = random.Random(seed)
+    qnameList = ['q{}'.format(i) for i in range(4 * statementCount)]
+    cubeList = []
+    for i in range(statementCount + statementCount // 4):
+        cubeType = 'statement' if i < statementCount or i % 2 == 0 else 'disclosure'
+        cubeQnameList = rng.sample(qnameList, rng.randint(3, 12))
+        cubePairList = [(q, 'member{}'.format(rng.randint(0, 3))) for q in rng.sample(cubeQnameList, 2)]
+        colList = []
+        rowDict = {q : SimpleNamespace(filledCellDict={}, isHidden=False) for q in cubeQnameList}
+        for j in range(rng.randint(1, 6)):
+            colQnameList = rng.sample(cubeQnameList, rng.randint(1, min(4, len(cubeQnameList))))
+            col = FakeColumn(j, rng.random() < 0.1, {pair for pair in cubePairList if rng.random() < 0.3})
+            for q in colQnameList:
+                fact = SimpleNamespace(qname=q, value='' if rng.random() < 0.1 else '1', isNil=False)
+                col.factList.append(fact)
+                rowDict[q].filledCellDict[col] = SimpleNamespace(fact=fact)
+            colList.append(col)
+        report = SimpleNamespace(colList=colList, rowList=list(rowDict.values()))
+        embedding = SimpleNamespace(isEmbeddingOrReportBroken=False, report=report, hasElements=None,
+                                    hasElementsAndElementMemberPairs=set(cubeQnameList).union(cubePairList))
+        cubeList.append(SimpleNamespace(shortName='Cube{}'.format(i), cubeType=cubeType, isStatementOfEquity=(i % 25 == 0),
+                                        noFactsOrAllFactsSuppressed=(i % 40 == 39), embeddingList=[embedding]))
+    return SimpleNamespace(controller=FakeController()), cubeList
+
+def filterOutColumnsBeforeRefcounts(filing, sortedCubeList):
+    # Filing.filterOutColumnsWhereAllElementsAreInOtherReports as it was before the statement refcounts.
+    statementCubesList = []
+    nonStatementElementsAndElementMemberPairs = set()
+    for cube in sortedCubeList:
+        if not cube.noFactsOrAllFactsSuppressed and len(cube.embeddingList) == 1 and not cube.embeddingList[0].isEmbeddingOrReportBroken:
+            if cube.cubeType == 'statement' and not cube.isStatementOfEquity:
+                statementCubesList += [cube]
+            else:
+                nonStatementElementsAndElementMemberPairs.update(cube.embeddingList[0].hasElementsAndElementMemberPairs)
+    for i, cube in enumerate(statementCubesList):
+        elementQnamesInOtherReportsAndElementQnameMemberPairs = nonStatementElementsAndElementMemberPairs.copy()
+        for j, otherStatement in enumerate(statementCubesList):
+            if i != j:
+                elementQnamesInOtherReportsAndElementQnameMemberPairs.update(otherStatement.embeddingList[0].hasElementsAndElementMemberPairs)
+        report = cube.embeddingList[0].report
+        columnsToKill = []
+        nonHiddenColCount = 0
+        elementQnamesThatWillBeKeptProvidingThatWeHideTheseCols = set()
+        for col in report.colList:
+            if not col.isHidden:
+                nonHiddenColCount += 1
+                setOfElementQnamesInCol = {fact.qname for fact in col.factList}
+                setOfElementQnamesAndQnameMemberPairsForCol = setOfElementQnamesInCol.union(col.elementQnameMemberForColHidingSet)
+                if setOfElementQnamesAndQnameMemberPairsForCol <= elementQnamesInOtherReportsAndElementQnameMemberPairs:
+                    columnsToKill += [col]
+                else:
+                    elementQnamesThatWillBeKeptProvidingThatWeHideTheseCols.update(setOfElementQnamesInCol)
+        if 0 < len(columnsToKill) < nonHiddenColCount:
+            cube.embeddingList[0].hasElements = elementQnamesThatWillBeKeptProvidingThatWeHideTheseCols
+            for col in columnsToKill:
+                col.isHidden = True
+            filing.controller.logInfo("In ''{}'', column(s) {!s} are contained in other reports, so were removed by flow through suppression.".format(
+                                      cube.shortName, ', '.join([str(col.index + 1) for col in columnsToKill])))
+            Utils.hideEmptyRows(report.rowList)
+
+def flowThroughOutcome(filing, cubeList):
+    return (filing.controller.messageList,
+            [(cube.embeddingList[0].hasElements, [col.isHidden for col in cube.embeddingList[0].report.colList],
+              [row.isHidden for row in cube.embeddingList[0].report.rowList]) for cube in cubeList])
+
+@pytest.mark.parametrize('seed', range(20))
+def testFlowThroughSuppressionMatchesUnionOfOtherReports(seed):
+    oldFiling, oldCubeList = makeFlowThroughFiling(30, seed)
+    filterOutColumnsBeforeRefcounts(oldFiling, oldCubeList)
+    newFiling, newCubeList = makeFlowThroughFiling(30, seed)
+    Filing.Filing.filterOutColumnsWhereAllElementsAreInOtherReports(newFiling, newCubeList)
+    assert len(newFiling.controller.messageList) > 0
+    assert flowThroughOutcome(newFiling, newCubeList) == flowThroughOutcome(oldFiling, oldCubeList)
+
+def testFlowThroughSuppressionMatchesUnionOfOtherReportsWith300Roles():
+    # benchmarks/flowThroughSuppression.py times the two on the same filing.
+    oldFiling, oldCubeList = makeFlowThroughFiling(300, 300)
+    filterOutColumnsBeforeRefcounts(oldFiling, oldCubeList)
+    newFiling, newCubeList = makeFlowThroughFiling(300, 300)
+    Filing.Filing.filterOutColumnsWhereAllElementsAreInOtherReports(newFiling, newCubeList)
+    assert flowThroughOutcome(newFiling, newCubeList) == flowThroughOutcome(oldFiling, oldCubeList)
+
+
+
+class FakeCube(object):
+    # cubes and facts are dictionary keys in RemoveStuntedCashFlowColumns, so unlike SimpleNamespace they hash by identity.
+    def __init__(self, factMemberships):
+        self.factMemberships = factMemberships
+
+class FakeFact(object):
+    def __init__(self, elementQname):
+        self.elementQname = elementQname
+        self.value = '1'
+        self.isNil = False
+
+def removeStuntedColumn(otherCube):
+    """Hide the stunted quarter column of a cash flow whose one fact's element is also in otherCube, and return whether
+    that fact still counts as used."""
+    fact = FakeFact('abc:Quarterly')
+    yearFactList = [FakeFact('abc:Yearly{}'.format(i)) for i in range(8)]
+    cube = FakeCube([(f, {}, None) for f in yearFactList + [fact]])
+    cube.shortName = 'Cash Flows'
+    report = SimpleNamespace(rowList=[],
+                             colList=[SimpleNamespace(isHidden=False, startEndContext=SimpleNamespace(numMonths=12), factList=yearFactList),
+                                      SimpleNamespace(isHidden=False, startEndContext=SimpleNamespace(numMonths=3), factList=[fact])])
+    filing = SimpleNamespace(controller=FakeController(), usedOrBrokenFactSet=set(yearFactList + [fact]),
+                             elementDict={'abc:Quarterly' : SimpleNamespace(inCubes={'cash flow' : cube, 'other' : otherCube})})
+    Filing.Filing.RemoveStuntedCashFlowColumns(filing, report, cube)
+    assert report.colList[1].isHidden and [fm[0] for fm in cube.factMemberships] == yearFactList
+    return fact in filing.usedOrBrokenFactSet
+
+def testRemoveStuntedCashFlowColumnsCountsReleasedCubesAsPresentingTheirFacts():
+    assert removeStuntedColumn(FakeCube(None)) # released, so it held every fact of the element
+    assert not removeStuntedColumn(FakeCube([])) # still holds a list, which doesn't have the fact
+    garbageCollectedCube = FakeCube(None)
+    garbageCollectedCube.__dict__.clear()
+    assert not removeStuntedColumn(garbageCollectedCube)
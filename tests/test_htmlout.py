@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Htmlout`, against InstanceReport.xslt on the R files in fixtures/reports.
+"""
+import os, shutil
+import pytest
+from lxml.etree import parse, XSLT, tostring
+import Htmlout, EdgarRenderer
+
+fixtureFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+resourcesFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
+reportsFolder = os.path.join(fixtureFolder, 'reports')
+reportFileNameList = sorted(os.listdir(reportsFolder))
+
+def xsltHtmlBytes(tree):
+    # as Report.transformAndWriteHtmlFile runs the bundled stylesheet and writes its result.
+    transform = XSLT(parse(os.path.join(resourcesFolder, 'InstanceReport.xslt')))
+    result = transform(tree, asPage=XSLT.strparam('true'))
+    return tostring(result, method='html', with_tail=False, pretty_print=True, encoding='us-ascii')
+
+@pytest.mark.parametrize('reportFileName', reportFileNameList)
+def testHtmlWriterMatchesXslt(reportFileName):
+    tree = parse(os.path.join(reportsFolder, reportFileName))
+    assert Htmlout.firstDifference(xsltHtmlBytes(tree), Htmlout.HtmlWriter(tree).htmlBytes()) is None
+
+def testFixturesCoverFootnotesEmbeddedReportsAndElementNames():
+    def rootOf(reportFileName):
+        return parse(os.path.join(reportsFolder, reportFileName)).getroot()
+    assert rootOf('R3.xml').find('Footnotes/Footnote') is not None
+    assert any(len(e.text or '') > 0 for e in rootOf('R3.xml').iter('FootnoteIndexer'))
+    assert rootOf('R5.xml').find('Rows/Row/Cells/Cell/EmbeddedReport/InstanceReport') is not None
+    assert rootOf('R5.xml').find('Rows/Row/Cells/Cell/EmbeddedReport/InstanceReport/Footnotes/Footnote') is not None
+    assert rootOf('R7.xml').findtext('ShowElementNames') == 'true'
+
+def testFirstDifferenceFindsChangedLine():
+    tree = parse(os.path.join(reportsFolder, 'R3.xml'))
+    xsltBytes = xsltHtmlBytes(tree)
+    lineList = xsltBytes.splitlines()
+    changedLineNumber = len(lineList) // 2
+    lineList[changedLineNumber - 1] += b' changed'
+    difference = Htmlout.firstDifference(xsltBytes, b'\n'.join(lineList))
+    assert difference is not None and difference[0] == changedLineNumber
+    assert Htmlout.firstDifference(xsltBytes, b'\n'.join(lineList[:-1])) is not None
+
+def parseRendererOptions(*extraArgs):
+    controller = EdgarRenderer.EdgarRenderer()
+    warningList = []
+    logWarn = controller.logWarn
+    def recordingLogWarn(message, messageArgs=(), file=None):
+        warningList.append(message)
+        logWarn(message, messageArgs=messageArgs, file=file)
+    controller.logWarn = recordingLogWarn
+    options, rendererOk = EdgarRenderer.parseOptions(controller, ['--resources', resourcesFolder, '--renderingService', 'Instance',
+                                                                  '--excelXslt', ''] + list(extraArgs))
+    assert rendererOk
+    # as EdgarRenderer.runRenderer does before it renders anything.
+    controller.retrieveDefaultREConfigParams(options)
+    controller.initializeReOptions(options)
+    return controller, warningList
+
+def testNativeEmitterKeptForBundledStylesheet():
+    controller, warningList = parseRendererOptions('--htmlReportEmitter', 'Native')
+    assert controller.htmlReportEmitter == 'native'
+    assert warningList == []
+
+def testNativeEmitterFallsBackToXsltForOtherStylesheets(tmp_path):
+    reportXslt = tmp_path / 'CustomInstanceReport.xslt'
+    shutil.copy(os.path.join(resourcesFolder, 'InstanceReport.xslt'), str(reportXslt))
+    controller, warningList = parseRendererOptions('--htmlReportEmitter', 'Native', '--reportXslt', str(reportXslt))
+    assert controller.htmlReportEmitter == 'xslt'
+    assert len(warningList) == 1 and str(reportXslt) in warningList[0]
+    controller, warningList = parseRendererOptions('--htmlReportEmitter', 'Compare', '--reportXslt', str(reportXslt))
+    assert controller.htmlReportEmitter == 'compare' and warningList == []
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Report`, on fake rows, columns and facts.
+"""
+import random, datetime
+from types import SimpleNamespace
+import pytest
+import Report, Utils
+
+class FakeColumn(object):
+    # columns are dictionary keys in hideRedundantColumns, so unlike SimpleNamespace they hash by identity.
+    def __init__(self, index, isHidden, factList):
+        self.index = index
+        self.isHidden = isHidden
+        self.factList = factList
+
+def makeColumns(colCount, factCount, seed):
+    """colCount columns drawing on factCount facts, with empty, duplicate, already hidden, subset and superset columns."""
+    rng = random.Random(seed)
+    factList = [object() for i in range(factCount)]
+    colList = []
+    for i in range(colCount):
+        choice = rng.random()
+        if choice < 0.05:
+            colFactList = []
+        elif choice < 0.2 and colList:
+            colFactList = list(rng.choice(colList).factList) # duplicate, but maybe in another order
+            rng.shuffle(colFactList)
+        elif choice < 0.4 and colList:
+            otherFactList = rng.choice(colList).factList
+            colFactList = rng.sample(otherFactList, rng.randint(0, len(otherFactList)))
+        elif choice < 0.55 and colList:
+            colFactList = rng.choice(colList).factList + rng.sample(factList, rng.randint(1, 3))
+        else:
+            colFactList = rng.sample(factList, rng.randint(1, min(12, factCount)))
+        colList.append(FakeColumn(i, rng.random() < 0.1, colFactList))
+    return SimpleNamespace(colList=colList)
+
+def makeWideColumns(colCount, seed):
+    """colCount columns of a wide report, each with its own facts, except for a few that repeat part of an earlier column."""
+    rng = random.Random(seed)
+    colList = []
+    for i in range(colCount):
+        if colList and rng.random() < 0.1:
+            otherFactList = rng.choice(colList).factList
+            colFactList = rng.sample(otherFactList, rng.randint(1, len(otherFactList)))
+        else:
+            colFactList = [object() for j in range(rng.randint(20, 60))]
+        colList.append(FakeColumn(i, False, colFactList))
+    return SimpleNamespace(colList=colList)
+
+def hideRedundantColumnsWithSets(self):
+    # Report.hideRedundantColumns as it was before fact bitsets.
+    factSets = {}
+    for col in self.colList:
+        if not col.isHidden:
+            factSets[col] = set(col.factList) # fact objects are unique and not copied.
+    for col1,facts1 in factSets.items():
+        if not col1.isHidden:
+            for col2,facts2 in factSets.items():
+                if not col1 is col2 and not col2.isHidden:
+                    if facts2.issubset(facts1):
+                        col2.isHidden = True
+
+@pytest.mark.parametrize('seed', range(30))
+def testHideRedundantColumnsMatchesSubsetLoop(seed):
+    colCount = random.Random(seed).randint(1, 40)
+    oldReport = makeColumns(colCount, 30, seed)
+    hideRedundantColumnsWithSets(oldReport)
+    newReport = makeColumns(colCount, 30, seed)
+    Report.Report.hideRedundantColumns(newReport)
+    assert [col.isHidden for col in newReport.colList] == [col.isHidden for col in oldReport.colList]
+
+def testHideRedundantColumnsMatchesSubsetLoopWith500Columns():
+    # benchmarks/hideRedundantColumns.py times the two on the same columns.
+    oldReport = makeWideColumns(500, 43)
+    hideRedundantColumnsWithSets(oldReport)
+    newReport = makeWideColumns(500, 43)
+    Report.Report.hideRedundantColumns(newReport)
+    assert [col.isHidden for col in newReport.colList] == [col.isHidden for col in oldReport.colList]
+    assert 0 < sum(col.isHidden for col in newReport.colList) < 500
+
+
+
+class FakeUnit(object):
+    def __init__(self, currency):
+        self.measures = [[SimpleNamespace(localName=currency)]]
+
+class FakeFact(object):
+    # facts are kept in sets in unitTypeToFactSetDefaultDict, so they hash by identity.
+    def __init__(self, number, unit):
+        self.number = number
+        self.unit = unit
+
+class FakeRowOrCol(object):
+    def __init__(self, index, coordinateListWithoutUnitPeriod, periodTypeStr, endTime, isHidden):
+        self.index = index
+        self.coordinateListWithoutUnitPeriod = coordinateListWithoutUnitPeriod
+        self.startEndContext = SimpleNamespace(periodTypeStr=periodTypeStr, endTime=endTime)
+        self.isHidden = isHidden
+        self.filledCellDict = {}
+        self.unitTypeToFactSetDefaultDict = {}
+
+class FakeMergingReport(object):
+    areFactsCompatableByUnits = Report.Report.areFactsCompatableByUnits
+    mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible = Report.Report.mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible
+
+    def __init__(self, unitPosition):
+        self.embedding = SimpleNamespace(rowUnitPosition=unitPosition, columnUnitPosition=unitPosition)
+        self.pairingList = []
+
+    def deepCopyRowsOrCols(self, rowOrColStr, mergeIntoThisRowOrCol, mergeRowOrCol):
+        # records the (instant, duration) pairing, and like Report.deepCopyRowsOrCols fills the duration and hides the instant.
+        self.pairingList += [(mergeRowOrCol.index, mergeIntoThisRowOrCol.index)]
+        for otherRowOrCol, mergeCell in mergeRowOrCol.filledCellDict.items():
+            if not otherRowOrCol.isHidden:
+                mergeIntoThisRowOrCol.filledCellDict[otherRowOrCol] = mergeCell
+        for typeName, factSet in mergeRowOrCol.unitTypeToFactSetDefaultDict.items():
+            mergeIntoThisRowOrCol.unitTypeToFactSetDefaultDict.setdefault(typeName, set()).update(factSet)
+        mergeRowOrCol.isHidden = True
+
+class FakeTwoPointerMergingReport(FakeMergingReport):
+    def mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible(self, rowOrColStr, rowOrColList):
+        # Report.mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible as it was before grouping by end date.
+        if rowOrColStr == 'row':
+            unitsAxisOnRowsOrCols = self.embedding.rowUnitPosition != -1
+        else:
+            unitsAxisOnRowsOrCols = self.embedding.columnUnitPosition != -1
+
+        tempRowOrColList = sorted(rowOrColList, key = lambda thing : thing.coordinateListWithoutUnitPeriod)
+        while len(tempRowOrColList) > 0:
+
+            previousCoordinateListWithoutPeriodAndUnit = tempRowOrColList[0].coordinateListWithoutUnitPeriod
+            instantRowOrColList = []
+            durationRowOrColList = []
+            while len(tempRowOrColList) > 0 and previousCoordinateListWithoutPeriodAndUnit == tempRowOrColList[0].coordinateListWithoutUnitPeriod:
+                rowOrCol = tempRowOrColList.pop(0)
+                if not rowOrCol.isHidden:
+                    if rowOrCol.startEndContext.periodTypeStr == 'instant':
+                        instantRowOrColList += [rowOrCol]
+                    else:
+                        durationRowOrColList += [rowOrCol]
+
+            instantRowOrColList.sort (key = lambda thing : thing.startEndContext.endTime)
+            durationRowOrColList.sort(key = lambda thing : thing.startEndContext.endTime)
+
+            while len(instantRowOrColList) > 0 and len(durationRowOrColList) > 0:
+                instantRowOrCol = instantRowOrColList[0]
+                durationRowOrCol = durationRowOrColList[0]
+
+                # compare instants to durations.  if not equal, throw one away and try again, else continue
+                if   instantRowOrCol.startEndContext.endTime < durationRowOrCol.startEndContext.endTime:
+                    del instantRowOrColList[0]
+                elif instantRowOrCol.startEndContext.endTime > durationRowOrCol.startEndContext.endTime:
+                    del durationRowOrColList[0]
+
+                else:
+                    if not unitsAxisOnRowsOrCols or self.areFactsCompatableByUnits(instantRowOrCol, durationRowOrCol):
+                        flag = True
+                        durationFilledCellDict = durationRowOrCol.filledCellDict
+                        for otherRowOrCol, instantCell in instantRowOrCol.filledCellDict.items():
+                            if not otherRowOrCol.isHidden:
+                                durationCell = durationFilledCellDict.get(otherRowOrCol)
+                                if durationCell is not None and instantCell.fact != durationCell.fact:
+                                    flag = False
+                                    break # vectors overlap, can't be combined
+                        if flag:
+                            self.deepCopyRowsOrCols(rowOrColStr, durationRowOrCol, instantRowOrCol)
+                    del durationRowOrColList[0]
+
+def makeMergingReport(reportClass, seed):
+    """A report with rows or columns in several coordinate groups, over a few repeated end dates, some of them hidden, whose
+    cells on the other axis sometimes hold the same fact and sometimes overlap, in dollars, euros, dollars per share or no unit."""
+    rng = random.Random(seed)
+    report = reportClass(rng.choice([-1, 0]))
+    rowOrColStr = rng.choice(['row', 'col'])
+    otherList = [FakeColumn(i, rng.random() < 0.1, []) for i in range(rng.randint(2, 8))]
+    unitList = [FakeUnit('USD'), FakeUnit('EUR')]
+    endTimeList = [datetime.date(2010 + i, 12, 31) for i in range(rng.randint(1, 5))]
+    groupList = [('coordinate{}'.format(i),) for i in range(rng.randint(1, 4))]
+    factList = []
+    def newFact(unit):
+        factList.append(FakeFact(len(factList), unit))
+        return factList[-1]
+    sharedFactDict = {}
+    rowOrColList = []
+    for i in range(rng.randint(0, 30)):
+        rowOrCol = FakeRowOrCol(i, rng.choice(groupList), rng.choice(['instant', 'duration']), rng.choice(endTimeList), rng.random() < 0.15)
+        typeName = rng.choice([None, 'monetaryDerivedType', 'monetaryDerivedType', 'perShareDerivedType'])
+        unit = None if typeName is None else rng.choice(unitList)
+        for other in rng.sample(otherList, rng.randint(0, len(otherList))):
+            if rng.random() < 0.7:
+                # the same fact can be in rows or columns with the same end date, so they don't really overlap.
+                key = (other.index, rowOrCol.startEndContext.endTime, unit)
+                if key not in sharedFactDict:
+                    sharedFactDict[key] = newFact(unit)
+                fact = sharedFactDict[key]
+            else:
+                fact = newFact(unit)
+            rowOrCol.filledCellDict[other] = SimpleNamespace(fact=fact)
+            if typeName is not None:
+                rowOrCol.unitTypeToFactSetDefaultDict.setdefault(typeName, set()).add(fact)
+        rowOrColList += [rowOrCol]
+    return report, rowOrColStr, rowOrColList
+
+def mergingOutcome(report, rowOrColList):
+    # the old walk merged in order of end date, the new one in order of the list, so the pairings are compared sorted.
+    return (sorted(report.pairingList), [rowOrCol.isHidden for rowOrCol in rowOrColList],
+            [sorted((other.index, cell.fact.number) for other, cell in rowOrCol.filledCellDict.items()) for rowOrCol in rowOrColList])
+
+@pytest.mark.parametrize('seed', range(200))
+def testMergeInstantsIntoDurationsMatchesTwoPointerPairing(seed):
+    oldReport, rowOrColStr, oldRowOrColList = makeMergingReport(FakeTwoPointerMergingReport, seed)
+    oldReport.mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible(rowOrColStr, oldRowOrColList)
+    newReport, rowOrColStr, newRowOrColList = makeMergingReport(FakeMergingReport, seed)
+    newReport.mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible(rowOrColStr, newRowOrColList)
+    assert mergingOutcome(newReport, newRowOrColList) == mergingOutcome(oldReport, oldRowOrColList)
+
+def testMergingReportsCoverRepeatedEndDatesAndSeveralGroups():
+    # the random reports above must include instants merged into several durations ending on their date, instants on a
+    # date that already has an instant, and merges in more than one coordinate group.
+    reusedInstantCount = unpairedRepeatedInstantCount = severalGroupCount = 0
+    for seed in range(200):
+        report, rowOrColStr, rowOrColList = makeMergingReport(FakeMergingReport, seed)
+        report.mergeRowsOrColsInstantsIntoDurationsIfUnitsCompatible(rowOrColStr, rowOrColList)
+        instantList = [instant for instant, duration in report.pairingList]
+        reusedInstantCount += len(instantList) > len(set(instantList))
+        pairedEndTimeSet = {rowOrColList[instant].startEndContext.endTime for instant in instantList}
+        unpairedRepeatedInstantCount += any(rowOrCol.startEndContext.periodTypeStr == 'instant' and rowOrCol.index not in instantList
+                                            and rowOrCol.startEndContext.endTime in pairedEndTimeSet for rowOrCol in rowOrColList)
+        severalGroupCount += len({rowOrColList[instant].coordinateListWithoutUnitPeriod for instant in instantList}) > 1
+    assert reusedInstantCount > 10 and unpairedRepeatedInstantCount > 10 and severalGroupCount > 10
+
+
+
+class FakeGridFact(object):
+    def __init__(self, number, value, isNil=False):
+        self.number = number
+        self.value = value
+        self.isNil = isNil
+        self.isNumeric = False
+        self.unit = None
+
+class FakeGridController(object):
+    def logWarn(self, message):
+        raise AssertionError(message)
+
+def makeFactAxisMemberGroup(segmentLabel):
+    factAxisMemberRowList = [SimpleNamespace(pseudoAxisName='primary', memberIsDefault=False, memberLabel='Revenues'),
+                             SimpleNamespace(pseudoAxisName='abc:SegmentAxis', memberIsDefault=segmentLabel is None, memberLabel=segmentLabel)]
+    return SimpleNamespace(fact=SimpleNamespace(context='c1'), preferredLabel=None, factAxisMemberRowList=factAxisMemberRowList)
+
+def addGridRow(report, segmentLabel):
+    row = Report.Row(report.filing, report, factAxisMemberGroup=makeFactAxisMemberGroup(segmentLabel),
+                     coordinateListWithoutUnitPeriodPrimary=(segmentLabel,))
+    report.rowList += [row]
+    return row
+
+def makeGridReport(seed):
+    """A real report of up to 8 rows by 6 columns, the rows in a few segments, with cells placed at random by setCell(),
+    some of them placed twice."""
+    rng = random.Random(seed)
+    filing = SimpleNamespace(controller=FakeGridController(), numReports=0)
+    embedding = SimpleNamespace(rowPrimaryPosition=0, columnPrimaryPosition=-1, factThatContainsEmbeddedCommand=None)
+    cube = SimpleNamespace(shortName='Grid', isUnlabeled=False)
+    report = Report.Report(filing, cube, embedding)
+    for i in range(rng.randint(1, 6)):
+        report.colList += [Report.Column(filing, report, None, makeFactAxisMemberGroup(None), (), (), ())]
+    for i in range(rng.randint(1, 8)):
+        addGridRow(report, rng.choice([None, 'East', 'West']))
+    factList = []
+    for i in range(rng.randint(0, 60)):
+        row = rng.choice(report.rowList)
+        col = rng.choice(report.colList)
+        factList += [FakeGridFact(len(factList), rng.choice(['', '', '1', 'a']), rng.random() < 0.1)]
+        report.setCell(row, col, Report.Cell(filing, row, col, col.index, fact=factList[-1]))
+    return rng, report
+
+def assertGridIsInStep(report):
+    for row in report.rowList:
+        assert row.filledCellDict == {col : row.cellList[col.index] for col in report.colList if row.cellList[col.index] is not None}
+    for col in report.colList:
+        assert col.filledCellDict == {row : row.cellList[col.index] for row in report.rowList if row.cellList[col.index] is not None}
+
+def assertVisibleListsAreCurrent(report):
+    assert report.visibleRowList() == [row for row in report.rowList if not row.isHidden]
+    assert report.visibleColIndexList() == [i for i, col in enumerate(report.colList) if not col.isHidden]
+    for i, row in enumerate(report.rowList):
+        assert report.generateCellVector('row', i) == (row, [row.cellList[j] for j, col in enumerate(report.colList) if not col.isHidden])
+    for i, col in enumerate(report.colList):
+        assert report.generateCellVector('col', i) == (col, [row.cellList[i] for row in report.rowList if not row.isHidden])
+
+@pytest.mark.parametrize('seed', range(50))
+def testSetCellKeepsCellListAndFilledCellDictsInStep(seed):
+    rng, report = makeGridReport(seed)
+    assertGridIsInStep(report)
+    # cells are replaced on rows and columns made after the first cells were placed too.
+    row = addGridRow(report, 'East')
+    for col in rng.sample(report.colList, rng.randint(1, len(report.colList))):
+        for i in range(2):
+            report.setCell(row, col, Report.Cell(report.filing, row, col, col.index, fact=FakeGridFact(-1, '1')))
+    assertGridIsInStep(report)
+
+@pytest.mark.parametrize('seed', range(50))
+def testVisibleListsFollowHiddenFlagsAndNewRows(seed):
+    rng, report = makeGridReport(seed)
+    for i in range(20):
+        assertVisibleListsAreCurrent(report)
+        choice = rng.random()
+        if i == 10:
+            report.makeSegmentTitleRows() # a new rowList, with a title row before each visible segment.  only done once, like in a filing
+        elif choice < 0.4:
+            rowOrCol = rng.choice(report.rowList)
+            rowOrCol.isHidden = not rowOrCol.isHidden
+        elif choice < 0.8:
+            rowOrCol = rng.choice(report.colList)
+            rowOrCol.isHidden = rng.random() < 0.5 # sometimes not a change
+        else:
+            addGridRow(report, rng.choice([None, 'East', 'West']))
+    assertVisibleListsAreCurrent(report)
+
+@pytest.mark.parametrize('rowOrColStr', ['row', 'col'])
+def testMergeAfterHidingCopiesCellsToTheirOwnRowOrColumn(rowOrColStr):
+    rng, report = makeGridReport(0)
+    while len(report.colList) < 4:
+        report.colList += [Report.Column(report.filing, report, None, makeFactAxisMemberGroup(None), (), (), ())]
+    while len(report.rowList) < 4:
+        addGridRow(report, None)
+    for row in report.rowList:
+        row.cellList += [None] * (len(report.colList) - len(row.cellList))
+    if rowOrColStr == 'row':
+        mergeIntoThisRowOrCol, mergeRowOrCol, hiddenOther = report.rowList[0], report.rowList[1], report.colList[1]
+        otherList = report.colList
+        def setCell(rowOrCol, other, cell):
+            return report.setCell(rowOrCol, other, cell)
+    else:
+        mergeIntoThisRowOrCol, mergeRowOrCol, hiddenOther = report.colList[0], report.colList[1], report.rowList[1]
+        otherList = report.rowList
+        def setCell(rowOrCol, other, cell):
+            return report.setCell(other, rowOrCol, cell)
+    for rowOrCol in (mergeIntoThisRowOrCol, mergeRowOrCol):
+        for other in otherList:
+            rowOrCol.filledCellDict.pop(other, None)
+            other.filledCellDict.pop(rowOrCol, None)
+            if rowOrColStr == 'row':
+                rowOrCol.cellList[other.index] = None
+            else:
+                other.cellList[rowOrCol.index] = None
+    def makeCell(rowOrCol, other, fact):
+        row, col = (rowOrCol, other) if rowOrColStr == 'row' else (other, rowOrCol)
+        return Report.Cell(report.filing, row, col, col.index, fact=fact)
+    # the row or column that goes hidden is before the cells that are copied, so a copy that went by visible position would
+    # land one over.
+    hiddenOther.isHidden = True
+    factDict = {}
+    for other in otherList:
+        factDict[other] = FakeGridFact(other.index, '1')
+        setCell(mergeRowOrCol, other, makeCell(mergeRowOrCol, other, factDict[other]))
+    keptCell = setCell(mergeIntoThisRowOrCol, hiddenOther, makeCell(mergeIntoThisRowOrCol, hiddenOther, FakeGridFact(-1, 'kept')))
+    report.deepCopyRowsOrCols(rowOrColStr, mergeIntoThisRowOrCol, mergeRowOrCol)
+    assert mergeRowOrCol.isHidden
+    assert mergeIntoThisRowOrCol.filledCellDict[hiddenOther] is keptCell
+    assert {other : cell.fact for other, cell in mergeIntoThisRowOrCol.filledCellDict.items() if other is not hiddenOther} == \
+           {other : fact for other, fact in factDict.items() if other is not hiddenOther}
+    assertGridIsInStep(report)
+
+def hideEmptyRowsOverCellLists(rowList):
+    # Utils.hideEmptyRows as it was before filledCellDict.
+    for row in rowList:
+        if not any(cell.fact.value != '' or cell.fact.isNil for cell in row.cellList if cell is not None and not cell.column.isHidden):
+            row.isHidden = True
+
+@pytest.mark.parametrize('seed', range(50))
+def testHideEmptyRowsWithHiddenColumnsMatchesCellListLoop(seed):
+    rng, oldReport = makeGridReport(seed)
+    ignore, newReport = makeGridReport(seed)
+    for oldCol, newCol in zip(oldReport.colList, newReport.colList):
+        oldCol.isHidden = newCol.isHidden = rng.random() < 0.3
+    hideEmptyRowsOverCellLists(oldReport.rowList)
+    Utils.hideEmptyRows(newReport.rowList)
+    assert [row.isHidden for row in newReport.rowList] == [row.isHidden for row in oldReport.rowList]
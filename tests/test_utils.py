@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for :mod:`EdgarRenderer.Utils`.
+"""
+import Utils
+
+role1 = 'http://example.com/role/One'
+role2 = 'http://example.com/role/Two'
+
+class FakeRelationship(object):
+    def __init__(self, fromModelObject, toModelObject, linkrole):
+        self.fromModelObject = fromModelObject
+        self.toModelObject = toModelObject
+        self.linkrole = linkrole
+    def __repr__(self):
+        return '{}->{}@{}'.format(self.fromModelObject, self.toModelObject, self.linkrole[-3:])
+
+class FakeRelationshipSet(object):
+    def __init__(self, modelRelationships):
+        self.modelRelationships = modelRelationships
+
+# role1: A -> B -> C -> A is a cycle, and C -> D hangs off it.  E -> F is separate.
+# role2: A -> G -> H, and B -> A, so the same concepts reach different things in each role.
+arcs = [('A', 'B', role1), ('B', 'C', role1), ('C', 'A', role1), ('C', 'D', role1), ('E', 'F', role1),
+        ('A', 'G', role2), ('G', 'H', role2), ('B', 'A', role2)]
+
+def makeRelationships():
+    return [FakeRelationship(*arc) for arc in arcs]
+
+def expectedClosure(relationships, concept, linkroleUri):
+    # straightforward fixpoint, independent of the index: keep adding relationships whose from is already reached.
+    reached = {concept}
+    result = set()
+    changed = True
+    while changed:
+        changed = False
+        for r in relationships:
+            if r.linkrole == linkroleUri and r.fromModelObject in reached and r not in result:
+                result.add(r)
+                reached.add(r.toModelObject)
+                changed = True
+    return result
+
+def arcsOf(relationshipSet):
+    return sorted((r.fromModelObject, r.toModelObject) for r in relationshipSet)
+
+def testClosureFollowsCycleOnce():
+    relationships = makeRelationships()
+    index = Utils.RelationshipClosureIndex(FakeRelationshipSet(relationships))
+    result = index.modelRelationshipsTransitiveFrom('B', role1)
+    assert arcsOf(result) == [('A', 'B'), ('B', 'C'), ('C', 'A'), ('C', 'D')]
+
+def testSequentialCallsDoNotLeak():
+    relationships = makeRelationships()
+    index = Utils.RelationshipClosureIndex(FakeRelationshipSet(relationships))
+    # interleave concepts and roles, and ask some of them twice, so that any state carried between calls would show.
+    calls = [('A', role1), ('E', role1), ('A', role2), ('D', role1), ('B', role2), ('G', role2),
+             ('C', role1), ('E', role2), ('H', role2), ('A', role1), ('F', role1), ('B', role2)]
+    for concept, linkroleUri in calls:
+        result = index.modelRelationshipsTransitiveFrom(concept, linkroleUri)
+        assert set(result) == expectedClosure(relationships, concept, linkroleUri), (concept, linkroleUri)
+    assert arcsOf(index.modelRelationshipsTransitiveFrom('E', role1)) == [('E', 'F')]
+    assert arcsOf(index.modelRelationshipsTransitiveFrom('B', role2)) == [('A', 'G'), ('B', 'A'), ('G', 'H')]
+    assert len(index.modelRelationshipsTransitiveFrom('D', role1)) == 0
+    assert len(index.modelRelationshipsTransitiveFrom('E', role2)) == 0
+
+def testResultsCannotBeMutatedByCaller():
+    index = Utils.RelationshipClosureIndex(FakeRelationshipSet(makeRelationships()))
+    result = index.modelRelationshipsTransitiveFrom('A', role2)
+    assert isinstance(result, frozenset)
+    assert index.modelRelationshipsTransitiveFrom('A', role2) is result